@@ -0,0 +1,267 @@
+"""
+배치 파일 평가 (OpenAI Batch API JSONL 형식)
+- 답변 생성(answer) / Judge(judge) 요청을 배치 요청 JSONL로 내보내고, 완료된 결과 JSONL을 custom_id 기준으로 수집
+- 제출(submit)/조회(fetch)는 OpenAI Files + Batches API 사용 (openai 패키지 필요)
+- 로컬 대체 처리기(fulfill_locally)는 네트워크 없이 같은 형식의 결과 파일을 만들어 전체 흐름을 오프라인으로 점검
+
+작업 디렉터리: .runs/batches/<batch_id>/
+    manifest.json             케이스 목록, 단계별 상태, 제출한 provider batch ID, 수집한 답변
+    <phase>_requests.jsonl    {"custom_id", "method": "POST", "url": "/v1/chat/completions", "body": {...}}
+    <phase>_results.jsonl     {"id", "custom_id", "response": {"status_code", "body"}, "error"}
+
+custom_id = "<phase>/<case_id>" 이므로 결과 파일의 순서와 무관하게 케이스에 대응됩니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from run_journal import new_run_id, runs_dir
+
+
+PHASES = ("answer", "judge")
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+_ROLES = {"system": "system", "human": "user", "user": "user", "ai": "assistant", "assistant": "assistant"}
+
+
+def batches_dir() -> Path:
+    return runs_dir() / "batches"
+
+
+def custom_id(phase: str, case_id: str) -> str:
+    return f"{phase}/{case_id}"
+
+
+def split_custom_id(value: str) -> Tuple[str, str]:
+    phase, _, case_id = value.partition("/")
+    return phase, case_id
+
+
+def to_openai_messages(messages: Sequence[Any]) -> List[Dict[str, str]]:
+    """LangChain 메시지 또는 (role, content) 튜플 → Chat Completions 메시지"""
+    converted = []
+    for m in messages:
+        if isinstance(m, tuple):
+            role, content = m
+        else:
+            role, content = getattr(m, "type", "user"), m.content
+        converted.append({"role": _ROLES.get(role, role), "content": content})
+    return converted
+
+
+def json_schema_format(schema) -> Dict[str, Any]:
+    """pydantic 스키마 → response_format (json_schema, strict)"""
+    body = schema.model_json_schema()
+    body["additionalProperties"] = False
+    body["required"] = list(body.get("properties", {}))
+    return {"type": "json_schema", "json_schema": {"name": schema.__name__, "schema": body, "strict": True}}
+
+
+def chat_request(phase: str, case_id: str, model: str, messages: Sequence[Any],
+                 temperature: Optional[float] = None, response_format: Optional[Dict] = None) -> Dict[str, Any]:
+    body: Dict[str, Any] = {"model": model, "messages": to_openai_messages(messages)}
+    if temperature is not None:
+        body["temperature"] = temperature
+    if response_format is not None:
+        body["response_format"] = response_format
+    return {"custom_id": custom_id(phase, case_id), "method": "POST", "url": CHAT_COMPLETIONS_URL, "body": body}
+
+
+def read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def write_jsonl(path: Path, rows: Sequence[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def parse_result_line(row: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str], Optional[Dict]]:
+    """
+    결과 한 줄 해석
+
+    Returns:
+        (custom_id, content, error, usage): 성공이면 content, 실패면 error
+    """
+    cid = row.get("custom_id", "")
+    if row.get("error"):
+        err = row["error"]
+        return cid, None, err.get("message", str(err)) if isinstance(err, dict) else str(err), None
+    response = row.get("response") or {}
+    if response.get("status_code", 200) != 200:
+        return cid, None, f"HTTP {response.get('status_code')}: {json.dumps(response.get('body'), ensure_ascii=False)[:200]}", None
+    body = response.get("body") or {}
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return cid, None, "응답 본문에 choices[0].message.content 가 없습니다", None
+    return cid, content, None, body.get("usage")
+
+
+class BatchWorkspace:
+    """배치 작업 디렉터리 1개 (manifest + 단계별 요청/결과 파일)"""
+
+    def __init__(self, batch_id: str, directory: Optional[Path] = None):
+        self.batch_id = batch_id
+        self.dir = Path(directory or batches_dir()) / batch_id
+        self.manifest_path = self.dir / "manifest.json"
+        self.manifest: Dict[str, Any] = {"batch_id": batch_id, "created_at": datetime.now().isoformat(),
+                                         "cases": {}, "phases": {}}
+        if self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    @classmethod
+    def create(cls) -> "BatchWorkspace":
+        return cls(f"batch-{new_run_id()}")
+
+    @classmethod
+    def open(cls, batch_id: str) -> "BatchWorkspace":
+        """기존 작업 열기 ('latest' 는 가장 최근 작업)"""
+        if batch_id == "latest":
+            found = sorted(p.name for p in batches_dir().glob("batch-*") if p.is_dir())
+            batch_id = found[-1] if found else ""
+        ws = cls(batch_id)
+        if not batch_id or not ws.manifest_path.exists():
+            raise FileNotFoundError(f"배치 작업을 찾을 수 없습니다: {batch_id or '(없음)'} ({batches_dir()})")
+        return ws
+
+    def save(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def cases(self) -> Dict[str, Dict[str, Any]]:
+        return self.manifest["cases"]
+
+    def phase(self, phase: str) -> Dict[str, Any]:
+        if phase not in PHASES:
+            raise ValueError(f"알 수 없는 단계: {phase} ({', '.join(PHASES)})")
+        return self.manifest["phases"].setdefault(phase, {})
+
+    def requests_path(self, phase: str) -> Path:
+        return self.dir / f"{phase}_requests.jsonl"
+
+    def results_path(self, phase: str) -> Path:
+        return self.dir / f"{phase}_results.jsonl"
+
+    def write_requests(self, phase: str, requests: List[Dict[str, Any]]) -> Path:
+        path = self.requests_path(phase)
+        write_jsonl(path, requests)
+        state = self.phase(phase)
+        state.update({"status": "exported", "requests": len(requests), "exported_at": datetime.now().isoformat()})
+        self.save()
+        return path
+
+    def read_results(self, phase: str, results_file: Optional[str] = None) -> List[Tuple[str, Optional[str], Optional[str], Optional[Dict]]]:
+        """결과 파일(기본 <phase>_results.jsonl)의 해당 단계 줄만 해석"""
+        path = Path(results_file) if results_file else self.results_path(phase)
+        if not path.exists():
+            raise FileNotFoundError(f"결과 파일이 없습니다: {path}")
+        parsed = []
+        for row in read_jsonl(path):
+            cid, content, error, usage = parse_result_line(row)
+            row_phase, case_id = split_custom_id(cid)
+            if row_phase == phase and case_id:
+                parsed.append((case_id, content, error, usage))
+        return parsed
+
+
+# ---- 제출 / 조회 (OpenAI Batch API) ----
+
+def _openai_client():
+    from openai import OpenAI
+    return OpenAI()
+
+
+def submit(ws: BatchWorkspace, phase: str, completion_window: str = "24h") -> str:
+    """요청 파일 업로드 후 배치 생성, provider batch ID 반환"""
+    client = _openai_client()
+    with open(ws.requests_path(phase), "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id, endpoint=CHAT_COMPLETIONS_URL, completion_window=completion_window,
+        metadata={"workspace": ws.batch_id, "phase": phase},
+    )
+    ws.phase(phase).update({"status": "submitted", "provider_batch_id": batch.id,
+                            "submitted_at": datetime.now().isoformat()})
+    ws.save()
+    return batch.id
+
+
+def fetch(ws: BatchWorkspace, phase: str) -> str:
+    """
+    제출한 배치 상태 조회, 완료면 결과/오류 파일을 <phase>_results.jsonl 로 내려받음
+
+    Returns:
+        provider 배치 상태 (completed / in_progress / failed ...)
+    """
+    state = ws.phase(phase)
+    if not state.get("provider_batch_id"):
+        raise RuntimeError(f"{phase} 단계는 제출되지 않았습니다 (--batch submit 먼저 실행)")
+    client = _openai_client()
+    batch = client.batches.retrieve(state["provider_batch_id"])
+    if batch.status == "completed":
+        chunks = []
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                chunks.append(client.files.content(file_id).content)
+        ws.results_path(phase).write_bytes(b"".join(c if c.endswith(b"\n") else c + b"\n" for c in chunks))
+        state.update({"status": "completed", "fetched_at": datetime.now().isoformat()})
+        ws.save()
+    return batch.status
+
+
+# ---- 로컬 대체 처리기 ----
+
+def _stand_in_content(request: Dict[str, Any]) -> str:
+    """요청 형식만 맞춘 결정적 응답 (네트워크/모델 호출 없음)"""
+    body = request["body"]
+    digest = int(hashlib.sha256(request["custom_id"].encode("utf-8")).hexdigest()[:8], 16)
+    if body.get("response_format", {}).get("type") == "json_schema":
+        return json.dumps({"score": digest % 6, "reasoning": "[local stand-in] 오프라인 점검용 결정적 점수"},
+                          ensure_ascii=False)
+    question = body["messages"][-1]["content"].split("\n", 1)[0]
+    return f"[local stand-in] {question} 에 대한 오프라인 점검용 답변입니다. [1]"
+
+
+def fulfill_locally(ws: BatchWorkspace, phase: str) -> Path:
+    """요청 파일을 Batch API 결과 형식으로 처리해 <phase>_results.jsonl 생성 (오프라인 점검용)"""
+    rows = []
+    for n, request in enumerate(read_jsonl(ws.requests_path(phase)), 1):
+        rows.append({
+            "id": f"local_{n}",
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "request_id": f"local-{n}",
+                "body": {
+                    "object": "chat.completion",
+                    "model": request["body"].get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": _stand_in_content(request)}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                },
+            },
+            "error": None,
+        })
+    path = ws.results_path(phase)
+    write_jsonl(path, rows)
+    ws.phase(phase).update({"status": "completed", "fulfilled_locally": True,
+                            "fetched_at": datetime.now().isoformat()})
+    ws.save()
+    return path
@@ -0,0 +1,169 @@
+"""
+다건(batch) Judge
+- 여러 (질문, 답변) 쌍을 항목 ID와 함께 한 요청에 담아 채점 → 긴 평가 기준(system 프롬프트)을 요청당 1회만 전송
+- 출력은 항목 배열(BatchJudgeVerdicts)로 강제하고, ID 누락/중복/점수 범위 오류 등 검증 실패 항목만 단건 Judge로 재채점
+- 배치 크기는 항목 수 상한(JUDGE_BATCH_MAX_ITEMS)과 입력 토큰 예산(JUDGE_BATCH_TOKEN_BUDGET)으로 조절
+- 일부 항목(JUDGE_BATCH_AGREEMENT 비율, case_id 해시)은 단건 Judge로도 채점해 점수 일치율을 집계
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from conversation_memory import estimate_tokens
+from judge_cascade import agreement_summary
+
+
+DEFAULT_RUBRIC = """당신은 QA 시스템의 답변을 평가하는 전문 Judge입니다.
+주어진 질문에 대한 답변의 정확성을 0-5점 사이의 정수로 평가해주세요.
+
+평가 기준:
+- 5점: 완벽히 정확하고 완전한 답변
+- 4점: 대부분 정확하며 약간의 부족함이 있음
+- 3점: 기본적으로 정확하나 중요한 정보가 누락됨
+- 2점: 부분적으로 정확하나 오류나 부정확한 정보 포함
+- 1점: 대부분 부정확하나 일부 관련된 정보 포함
+- 0점: 완전히 부정확하거나 관련 없는 답변"""
+
+BATCH_INSTRUCTIONS = """
+
+여러 개의 평가 항목이 [ID]와 함께 주어집니다. 각 항목을 다른 항목과 독립적으로, 위 기준으로만 평가하세요.
+모든 ID에 대해 정확히 한 번씩 {{"id": "<ID>", "score": <0-5 정수>, "reasoning": "<평가 근거>"}} 를 items 배열에 담아 반환하세요."""
+
+ITEM_TEMPLATE = "[{id}]\n질문: {question}\n답변: {answer}"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def rubric_from_prompt(judge_prompt) -> str:
+    """
+    단건 Judge 프롬프트에서 평가 기준(system 메시지) 추출
+
+    system 메시지가 질문/답변 변수를 포함하거나 찾을 수 없으면 기본 기준 사용 (중괄호 이스케이프 유지)
+    """
+    try:
+        for message in getattr(judge_prompt, "messages", []):
+            prompt = getattr(message, "prompt", None)
+            if type(message).__name__.startswith("System") and prompt is not None:
+                if set(getattr(prompt, "input_variables", []) or []) & {"question", "answer"}:
+                    break
+                # 배치 지시문에서 단건 JSON 형식 안내는 항목 배열 안내로 대체
+                return prompt.template.split("평가 결과를 다음 JSON 형식으로")[0].rstrip()
+    except Exception:
+        pass
+    return DEFAULT_RUBRIC
+
+
+def build_batch_prompt(judge_prompt) -> ChatPromptTemplate:
+    """평가 기준 1회 + 항목 목록({items}) 프롬프트"""
+    return ChatPromptTemplate.from_messages([
+        ("system", rubric_from_prompt(judge_prompt) + BATCH_INSTRUCTIONS),
+        ("human", "{items}\n\n위 {count}개 항목을 평가해주세요."),
+    ])
+
+
+def format_items(items: Sequence[Tuple[str, str, str]]) -> str:
+    """[(id, question, answer), ...] → 항목 목록 텍스트"""
+    return "\n\n".join(ITEM_TEMPLATE.format(id=i, question=q, answer=a) for i, q, a in items)
+
+
+def pack_batches(items: Sequence[Tuple[str, str, str]], max_items: Optional[int] = None,
+                 token_budget: Optional[int] = None, rubric_tokens: int = 0) -> List[List[Tuple[str, str, str]]]:
+    """
+    항목 수 상한과 입력 토큰 예산 안에서 순서대로 묶음 (예산보다 큰 단일 항목은 단독 배치)
+    """
+    max_items = max(1, max_items or _env_int("JUDGE_BATCH_MAX_ITEMS", 8))
+    token_budget = token_budget or _env_int("JUDGE_BATCH_TOKEN_BUDGET", 6000)
+    batches: List[List[Tuple[str, str, str]]] = []
+    current: List[Tuple[str, str, str]] = []
+    used = rubric_tokens
+    for item in items:
+        cost = estimate_tokens(ITEM_TEMPLATE.format(id=item[0], question=item[1], answer=item[2])) + 8
+        if current and (len(current) >= max_items or used + cost > token_budget):
+            batches.append(current)
+            current, used = [], rubric_tokens
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def validate_items(verdicts, expected_ids: Sequence[str]) -> Tuple[Dict[str, Dict], List[str]]:
+    """
+    배치 출력 검증
+
+    Returns:
+        (valid, invalid_ids): valid는 {id: {"score", "reasoning"}}, invalid_ids는 재채점할 ID
+    """
+    expected = set(expected_ids)
+    seen: Dict[str, int] = {}
+    candidates: Dict[str, Dict] = {}
+    for item in getattr(verdicts, "items", None) or []:
+        item_id = str(item.id).strip().strip("[]")
+        seen[item_id] = seen.get(item_id, 0) + 1
+        score = item.score
+        if item_id not in expected or not (0 <= score <= 5) or abs(score - round(score)) > 1e-6:
+            continue
+        if not (item.reasoning or "").strip():
+            continue
+        candidates[item_id] = {"score": int(round(score)), "reasoning": item.reasoning}
+    # 같은 ID가 여러 번 나오면 어느 쪽이 맞는지 알 수 없으므로 재채점
+    valid = {k: v for k, v in candidates.items() if seen.get(k) == 1}
+    invalid = [i for i in expected_ids if i not in valid]
+    return valid, invalid
+
+
+class BatchJudgeStats:
+    """배치 Judge 집계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.items = 0
+        self.rejudged = 0
+        self.failed_requests = 0
+        self.input_tokens = 0
+        self.rubric_tokens_saved = 0
+        self.pairs: List[Tuple[int, int]] = []
+
+    def record_request(self, n_items: int, rubric_tokens: int, usage: Optional[Dict[str, int]], failed: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.items += n_items
+            self.failed_requests += int(failed)
+            self.input_tokens += (usage or {}).get("input_tokens", 0)
+            # 단건이었다면 항목마다 보냈을 평가 기준 토큰
+            self.rubric_tokens_saved += max(0, n_items - 1) * rubric_tokens
+
+    def record_rejudged(self, n: int) -> None:
+        with self._lock:
+            self.rejudged += n
+
+    def record_pair(self, batch_score: int, single_score: int) -> None:
+        with self._lock:
+            self.pairs.append((batch_score, single_score))
+
+    def report(self) -> str:
+        with self._lock:
+            if not self.requests:
+                return "  - 기록 없음"
+            return "\n".join([
+                f"  - 요청 {self.requests}회 / 항목 {self.items}건 (요청당 평균 {self.items / self.requests:.1f}건) | "
+                f"요청 실패 {self.failed_requests}회 | 단건 재채점 {self.rejudged}건",
+                f"  - 입력 토큰 {self.input_tokens:,} | 평가 기준 반복 전송 절감 추정 {self.rubric_tokens_saved:,} 토큰",
+                f"  - 단건 Judge 대비 일치율: {agreement_summary(self.pairs)}",
+            ])
+
+
+# 프로세스 전역 집계 (평가 종료 시 요약 출력에 사용)
+BATCH_JUDGE_STATS = BatchJudgeStats()
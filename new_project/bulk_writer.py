@@ -0,0 +1,251 @@
+"""
+LangSmith 예제 일괄 저장기 (bulk writer)
+- 예제를 버퍼에 모았다가 create_examples 1회 호출로 저장 (크기 임계값 또는 시간 임계값 도달 시 flush)
+- 모든 예제에 클라이언트 측 ID를 미리 부여해, 배치 재시도/분할 재시도가 중복 생성 없이 멱등
+- 배치 일부 실패 시 배치를 반으로 나눠 재시도 → 1건까지 내려가면 create_example 로 저장, 409(이미 생성됨)는 성공
+- close()/with 블록 종료/프로세스 종료(atexit) 시 남은 버퍼를 flush
+- stable_example_id: 데이터셋 + 키로 결정되는 예제 ID (재실행/재개 시 같은 예제를 다시 만들지 않음)
+
+행마다 create_example 을 호출하던 테스트케이스/결과 저장을 대체합니다.
+
+사용 예:
+    with BulkExampleWriter(client, "Agent_QA_Scenario") as writer:
+        for tc in testcases:
+            writer.add(inputs={...}, metadata={...}, example_id=stable_example_id(...), item=tc)
+    print(writer.saved_count, writer.failed)
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+import uuid
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from resilience import is_conflict
+
+
+DEFAULT_BATCH_SIZE = int(os.getenv("LANGSMITH_BULK_SIZE", "100"))
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("LANGSMITH_BULK_WAIT", "2.0"))
+
+
+def stable_example_id(dataset_name: str, key: str) -> uuid.UUID:
+    """데이터셋 + 키로 결정되는 예제 ID (동시/재개 실행에서 같은 키의 예제가 중복 생성되지 않음)"""
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"agent-qa-dataset/{dataset_name}/{key}")
+
+
+@dataclass
+class PendingExample:
+    """버퍼에 대기 중인 예제 1건 (item은 호출 측 식별용 원본 객체)"""
+    example_id: uuid.UUID
+    inputs: Dict[str, Any]
+    outputs: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None
+    item: Any = None
+
+
+@dataclass
+class WriteOutcome:
+    saved: List[PendingExample] = field(default_factory=list)
+    failed: List[Tuple[PendingExample, str]] = field(default_factory=list)
+
+
+class BulkExampleWriter:
+    """데이터셋 1개에 대한 버퍼링 일괄 저장기 (스레드 안전)"""
+
+    def __init__(self, client, dataset_name: str, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 on_saved: Optional[Callable[[List[Any]], None]] = None, log=print):
+        """
+        Args:
+            client: LangSmith 클라이언트 (wrap_langsmith_client 로 감싼 것 권장)
+            batch_size: create_examples 1회에 보낼 최대 건수 (기본 LANGSMITH_BULK_SIZE)
+            flush_interval: 첫 예제가 버퍼에 들어온 뒤 최대 대기(초) (기본 LANGSMITH_BULK_WAIT, 0이면 크기 기준만)
+            on_saved: 배치 저장 완료 시 해당 item 목록으로 호출
+        """
+        self.client = client
+        self.dataset_name = dataset_name
+        self.batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL if flush_interval is None else max(0.0, flush_interval)
+        self.on_saved = on_saved
+        self.log = log
+        self._buffer: List[PendingExample] = []
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.saved_count = 0
+        self.failed: List[Tuple[Any, str]] = []
+        self.stats = {"batches": 0, "splits": 0, "singles": 0, "conflicts": 0}
+        _register(self)
+
+    # -- 추가 / flush --
+
+    def add(self, inputs: Dict[str, Any], outputs: Optional[Dict[str, Any]] = None,
+            metadata: Optional[Dict[str, Any]] = None, example_id=None, item: Any = None) -> uuid.UUID:
+        """예제를 버퍼에 추가하고 부여된 example_id 반환 (크기 임계값 도달 시 호출 스레드에서 바로 flush)"""
+        pending = PendingExample(
+            example_id=example_id or uuid.uuid4(), inputs=inputs, outputs=outputs, metadata=metadata, item=item,
+        )
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"이미 닫힌 writer입니다: {self.dataset_name}")
+            self._buffer.append(pending)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.batch_size
+            if not full:
+                self._ensure_timer_locked()
+                self._cond.notify_all()
+        if full:
+            self.flush(full_only=True)
+        return pending.example_id
+
+    def flush(self, full_only: bool = False) -> None:
+        """버퍼 저장 (full_only면 batch_size 단위로 찬 만큼만)"""
+        with self._write_lock:
+            while True:
+                with self._cond:
+                    if not self._buffer or (full_only and len(self._buffer) < self.batch_size):
+                        return
+                    batch = self._buffer[:self.batch_size]
+                    del self._buffer[:self.batch_size]
+                    self._oldest = time.monotonic() if self._buffer else None
+                self._deliver(self.write_batch(batch))
+
+    def close(self) -> None:
+        """남은 버퍼를 모두 저장하고 타이머 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        _unregister(self)
+
+    def __enter__(self) -> "BulkExampleWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- 시간 임계값 --
+
+    def _ensure_timer_locked(self) -> None:
+        if self.flush_interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._timer_loop, name=f"bulk-writer-{self.dataset_name}", daemon=True)
+        self._thread.start()
+
+    def _timer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and self._oldest is None:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                wait = self._oldest + self.flush_interval - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                self.log(f"⚠️  일괄 저장 flush 실패 ({self.dataset_name}): {e}")
+
+    # -- 저장 (분할 재시도) --
+
+    def write_batch(self, batch: List[PendingExample]) -> WriteOutcome:
+        """배치를 즉시 저장 (버퍼를 거치지 않음). 실패 시 반으로 나눠 재시도"""
+        outcome = WriteOutcome()
+        if batch:
+            self.stats["batches"] += 1
+            self._write(batch, outcome)
+        return outcome
+
+    def _write(self, batch: List[PendingExample], outcome: WriteOutcome) -> None:
+        if len(batch) == 1:
+            self._write_single(batch[0], outcome)
+            return
+        try:
+            self.client.create_examples(
+                dataset_name=self.dataset_name,
+                inputs=[p.inputs for p in batch],
+                outputs=[p.outputs for p in batch],
+                metadata=[p.metadata for p in batch],
+                ids=[p.example_id for p in batch],
+            )
+            outcome.saved.extend(batch)
+        except Exception:
+            # 일부만 반영되었거나(409) 특정 항목이 거부된 경우: 절반씩 다시 시도해 실패 항목만 골라냄
+            self.stats["splits"] += 1
+            mid = len(batch) // 2
+            self._write(batch[:mid], outcome)
+            self._write(batch[mid:], outcome)
+
+    def _write_single(self, p: PendingExample, outcome: WriteOutcome) -> None:
+        self.stats["singles"] += 1
+        try:
+            self.client.create_example(
+                dataset_name=self.dataset_name, example_id=p.example_id,
+                inputs=p.inputs, outputs=p.outputs, metadata=p.metadata,
+            )
+            outcome.saved.append(p)
+        except Exception as e:
+            if is_conflict(e):
+                # 같은 ID가 이미 저장됨 (이전 배치 부분 반영 또는 재개 실행)
+                self.stats["conflicts"] += 1
+                outcome.saved.append(p)
+            else:
+                outcome.failed.append((p, str(e)))
+
+    def _deliver(self, outcome: WriteOutcome) -> None:
+        self.saved_count += len(outcome.saved)
+        for p, error in outcome.failed:
+            self.failed.append((p.item, error))
+            self.log(f"  - 저장 실패 ({self.dataset_name}): {error}")
+        if outcome.saved and self.on_saved is not None:
+            try:
+                self.on_saved([p.item for p in outcome.saved])
+            except Exception as e:
+                self.log(f"⚠️  저장 후 처리 실패 ({self.dataset_name}): {e}")
+
+    def report(self) -> str:
+        s = self.stats
+        return (f"  - {self.dataset_name}: 저장 {self.saved_count}건 / 실패 {len(self.failed)}건 | "
+                f"배치 {s['batches']} | 분할 {s['splits']} | 단건 {s['singles']} | 409 {s['conflicts']}")
+
+
+# ---- 종료 시 flush ----
+
+_OPEN_WRITERS: "weakref.WeakSet[BulkExampleWriter]" = weakref.WeakSet()
+_OPEN_LOCK = threading.Lock()
+
+
+def _register(writer: BulkExampleWriter) -> None:
+    with _OPEN_LOCK:
+        _OPEN_WRITERS.add(writer)
+
+
+def _unregister(writer: BulkExampleWriter) -> None:
+    with _OPEN_LOCK:
+        _OPEN_WRITERS.discard(writer)
+
+
+def flush_all() -> None:
+    """닫히지 않은 writer의 버퍼를 모두 저장 (프로세스 종료 시 자동 호출)"""
+    with _OPEN_LOCK:
+        writers = list(_OPEN_WRITERS)
+    for writer in writers:
+        try:
+            writer.close()
+        except Exception as e:
+            print(f"⚠️  종료 시 일괄 저장 실패 ({writer.dataset_name}): {e}")
+
+
+atexit.register(flush_all)
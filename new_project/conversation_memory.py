@@ -0,0 +1,184 @@
+"""
+대화 메모리
+- 최근 N턴은 원문 그대로 유지하고, 그보다 오래된 턴은 토큰 상한 내의 롤링 요약으로 접어 넣음
+- 후속 질문을 이전 대화 맥락 없이도 이해되는 독립 검색 질의로 재작성
+- 대화가 길어져도 한 턴에 전송되는 프롬프트 크기는 (요약 상한 + N턴 상한)으로 고정됨
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+
+_ENCODER = None
+
+
+def _get_encoder():
+    """tiktoken 인코더 (없으면 None)"""
+    global _ENCODER
+    if _ENCODER is None:
+        try:
+            import tiktoken
+            _ENCODER = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _ENCODER = False
+    return _ENCODER or None
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트 토큰 수 추정 (tiktoken이 없으면 글자 수 기반 근사)"""
+    if not text:
+        return 0
+    enc = _get_encoder()
+    if enc is not None:
+        return len(enc.encode(text))
+    # 한국어 기준 대략 2~3자당 1토큰
+    return max(1, len(text) // 2)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """토큰 상한을 넘는 텍스트를 앞부분 기준으로 자름"""
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text
+    enc = _get_encoder()
+    if enc is not None:
+        return enc.decode(enc.encode(text)[:max_tokens]) + " …"
+    return text[: max_tokens * 2] + " …"
+
+
+class ConversationMemory:
+    """세션 단위 대화 메모리 (최근 N턴 원문 + 롤링 요약)"""
+
+    def __init__(self,
+                 max_turns: int = 4,
+                 summary_token_cap: int = 400,
+                 turn_token_cap: int = 600):
+        """
+        Args:
+            max_turns: 원문 그대로 유지할 최근 턴 수
+            summary_token_cap: 롤링 요약의 최대 토큰 수
+            turn_token_cap: 저장되는 발화 하나의 최대 토큰 수
+        """
+        self.max_turns = max_turns
+        self.summary_token_cap = summary_token_cap
+        self.turn_token_cap = turn_token_cap
+        self.turns: List[Tuple[str, str]] = []
+        self.summary: str = ""
+
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary
+
+    def clear(self) -> None:
+        self.turns = []
+        self.summary = ""
+
+    def add_turn(self, user: str, assistant: str, llm=None) -> None:
+        """
+        한 턴(사용자 질문, 어시스턴트 답변)을 추가하고 초과분은 요약으로 접음
+
+        Args:
+            user: 사용자 발화
+            assistant: 어시스턴트 답변
+            llm: 요약에 사용할 LLM (없으면 잘라낸 원문을 이어 붙인 뒤 상한으로 자름)
+        """
+        self.turns.append((
+            truncate_to_tokens(user or "", self.turn_token_cap),
+            truncate_to_tokens(assistant or "", self.turn_token_cap),
+        ))
+        overflow: List[Tuple[str, str]] = []
+        while len(self.turns) > self.max_turns:
+            overflow.append(self.turns.pop(0))
+        if overflow:
+            self._fold_into_summary(overflow, llm)
+
+    def _fold_into_summary(self, overflow: List[Tuple[str, str]], llm=None) -> None:
+        """오래된 턴을 기존 요약과 합쳐 새 요약으로 갱신"""
+        transcript = self._format_turns(overflow)
+        new_summary = None
+        if llm is not None:
+            sys = (
+                "당신은 대화 요약기입니다. 기존 요약과 새 대화를 합쳐 하나의 요약으로 갱신하세요.\n"
+                f"- 한국어로 {self.summary_token_cap}토큰 이내\n"
+                "- 사용자가 관심을 가진 대상(차종, 브랜드 등), 확인된 사실, 미해결 질문을 우선 보존\n"
+                "- 요약문만 출력"
+            )
+            user = f"기존 요약:\n{self.summary or '(없음)'}\n\n새 대화:\n{transcript}"
+            try:
+                new_summary = llm.invoke([("system", sys), ("human", user)]).content.strip()
+            except Exception as e:
+                print(f"⚠️  대화 요약 실패, 원문 축약으로 대체: {e}")
+        if not new_summary:
+            new_summary = (self.summary + "\n" + transcript).strip()
+        self.summary = truncate_to_tokens(new_summary, self.summary_token_cap)
+
+    @staticmethod
+    def _format_turns(turns: List[Tuple[str, str]]) -> str:
+        return "\n".join(f"사용자: {u}\n어시스턴트: {a}" for u, a in turns)
+
+    def as_messages(self) -> List[Tuple[str, str]]:
+        """LLM 입력용 메시지 목록 (요약 system 메시지 + 최근 턴)"""
+        messages: List[Tuple[str, str]] = []
+        if self.summary:
+            messages.append(("system", f"이전 대화 요약:\n{self.summary}"))
+        for u, a in self.turns:
+            messages.append(("human", u))
+            messages.append(("ai", a))
+        return messages
+
+    def to_dict(self) -> Dict:
+        """직렬화 (세션 디스크 저장용)"""
+        return {
+            "max_turns": self.max_turns,
+            "summary_token_cap": self.summary_token_cap,
+            "turn_token_cap": self.turn_token_cap,
+            "turns": [list(t) for t in self.turns],
+            "summary": self.summary,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ConversationMemory":
+        memory = cls(
+            max_turns=int(data.get("max_turns", 4)),
+            summary_token_cap=int(data.get("summary_token_cap", 400)),
+            turn_token_cap=int(data.get("turn_token_cap", 600)),
+        )
+        memory.turns = [(str(u), str(a)) for u, a in data.get("turns", [])]
+        memory.summary = str(data.get("summary", ""))
+        return memory
+
+    def token_count(self) -> int:
+        """현재 메모리가 프롬프트에 차지하는 토큰 수 추정"""
+        return estimate_tokens(self.summary) + sum(estimate_tokens(u) + estimate_tokens(a) for u, a in self.turns)
+
+    def rewrite_query(self, query: str, llm=None) -> str:
+        """
+        후속 질문을 독립된 검색 질의로 재작성
+
+        Args:
+            query: 사용자의 현재 질문
+            llm: 재작성에 사용할 LLM (temperature 0 권장)
+
+        Returns:
+            독립 질의 (대화 이력이 없거나 실패하면 원문 그대로)
+        """
+        if self.is_empty() or llm is None or not (query or "").strip():
+            return query
+        sys = (
+            "당신은 검색 질의 재작성기입니다. 이전 대화 맥락을 참고하여 마지막 질문을 "
+            "맥락 없이도 이해되는 하나의 독립된 질문으로 바꾸세요.\n"
+            "- 대명사/생략된 대상(그 차, 그거, 충전은? 등)을 구체적인 명칭으로 치환\n"
+            "- 이미 독립적인 질문이면 그대로 출력\n"
+            "- 재작성된 질문만 한 줄로 출력"
+        )
+        context = ""
+        if self.summary:
+            context += f"이전 대화 요약:\n{self.summary}\n\n"
+        if self.turns:
+            context += f"최근 대화:\n{self._format_turns(self.turns)}\n\n"
+        user = f"{context}마지막 질문: {query}"
+        try:
+            rewritten = llm.invoke([("system", sys), ("human", user)]).content.strip()
+            return rewritten.splitlines()[0].strip() if rewritten else query
+        except Exception as e:
+            print(f"⚠️  질의 재작성 실패, 원문 사용: {e}")
+            return query
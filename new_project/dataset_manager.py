@@ -11,12 +11,15 @@ from dataclasses import dataclass, asdict
 import json
 
 from langsmith import Client as LangSmithClient
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 from pathlib import Path
 
+from llm_clients import get_chat_model
+from resilience import call_with_resilience, llm_endpoint, wrap_langsmith_client
+from response_cache import discard_cache_entries, track_cache_entries
+from structured_output import JudgeVerdict, StructuredOutputError, resolve_structured, structured_llm
+
 # 여러 경로에서 .env 파일 찾아서 로드
 current_dir = Path(__file__).parent
 env_paths = [
@@ -75,17 +78,14 @@ class AgentQADatasetManager:
         # LangSmith 클라이언트 초기화
         if self.use_langsmith:
             try:
-                self.langsmith_client = LangSmithClient()
+                self.langsmith_client = wrap_langsmith_client(LangSmithClient())
                 self._ensure_langsmith_dataset()
             except Exception as e:
                 print(f"LangSmith 초기화 실패: {e}")
                 self.use_langsmith = False
         
         # LLM-as-Judge 초기화
-        self.judge_llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0
-        )
+        self.judge_llm = get_chat_model("judge_mini")
         
         # 평가 프롬프트 설정 - LangSmith에서 가져오기
         try:
@@ -112,7 +112,8 @@ class AgentQADatasetManager:
                 ("human", "질문: {question}\n답변: {answer}\n\n위 답변을 평가해주세요.")
             ])
         
-        self.judge_chain = self.accuracy_judge_prompt | self.judge_llm | StrOutputParser()
+        # JSON Schema 강제 Judge (스키마 실패 시 원문에서 관대하게 추출)
+        self.judge_chain = self.accuracy_judge_prompt | structured_llm(self.judge_llm, JudgeVerdict)
     
     def _load_prompt_from_langsmith(self, prompt_name: str):
         """
@@ -210,18 +211,25 @@ class AgentQADatasetManager:
         """
         execution_id = f"EXEC_{uuid.uuid4().hex[:8]}"
         
+        cache_keys: List[str] = []
         try:
             # LLM-as-Judge 평가 실행
-            judge_result = self.judge_chain.invoke({
-                "question": question,
-                "answer": actual_answer
-            })
+            with track_cache_entries() as cache_keys:
+                judge_result = call_with_resilience(
+                    llm_endpoint(self.judge_llm),
+                    self.judge_chain.invoke,
+                    {"question": question, "answer": actual_answer}
+                )
             
-            # JSON 파싱
-            judge_data = json.loads(judge_result)
-            score = float(judge_data.get("score", 0))
-            reasoning = judge_data.get("reasoning", "평가 실패")
+            verdict = resolve_structured(judge_result, JudgeVerdict, name="judge")
+            score = float(verdict.score)
+            reasoning = verdict.reasoning or "평가 실패"
             
+        except StructuredOutputError as e:
+            discard_cache_entries(cache_keys)
+            print(f"LLM-as-Judge 출력 파싱 실패: {e}")
+            score = 0.0
+            reasoning = f"Judge 출력 파싱 실패: {str(e)}"
         except Exception as e:
             print(f"LLM-as-Judge 평가 오류: {e}")
             score = 0.0
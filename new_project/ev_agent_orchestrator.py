@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from typing import Tuple
-import json
-
-from langchain_openai import ChatOpenAI
+from typing import Optional, Tuple
 
 from ev_rag_agent import get_ev_agent
+from conversation_memory import ConversationMemory
+from llm_clients import get_chat_model
+from rate_limiter import PRIORITY_INTERACTIVE, request_priority
+from resilience import call_with_resilience, llm_endpoint
+from response_cache import discard_cache_entries, track_cache_entries
+from session_store import ChatSession, SessionStore
+from structured_output import RouteDecision, StructuredOutputError, resolve_structured, structured_llm
 
 
 EV_KEYWORDS = [
@@ -18,13 +22,31 @@ EV_KEYWORDS = [
 class EVAgentOrchestrator:
     """Route between RAG and small-talk with a simple heuristic.
     - If question mentions EV entities/terms, use RAG; otherwise use LLM chat.
+    - Keeps a bounded per-session conversation memory; follow-ups are rewritten
+      into standalone queries before routing/retrieval.
     """
 
-    def __init__(self, model: str = "gpt-4o"):
+    def __init__(self,
+                 model: Optional[str] = None,
+                 memory_turns: int = 4,
+                 summary_token_cap: int = 400,
+                 sessions: Optional[SessionStore] = None):
         # 분류는 결정적이도록 temperature=0, 일반 대화는 0.7
-        self.classifier_llm = ChatOpenAI(model=model, temperature=0)
-        self.llm = ChatOpenAI(model=model, temperature=0.7)
+        self.classifier_llm = get_chat_model("classifier", model=model)
+        self.llm = get_chat_model("chat", model=model)
+        # JSON Schema 강제 분류기 (형식 노이즈로 인한 CHAT 폴백 방지)
+        self.classifier_structured = structured_llm(self.classifier_llm, RouteDecision)
         self.rag_agent = get_ev_agent()
+        # 사용자별 상태(대화 메모리, 검색 캐시, 라우팅 이력)는 세션 저장소에서 관리
+        self.sessions = sessions or SessionStore(memory_turns=memory_turns, summary_token_cap=summary_token_cap)
+
+    def get_memory(self, session_id: str = "default") -> ConversationMemory:
+        """세션별 대화 메모리 조회 (없으면 생성)"""
+        return self.sessions.get(session_id).memory
+
+    def reset(self, session_id: str = "default") -> None:
+        """세션 상태 초기화 (진행 중인 턴이 있으면 끝난 뒤 삭제)"""
+        self.sessions.discard(session_id)
 
     def _classify(self, q: str) -> Tuple[str, float]:
         """LLM 분류기: 'RAG' 또는 'CHAT' 라우팅 결정.
@@ -40,36 +62,63 @@ class EVAgentOrchestrator:
             "질문: " + (q or "") + "\n\n"
             "JSON 형식: {\"route\": \"RAG|CHAT\", \"confidence\": 0..1}"
         )
+        cache_keys: list[str] = []
         try:
-            out = self.classifier_llm.invoke([("system", sys), ("human", user)]).content
-            data = json.loads(out)
-            route = str(data.get("route", "CHAT")).upper()
-            conf = float(data.get("confidence", 0.5))
-            if route not in ("RAG", "CHAT"):
-                route = "CHAT"
-            return route, conf
-        except Exception:
-            # 실패 시 보수적으로 CHAT로 폴백
+            with track_cache_entries() as cache_keys:
+                out = call_with_resilience(
+                    llm_endpoint(self.classifier_llm),
+                    self.classifier_structured.invoke, [("system", sys), ("human", user)]
+                )
+            decision = resolve_structured(out, RouteDecision, name="classifier")
+            return decision.route, float(decision.confidence)
+        except StructuredOutputError:
+            # 스키마/폴백 파싱 모두 실패 시 보수적으로 CHAT (집계에 'failed'로 기록됨), 실패 응답은 캐시에서 제거
+            discard_cache_entries(cache_keys)
             return "CHAT", 0.0
+        except Exception as e:
+            print(f"⚠️  라우팅 분류기 호출 실패: {e}")
+            return "CHAT", 0.0
+
+    def chat(self, user_query: str, session_id: str = "default") -> Tuple[str, list[dict]]:
+        # 대화형 요청은 배치 평가 트래픽보다 먼저 레이트 리미터를 통과
+        with request_priority(PRIORITY_INTERACTIVE):
+            return self._chat(user_query, session_id)
 
-    def chat(self, user_query: str) -> Tuple[str, list[dict]]:
+    def _chat(self, user_query: str, session_id: str) -> Tuple[str, list[dict]]:
+        # 턴 전체(재작성 → 답변 → 메모리 갱신) 동안 세션 잠금 유지, 끝나면 크기 재계산
+        with self.sessions.lease(session_id) as session:
+            memory = session.memory
+            # 0) 후속 질문을 독립 질의로 재작성 (대화 이력이 있을 때만 LLM 호출)
+            standalone = memory.rewrite_query(user_query, self.classifier_llm)
+
+            answer, cites = self._route_and_answer(user_query, standalone, session)
+            memory.add_turn(user_query, answer, llm=self.classifier_llm)
+        return answer, cites
+
+    def _rag_answer(self, standalone: str, session: ChatSession) -> Tuple[str, list[dict]]:
+        cached = session.get_cached_retrieval(standalone)
+        if cached is not None:
+            return cached
+        answer, cites = self.rag_agent.answer(standalone)
+        session.cache_retrieval(standalone, answer, cites)
+        return answer, cites
+
+    def _route_and_answer(self, user_query: str, standalone: str, session: ChatSession) -> Tuple[str, list[dict]]:
         # 1) 키워드 선행 룰: EV 키워드가 포함되면 강제 RAG
-        ql = (user_query or "").lower()
+        ql = f"{user_query or ''} {standalone or ''}".lower()
         if any(k in ql for k in EV_KEYWORDS):
-            answer, cites = self.rag_agent.answer(user_query)
-            return answer, cites
+            session.record_route(standalone, "RAG")
+            return self._rag_answer(standalone, session)
 
         # 2) LLM 분류기로 최종 결정
-        route, _ = self._classify(user_query)
+        route, _ = self._classify(standalone)
+        session.record_route(standalone, route)
         if route == "RAG":
-            answer, cites = self.rag_agent.answer(user_query)
-            return answer, cites
+            return self._rag_answer(standalone, session)
         # small talk fallback
         sys = (
             "당신은 친절한 한국어 어시스턴트입니다. 전기차 관련 질문이 아닌 경우에는 일반적인 대화를 해주세요."
         )
-        msg = [("system", sys), ("human", user_query)]
-        ans = self.llm.invoke(msg).content
+        msg = [("system", sys)] + session.memory.as_messages() + [("human", user_query)]
+        ans = call_with_resilience(llm_endpoint(self.llm), self.llm.invoke, msg).content
         return ans, []
-
-
@@ -7,31 +7,72 @@ EV RAG Agent
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import threading
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from dotenv import load_dotenv
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 import os as _os_env
 _os_env.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 _os_env.environ.setdefault("OMP_NUM_THREADS", "1")
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 
+from llm_clients import ROLE_DEFAULTS, get_chat_model, get_embeddings, model_name
+from resilience import call_with_resilience, llm_endpoint
+
 
 _AGENT_SINGLETON = None
+_AGENT_LOCK = threading.Lock()
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 120
+DEFAULT_K = 6
+SYSTEM_PROMPT = (
+    "당신은 전기 자동차 도메인의 RAG 기반 조수입니다. 주어진 컨텍스트에서만 답하며, "
+    "근거가 없으면 모른다고 말하세요. 답변 끝에 참고한 출처 번호를 대괄호로 표기하세요. 예: [1][2]"
+)
+
+
+def default_doc_paths() -> List[str]:
+    base_dir = Path(__file__).parent
+    return [str(base_dir / "테슬라_KR.md"), str(base_dir / "리비안_KR.md")]
+
+
+def index_fingerprint(doc_paths: Optional[List[str]] = None) -> str:
+    """검색 인덱스 지문: 문서 내용 + 청크 설정 + 임베딩 모델 (인덱스를 만들지 않고 계산)"""
+    h = hashlib.sha256()
+    h.update(f"{model_name('embeddings')}|{CHUNK_SIZE}|{CHUNK_OVERLAP}".encode("utf-8"))
+    for path in doc_paths or default_doc_paths():
+        p = Path(path)
+        h.update(p.name.encode("utf-8"))
+        h.update(p.read_bytes() if p.exists() else b"")
+    return h.hexdigest()
+
+
+def agent_config_fingerprint(model: Optional[str] = None) -> str:
+    """에이전트 설정 지문: 답변 모델 + 생성 파라미터 + 검색 k + 시스템 프롬프트"""
+    config = {
+        "model": model or model_name("rag"),
+        "temperature": ROLE_DEFAULTS["rag"].get("temperature"),
+        "k": DEFAULT_K,
+        "system_prompt": SYSTEM_PROMPT,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
 
 
 class EVRAGAgent:
-    def __init__(self, doc_paths: List[str], model: str = "gpt-4o"):
+    def __init__(self, doc_paths: List[str], model: Optional[str] = None):
         load_dotenv()
         self.doc_paths = [str(Path(p)) for p in doc_paths]
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.llm = ChatOpenAI(model=model, temperature=0)
-        self.splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=120)
+        self.embeddings = get_embeddings()
+        self.llm = get_chat_model("rag", model=model)
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
         self.vs: FAISS | None = None
         self._build_index()
 
@@ -61,31 +102,43 @@ class EVRAGAgent:
         else:
             self.vs = None
 
-    def answer(self, query: str, k: int = 6) -> Tuple[str, List[dict]]:
+    def retrieve(self, query: str, k: int = DEFAULT_K) -> List[Document]:
+        """질의와 가까운 청크 k개 검색"""
         if not self.vs:
-            return "지식 베이스가 비어 있습니다.", []
-        docs = self.vs.similarity_search(query, k=k)
+            return []
+        return call_with_resilience(
+            llm_endpoint(self.embeddings, kind="embeddings"),
+            self.vs.similarity_search, query, k=k
+        )
+
+    @staticmethod
+    def build_messages(query: str, docs: List[Document]) -> Tuple[List[Tuple[str, str]], List[dict]]:
+        """검색 결과로 답변 생성 메시지와 인용 목록 구성 (배치 요청 파일 내보내기에서도 사용)"""
         context = "\n\n".join([f"[{i+1}] {d.page_content}" for i, d in enumerate(docs)])
         citations = [
-            {"rank": i + 1, "source": d.metadata.get("source", "-"), "chunk_id": d.metadata.get("chunk_id", -1)}
+            {"rank": i + 1, "source": d.metadata.get("source", "-"), "chunk_id": d.metadata.get("chunk_id", -1),
+             "content": d.page_content}
             for i, d in enumerate(docs)
         ]
-        system = (
-            "당신은 전기 자동차 도메인의 RAG 기반 조수입니다. 주어진 컨텍스트에서만 답하며, "
-            "근거가 없으면 모른다고 말하세요. 답변 끝에 참고한 출처 번호를 대괄호로 표기하세요. 예: [1][2]"
-        )
         user = f"질문: {query}\n\n컨텍스트:\n{context}"
-        msg = [("system", system), ("human", user)]
-        ans = self.llm.invoke(msg).content
+        return [("system", SYSTEM_PROMPT), ("human", user)], citations
+
+    def answer(self, query: str, k: int = DEFAULT_K) -> Tuple[str, List[dict]]:
+        if not self.vs:
+            return "지식 베이스가 비어 있습니다.", []
+        docs = self.retrieve(query, k=k)
+        msg, citations = self.build_messages(query, docs)
+        ans = call_with_resilience(llm_endpoint(self.llm), self.llm.invoke, msg).content
         return ans, citations
 
 
 def get_ev_agent() -> EVRAGAgent:
     global _AGENT_SINGLETON
     if _AGENT_SINGLETON is None:
-        base_dir = Path(__file__).parent
-        doc_paths = [str(base_dir / "테슬라_KR.md"), str(base_dir / "리비안_KR.md")]
-        _AGENT_SINGLETON = EVRAGAgent(doc_paths)
+        # 동시 평가 워커가 인덱스를 중복 생성하지 않도록 잠금 후 재확인
+        with _AGENT_LOCK:
+            if _AGENT_SINGLETON is None:
+                _AGENT_SINGLETON = EVRAGAgent(default_doc_paths())
     return _AGENT_SINGLETON
 
 
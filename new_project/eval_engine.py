@@ -0,0 +1,338 @@
+"""
+동시 평가 엔진
+- StagedPipeline: 단계(예: answer → judge → persist)를 제한된 크기의 큐로 연결한 생산자/소비자 파이프라인
+  · 단계마다 워커 수를 따로 지정, 느린 단계의 큐가 차면 앞 단계가 대기(backpressure)
+  · 배치 단계는 여러 건을 모아 한 번에 처리 (예: 저장 배치 쓰기)
+  · 단계별 대기열 깊이 / 처리량 / 가동률 통계로 병목 단계 확인
+- 케이스별 로그는 버퍼링했다가 케이스 순서대로 출력 (병렬 실행이어도 출력이 섞이지 않음)
+- 완료될 때마다 진행률 / 처리 속도 / ETA 출력
+- 한 케이스의 예외는 해당 케이스 결과(error)로만 기록되고 나머지 케이스는 계속 진행
+
+처리량은 직렬 지연이 아니라 레이트 리미터(rate_limiter.py)의 모델 쿼터에 의해 결정됩니다.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+DEFAULT_WORKERS = 4
+
+
+def resolve_workers(workers: Optional[int] = None, env: str = "EVAL_WORKERS") -> int:
+    """워커 수 결정 (인자 > 환경변수 env > EVAL_WORKERS > 기본값, 최소 1)"""
+    if workers is None:
+        try:
+            workers = int(os.getenv(env) or os.getenv("EVAL_WORKERS") or DEFAULT_WORKERS)
+        except ValueError:
+            workers = DEFAULT_WORKERS
+    return max(1, int(workers))
+
+
+def _fmt_seconds(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:d}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+class ProgressTracker:
+    """완료 건수 기반 진행률 / ETA 계산 (스레드 안전)"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, failed: bool = False) -> str:
+        with self._lock:
+            self.done += 1
+            if failed:
+                self.failed += 1
+            return self._line_locked()
+
+    def _line_locked(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+        pct = self.done / self.total * 100 if self.total else 100.0
+        failed = f" | 실패 {self.failed}" if self.failed else ""
+        return (f"⏳ 진행률 {self.done}/{self.total} ({pct:.0f}%) | {rate * 60:.1f}건/분 | "
+                f"경과 {_fmt_seconds(elapsed)} | ETA {_fmt_seconds(remaining)}{failed}")
+
+    def summary(self) -> str:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return (f"  - 처리 {self.done}/{self.total}건 (실패 {self.failed}) | 소요 {_fmt_seconds(elapsed)} | "
+                    f"평균 {elapsed / self.done if self.done else 0:.1f}s/건 (벽시계 기준)")
+
+
+@dataclass
+class CaseOutcome:
+    """케이스 1건의 처리 결과"""
+    index: int
+    item: Any
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    logs: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _OrderedPrinter:
+    """완료 순서와 무관하게 케이스 로그를 입력 순서대로 출력"""
+
+    def __init__(self, total: int, label: Callable[[Any], str]):
+        self.total = total
+        self.label = label
+        self.outcomes: List[Optional[CaseOutcome]] = [None] * total
+        self.next_to_print = 0
+
+    def add(self, outcome: CaseOutcome) -> None:
+        self.outcomes[outcome.index] = outcome
+        # 앞선 케이스가 모두 끝난 구간까지 순서대로 출력
+        while self.next_to_print < self.total and self.outcomes[self.next_to_print] is not None:
+            done = self.outcomes[self.next_to_print]
+            print(f"\n[{self.next_to_print + 1}/{self.total}] {self.label(done.item)} ({done.elapsed:.1f}s)", flush=True)
+            for line in done.logs:
+                print(line, flush=True)
+            self.next_to_print += 1
+
+    def results(self) -> List[CaseOutcome]:
+        return [o for o in self.outcomes if o is not None]
+
+
+# ---- 단계형 파이프라인 ----
+
+_END = object()  # 단계 종료 신호
+
+
+@dataclass
+class Stage:
+    """
+    파이프라인 단계
+
+    Args:
+        name: 단계 이름 (통계 표시용)
+        fn: 단건 단계면 fn(outcome), 배치 단계면 fn([outcome, ...]).
+            outcome.result(dict)를 채우거나 갱신하고, outcome.logs.append 로 로그를 남김
+        workers: 단계 동시 실행 수
+        batched: True면 배치 단계 (최대 batch_size 건을 모아 fn 호출)
+        batch_size: 배치 최대 크기
+        batch_wait: 배치를 채우기 위해 기다리는 최대 시간(초)
+        queue_size: 단계 입력 큐 크기 (생략 시 workers * batch_size * 2)
+    """
+    name: str
+    fn: Callable
+    workers: int = 1
+    batched: bool = False
+    batch_size: int = 1
+    batch_wait: float = 1.0
+    queue_size: Optional[int] = None
+
+
+class StageStats:
+    """단계별 처리량 / 가동 시간 / 대기열 깊이 (스레드 안전)"""
+
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.processed = 0
+        self.failed = 0
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def record(self, count: int, failed: int, busy: float) -> None:
+        with self._lock:
+            self.processed += count
+            self.failed += failed
+            self.calls += 1
+            self.busy_seconds += busy
+
+    def sample_depth(self, depth: int) -> None:
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_sum += depth
+            self._depth_samples += 1
+
+    def line(self, wall_seconds: float) -> str:
+        with self._lock:
+            avg_depth = self._depth_sum / self._depth_samples if self._depth_samples else 0.0
+            throughput = self.processed / wall_seconds * 60 if wall_seconds > 0 else 0.0
+            capacity = wall_seconds * self.stage.workers
+            utilization = self.busy_seconds / capacity * 100 if capacity > 0 else 0.0
+            per_call = self.busy_seconds / self.calls if self.calls else 0.0
+            batch = f" | 배치 평균 {self.processed / self.calls:.1f}건" if self.stage.batched and self.calls else ""
+            return (f"  - {self.stage.name:<8} 워커 {self.stage.workers} | 처리 {self.processed}건 (실패 {self.failed}) | "
+                    f"{throughput:.1f}건/분 | 호출당 {per_call:.2f}s | 가동률 {utilization:.0f}% | "
+                    f"대기열 평균 {avg_depth:.1f} / 최대 {self.max_depth}{batch}")
+
+
+class StagedPipeline:
+    """제한 큐로 연결된 단계형 생산자/소비자 파이프라인"""
+
+    def __init__(self, stages: Sequence[Stage], sample_interval: float = 0.5):
+        if not stages:
+            raise ValueError("파이프라인 단계가 비어 있습니다")
+        self.stages = list(stages)
+        self.sample_interval = sample_interval
+        self.queues = [
+            queue.Queue(maxsize=st.queue_size or max(1, st.workers * st.batch_size * 2))
+            for st in self.stages
+        ]
+        self.stats = [StageStats(st) for st in self.stages]
+        self._done_queue: "queue.Queue" = queue.Queue()
+        self._remaining = [st.workers for st in self.stages]
+        self._remaining_lock = threading.Lock()
+        self._started = 0.0
+
+    # -- 단계 실행 --
+
+    def _forward(self, index: int, outcome: CaseOutcome) -> None:
+        """다음 단계 큐로 전달 (큐가 차 있으면 대기 = backpressure)"""
+        if index + 1 < len(self.stages):
+            self.queues[index + 1].put(outcome)
+        else:
+            outcome.elapsed = time.monotonic() - outcome.elapsed
+            self._done_queue.put(outcome)
+
+    def _worker_exit(self, index: int) -> None:
+        """단계의 마지막 워커가 끝나면 다음 단계에 종료 신호 전달"""
+        with self._remaining_lock:
+            self._remaining[index] -= 1
+            last = self._remaining[index] == 0
+        if not last:
+            return
+        if index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self.queues[index + 1].put(_END)
+        else:
+            self._done_queue.put(_END)
+
+    def _run_single(self, index: int) -> None:
+        stage, q, stats = self.stages[index], self.queues[index], self.stats[index]
+        while True:
+            outcome = q.get()
+            if outcome is _END:
+                break
+            if outcome.ok:
+                started = time.monotonic()
+                try:
+                    stage.fn(outcome)
+                except Exception as e:
+                    outcome.error = f"[{stage.name}] {type(e).__name__}: {e}"
+                    outcome.logs.append(f"❌ {stage.name} 단계 실패: {type(e).__name__}: {e}")
+                stats.record(1, 0 if outcome.ok else 1, time.monotonic() - started)
+            self._forward(index, outcome)
+        self._worker_exit(index)
+
+    def _run_batch(self, index: int) -> None:
+        stage, q, stats = self.stages[index], self.queues[index], self.stats[index]
+        finished = False
+        while not finished:
+            first = q.get()
+            if first is _END:
+                break
+            batch = [first]
+            limit = time.monotonic() + stage.batch_wait
+            while len(batch) < stage.batch_size:
+                remaining = limit - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+            active = [o for o in batch if o.ok]
+            if active:
+                started = time.monotonic()
+                try:
+                    stage.fn(active)
+                except Exception as e:
+                    for o in active:
+                        o.error = f"[{stage.name}] {type(e).__name__}: {e}"
+                        o.logs.append(f"❌ {stage.name} 단계 실패: {type(e).__name__}: {e}")
+                stats.record(len(active), sum(1 for o in active if not o.ok), time.monotonic() - started)
+            for o in batch:
+                self._forward(index, o)
+        self._worker_exit(index)
+
+    def _sample(self, stop: threading.Event) -> None:
+        while not stop.wait(self.sample_interval):
+            for q, stats in zip(self.queues, self.stats):
+                stats.sample_depth(q.qsize())
+
+    def _feed(self, items: Sequence[Any]) -> None:
+        for i, item in enumerate(items):
+            # elapsed 에는 투입 시각을 넣어 두고 완료 시 소요 시간으로 바꿈
+            self.queues[0].put(CaseOutcome(index=i, item=item, elapsed=time.monotonic()))
+        for _ in range(self.stages[0].workers):
+            self.queues[0].put(_END)
+
+    def depth_line(self) -> str:
+        return " · ".join(f"{st.name} {q.qsize()}" for st, q in zip(self.stages, self.queues))
+
+    # -- 실행 --
+
+    def run(self, items: Sequence[Any], label: Callable[[Any], str] = str) -> List[CaseOutcome]:
+        """
+        items를 파이프라인에 흘려보내고 입력 순서대로 결과 반환
+
+        Returns:
+            items와 같은 순서의 CaseOutcome 리스트
+        """
+        total = len(items)
+        progress = ProgressTracker(total)
+        printer = _OrderedPrinter(total, label)
+        self._started = time.monotonic()
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._feed, args=(items,), name="pipeline-feed", daemon=True),
+                   threading.Thread(target=self._sample, args=(stop,), name="pipeline-sample", daemon=True)]
+        for i, st in enumerate(self.stages):
+            target = self._run_batch if st.batched else self._run_single
+            threads += [threading.Thread(target=target, args=(i,), name=f"pipeline-{st.name}-{w}", daemon=True)
+                        for w in range(st.workers)]
+
+        layout = " → ".join(f"{st.name}(x{st.workers}{f', 배치 {st.batch_size}' if st.batched else ''})"
+                            for st in self.stages)
+        print(f"⚙️  단계형 파이프라인: {layout} / 케이스 {total}건", flush=True)
+        for t in threads:
+            t.start()
+        try:
+            while True:
+                outcome = self._done_queue.get()
+                if outcome is _END:
+                    break
+                printer.add(outcome)
+                print(f"{progress.update(failed=not outcome.ok)} | 대기열 {self.depth_line()}", flush=True)
+        finally:
+            stop.set()
+
+        print("\n🏁 파이프라인 완료", flush=True)
+        print(progress.summary(), flush=True)
+        print(self.report(), flush=True)
+        return printer.results()
+
+    def report(self) -> str:
+        wall = time.monotonic() - self._started if self._started else 0.0
+        bottleneck = max(self.stats, key=lambda s: (s.busy_seconds / max(1, s.stage.workers)))
+        lines = ["📈 단계별 통계:"] + [s.line(wall) for s in self.stats]
+        lines.append(f"  → 병목 추정 단계: {bottleneck.stage.name} (워커당 가동 시간 최대)")
+        return "\n".join(lines)
@@ -89,6 +89,9 @@ def demo_basic_usage():
     print(f"✅ 총 {len(tc_ids)}개의 테스트케이스에 대해 평가를 완료했습니다.")
     print("📊 각 테스트케이스별로 여러 답변의 평가 점수를 확인했습니다.")
     print("💾 모든 결과가 LangSmith에 저장되었습니다.")
+    from structured_output import PARSE_STATS
+    print("🧩 Judge 출력 파싱 통계:")
+    print(PARSE_STATS.report())
     
     print("\n=== 데모 완료 ===")
     print("웹 인터페이스를 실행하려면 'python web_interface.py'를 실행하세요.")
@@ -0,0 +1,254 @@
+"""
+평가 히스토리 저장소 (append-only)
+- 실행 1건 = 히스토리 데이터셋 예제 1개 (record_type="execution", 크기 고정의 작은 레코드)
+  · 기존처럼 케이스별 배열(scores/answers/...)을 읽어서 다시 쓰지 않으므로 쓰기 비용이 실행 횟수와 무관
+  · 예제 ID는 execution_id에서 결정되어 재시도/재개 시 중복 생성되지 않음
+- 케이스별 타임라인은 읽을 때 구성: 타임라인 예제(기존 배열 형식) + 실행 레코드를 시간순으로 병합
+- 주기적 압축(compact_history): 실행 레코드를 케이스별 타임라인 예제로 접고 레코드는 삭제
+  · 최근 keep_answers 개를 제외한 오래된 답변은 로컬 보관 파일(JSONL)로 옮기고 타임라인에서는 비움
+
+레코드 형식
+    inputs   {"input": 질문}
+    outputs  {"score", "answer", "reasoning", "timestamp", "trace_url"?, "execution_id"?}
+    metadata {"case_id", "record_type": "execution", "timestamp", "model_used", "judge_model", "evaluation_type"}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+RECORD_TYPE_EXECUTION = "execution"
+RECORD_TYPE_TIMELINE = "timeline"
+DEFAULT_ARCHIVE_DIR = Path(__file__).parent / ".cache" / "history_archive"
+ARCHIVED_ANSWER = "[archived]"      # 보관 처리된 답변 자리 표시
+HISTORY_KEEP_ANSWERS = int(os.getenv("HISTORY_KEEP_ANSWERS", "5"))
+
+
+def is_execution_record(metadata: Optional[Dict]) -> bool:
+    return (metadata or {}).get("record_type") == RECORD_TYPE_EXECUTION
+
+
+def is_timeline(metadata: Optional[Dict]) -> bool:
+    """타임라인 예제 (record_type이 없는 기존 배열 형식 예제 포함)"""
+    return not is_execution_record(metadata)
+
+
+def history_record_id(execution_id: Optional[str]) -> uuid.UUID:
+    """실행 레코드 예제 ID (execution_id가 없으면 임의 ID)"""
+    if not execution_id:
+        return uuid.uuid4()
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"agent-qa-history/{execution_id}")
+
+
+def build_record(result: Dict, model_used: str, judge_model: str, timestamp: Optional[str] = None) -> Dict:
+    """평가 결과 1건 → 실행 레코드 (create_example 인자)"""
+    timestamp = timestamp or datetime.now().isoformat()
+    execution_id = result.get("execution_id")
+    return {
+        "example_id": history_record_id(execution_id),
+        "inputs": {"input": result["question"]},
+        "outputs": {
+            "score": int(result["judge_accuracy_score"]),
+            "answer": result.get("answer", ""),
+            "reasoning": result.get("reasoning", ""),
+            "timestamp": timestamp,
+            **({"trace_url": result["trace_url"]} if result.get("trace_url") else {}),
+            **({"execution_id": execution_id} if execution_id else {}),
+        },
+        "metadata": {
+            "case_id": result["case_id"],
+            "record_type": RECORD_TYPE_EXECUTION,
+            "timestamp": timestamp,
+            "model_used": model_used,
+            "judge_model": judge_model,
+            "evaluation_type": "judge_accuracy",
+        },
+    }
+
+
+# ---- 읽기: 타임라인 구성 ----
+
+def _timeline_entries(example) -> List[Dict]:
+    """타임라인 예제(배열 형식)의 항목들"""
+    outs = example.outputs or {}
+    scores = list(outs.get("scores", []))
+    n = len(scores)
+
+    def col(name: str) -> List:
+        values = list(outs.get(name, []))
+        return values + [""] * (n - len(values))
+
+    times, answers, reasons = col("timestamps"), col("answers"), col("reasons")
+    traces, executions = col("trace_urls"), col("execution_ids")
+    return [
+        {"timestamp": times[i], "score": scores[i], "answer": answers[i], "reasoning": reasons[i],
+         "trace_url": traces[i], "execution_id": executions[i]}
+        for i in range(n)
+    ]
+
+
+def _record_entry(example) -> Dict:
+    outs = example.outputs or {}
+    return {
+        "timestamp": outs.get("timestamp") or (example.metadata or {}).get("timestamp", ""),
+        "score": outs.get("score"),
+        "answer": outs.get("answer", ""),
+        "reasoning": outs.get("reasoning", ""),
+        "trace_url": outs.get("trace_url", ""),
+        "execution_id": outs.get("execution_id", ""),
+        "record_id": str(example.id),
+    }
+
+
+def build_timeline(examples: Iterable) -> Dict:
+    """
+    한 케이스의 예제들(타임라인 + 실행 레코드)로 시간순 타임라인 구성
+
+    Returns:
+        {"question": str, "entries": [{"timestamp", "score", "answer", "reasoning", "trace_url", "execution_id"}, ...]}
+    """
+    question = ""
+    entries: List[Dict] = []
+    seen = set()
+    for ex in examples:
+        if not question and ex.inputs:
+            question = ex.inputs.get("input", "") or ""
+        items = [_record_entry(ex)] if is_execution_record(ex.metadata) else _timeline_entries(ex)
+        for item in items:
+            eid = item.get("execution_id")
+            if eid:
+                # 압축 도중 중단되어 타임라인과 레코드에 모두 남은 실행은 한 번만
+                if eid in seen:
+                    continue
+                seen.add(eid)
+            entries.append(item)
+    entries.sort(key=lambda e: e.get("timestamp") or "")
+    return {"question": question, "entries": entries}
+
+
+def list_case_examples(client, dataset_name: str, case_id: str) -> List:
+    """케이스의 히스토리 예제 조회 (메타데이터 필터 지원 시 서버 측 필터)"""
+    try:
+        return list(client.list_examples(dataset_name=dataset_name, metadata={"case_id": case_id}))
+    except TypeError:
+        return [ex for ex in client.list_examples(dataset_name=dataset_name)
+                if (ex.metadata or {}).get("case_id") == case_id]
+
+
+def load_case_timeline(client, dataset_name: str, case_id: str) -> Dict:
+    return build_timeline(list_case_examples(client, dataset_name, case_id))
+
+
+def has_examples(client, dataset_name: str) -> bool:
+    """히스토리 데이터셋에 예제가 1건이라도 있는지 (예제 1건만 조회)"""
+    return next(iter(client.list_examples(dataset_name=dataset_name, limit=1)), None) is not None
+
+
+def group_by_case(examples: Iterable) -> Dict[str, List]:
+    groups: Dict[str, List] = {}
+    for ex in examples:
+        case_id = (ex.metadata or {}).get("case_id")
+        if case_id:
+            groups.setdefault(case_id, []).append(ex)
+    return groups
+
+
+# ---- 압축 / 답변 보관 ----
+
+def _archive_path(dataset_name: str) -> Path:
+    return Path(os.getenv("HISTORY_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR) / f"{dataset_name}.jsonl"
+
+
+def is_archived(answer: Optional[str]) -> bool:
+    return answer == ARCHIVED_ANSWER
+
+
+def _archive_answers(dataset_name: str, case_id: str, entries: List[Dict]) -> int:
+    rows = [e for e in entries if e.get("answer") and not is_archived(e["answer"])]
+    if not rows:
+        return 0
+    path = _archive_path(dataset_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for e in rows:
+            f.write(json.dumps({"case_id": case_id, "timestamp": e.get("timestamp"),
+                                "execution_id": e.get("execution_id"), "answer": e["answer"]},
+                               ensure_ascii=False) + "\n")
+    return len(rows)
+
+
+def compact_history(client, dataset_name: str, keep_answers: int = HISTORY_KEEP_ANSWERS, dry_run: bool = False,
+                    timeline_id=None, log=print) -> Dict[str, int]:
+    """
+    실행 레코드를 케이스별 타임라인 예제로 접고 레코드 삭제, 오래된 답변은 로컬 보관
+
+    Args:
+        client: LangSmith 클라이언트
+        dataset_name: 히스토리 데이터셋
+        keep_answers: 타임라인에 답변 원문을 남길 최근 실행 수 (그 이전 답변은 보관 파일로 이동)
+        dry_run: True면 변경 없이 집계만
+        timeline_id: case_id → 새 타임라인 예제 ID 함수 (생략 시 임의 ID)
+
+    Returns:
+        {"cases", "records_folded", "answers_archived", "records_deleted", "timelines_created": {case_id: example_id}}
+    """
+    stats = {"cases": 0, "records_folded": 0, "answers_archived": 0, "records_deleted": 0, "timelines_created": {}}
+    groups = group_by_case(client.list_examples(dataset_name=dataset_name))
+    for case_id, examples in sorted(groups.items()):
+        records = [ex for ex in examples if is_execution_record(ex.metadata)]
+        timelines = [ex for ex in examples if is_timeline(ex.metadata)]
+        entries = build_timeline(examples)["entries"]
+        cutoff = max(0, len(entries) - keep_answers)
+        to_archive = [e for e in entries[:cutoff] if e.get("answer") and not is_archived(e["answer"])]
+        if not records and not to_archive:
+            continue
+        stats["cases"] += 1
+        stats["records_folded"] += len(records)
+        if dry_run:
+            stats["answers_archived"] += len(to_archive)
+            continue
+
+        # 1) 오래된 답변 보관 (보관 후 타임라인에서 비움)
+        stats["answers_archived"] += _archive_answers(dataset_name, case_id, to_archive)
+        for e in to_archive:
+            e["answer"] = ARCHIVED_ANSWER
+
+        # 2) 타임라인 예제 갱신 (배열 형식 유지: 기존 읽기 코드와 호환)
+        outputs = {
+            "scores": [e["score"] for e in entries],
+            "answers": [e.get("answer", "") for e in entries],
+            "reasons": [e.get("reasoning", "") for e in entries],
+            "timestamps": [e.get("timestamp", "") for e in entries],
+            "trace_urls": [e.get("trace_url", "") for e in entries],
+            "execution_ids": [e.get("execution_id", "") for e in entries],
+            "answers_archived": sum(1 for e in entries if is_archived(e.get("answer"))),
+        }
+        question = next((ex.inputs.get("input", "") for ex in examples if ex.inputs), "")
+        if timelines:
+            client.update_example(example_id=str(timelines[0].id), outputs=outputs)
+        else:
+            new_id = timeline_id(case_id) if timeline_id else uuid.uuid4()
+            client.create_example(
+                dataset_name=dataset_name,
+                example_id=new_id,
+                inputs={"input": question},
+                outputs=outputs,
+                metadata={"case_id": case_id, "record_type": RECORD_TYPE_TIMELINE,
+                          "evaluation_type": "judge_accuracy"},
+            )
+            stats["timelines_created"][case_id] = new_id
+
+        # 3) 접힌 실행 레코드 삭제 (타임라인 갱신 후 삭제하므로 중단되어도 유실 없음)
+        for ex in records:
+            try:
+                client.delete_example(ex.id)
+                stats["records_deleted"] += 1
+            except Exception as e:
+                log(f"⚠️  레코드 삭제 실패 ({case_id}, {ex.id}): {e}")
+        log(f"  - {case_id}: 레코드 {len(records)}건 압축, 답변 {len(to_archive)}건 보관")
+    return stats
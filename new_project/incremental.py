@@ -0,0 +1,97 @@
+"""
+증분 평가 (incremental evaluation)
+- 케이스 결과마다 지문(fingerprint)을 계산: 질문 + 검색 인덱스 지문 + 에이전트 모델/설정 지문 + Judge 프롬프트/모델 지문
+- 로컬 지문 인덱스(.runs/fingerprints.json)에 case_id별 마지막 정상 결과와 지문을 보관
+- 증분 모드에서는 지문이 바뀐 케이스만 다시 평가하고, 나머지는 이전 결과를 "reused" 표시와 함께 그대로 사용
+
+야간 평가 비용/시간이 실제로 바뀐 케이스 수에 비례하게 됩니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from run_journal import runs_dir
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def judge_prompt_fingerprint(prompt, judge_model: str) -> str:
+    """Judge 프롬프트 템플릿 + Judge 모델 지문"""
+    try:
+        from langchain_core.load import dumps
+        body = dumps(prompt, sort_keys=True)
+    except Exception:
+        body = repr(prompt)
+    return _sha256(f"{judge_model}\n{body}")
+
+
+def case_fingerprint(question: str, components: Dict[str, str], reference: Optional[str] = None) -> str:
+    """케이스 지문: 질문 (+ 기대 답변) + 실행 단위 구성요소 지문"""
+    parts = [" ".join((question or "").split())] + [f"{k}={components[k]}" for k in sorted(components)]
+    if reference:
+        parts.append("reference=" + " ".join(reference.split()))
+    return _sha256("\n".join(parts))
+
+
+class FingerprintIndex:
+    """case_id → {fingerprint, result, run_id, execution_id, updated_at} 로컬 인덱스 (스레드 안전)"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or runs_dir() / "fingerprints.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"⚠️  지문 인덱스 로드 실패, 새로 시작: {e}")
+                self._entries = {}
+
+    def lookup(self, case_id: str, fingerprint: str) -> Optional[Dict]:
+        """지문이 같으면 이전 결과 항목 반환"""
+        with self._lock:
+            entry = self._entries.get(case_id)
+            if entry and entry.get("fingerprint") == fingerprint and entry.get("result"):
+                return dict(entry)
+            return None
+
+    def record(self, results: List[Dict]) -> None:
+        """저장 완료된 정상 결과의 지문 갱신 (파싱 실패/Judge 오류/재사용 결과는 제외) 후 파일 저장"""
+        changed = False
+        with self._lock:
+            for r in results:
+                if not r.get("fingerprint") or r.get("parse_failed") or r.get("error") or r.get("reused"):
+                    continue
+                self._entries[r["case_id"]] = {
+                    "fingerprint": r["fingerprint"],
+                    "result": {k: v for k, v in r.items() if not k.startswith("_")},
+                    "run_id": r.get("run_id"),
+                    "execution_id": r.get("execution_id"),
+                    "updated_at": datetime.now().isoformat(),
+                }
+                changed = True
+            if changed:
+                self._save_locked()
+
+    def _save_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def reused_result(entry: Dict) -> Dict:
+    """이전 결과를 재사용 표시와 함께 복사 (실행별 필드는 새 실행에서 다시 부여)"""
+    result = {k: v for k, v in entry["result"].items() if k not in ("run_id", "execution_id")}
+    result["reused"] = True
+    result["reused_from"] = entry.get("execution_id") or entry.get("run_id")
+    return result
@@ -0,0 +1,186 @@
+"""
+캐스케이드 Judge
+- 경량 Judge(judge_mini, 기본 gpt-4o-mini)가 점수 + 확신도를 먼저 산출
+- 다음 경우에만 강한 Judge(judge, 기본 gpt-4o)로 승급(escalation):
+  · 중간 점수 (JUDGE_CASCADE_MID, 기본 2~3점)
+  · 낮은 확신도 (JUDGE_CASCADE_MIN_CONFIDENCE 미만)
+  · 보정 표본 (JUDGE_CASCADE_CALIBRATION 비율, case_id 해시로 결정 → 실행 간 동일 표본)
+  · 경량 Judge 호출/출력 파싱 실패
+- 보정 표본은 두 Judge 점수를 모두 기록해 일치율을 집계하고, 승급 비율과 절감한 비용/시간을 보고
+
+가격표(1M 토큰당 USD, 입력/출력)는 JUDGE_PRICE_<MODEL>="입력,출력" 으로 덮어쓸 수 있습니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 1M 토큰당 USD (입력, 출력)
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+ESCALATION_REASONS = ("mid_score", "low_confidence", "calibration", "cheap_failed")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def model_price(model: str) -> Tuple[float, float]:
+    raw = os.getenv(f"JUDGE_PRICE_{model.upper().replace('-', '_').replace('.', '_')}")
+    if raw:
+        try:
+            inp, out = (float(x) for x in raw.split(","))
+            return inp, out
+        except ValueError:
+            pass
+    return MODEL_PRICES.get(model, (0.0, 0.0))
+
+
+def call_cost(model: str, usage: Optional[Dict[str, int]]) -> float:
+    """호출 1회 비용(USD) 추정"""
+    if not usage:
+        return 0.0
+    inp, out = model_price(model)
+    return (usage.get("input_tokens", 0) * inp + usage.get("output_tokens", 0) * out) / 1_000_000
+
+
+def usage_of(result: Any) -> Optional[Dict[str, int]]:
+    """include_raw 구조화 출력 결과에서 토큰 사용량 추출"""
+    raw = result.get("raw") if isinstance(result, dict) else result
+    usage = getattr(raw, "usage_metadata", None)
+    if not usage:
+        return None
+    return {"input_tokens": int(usage.get("input_tokens", 0)), "output_tokens": int(usage.get("output_tokens", 0))}
+
+
+def hash_sample(key: str, rate: float, salt: str) -> bool:
+    """key 해시로 표본 여부 결정 (실행이 바뀌어도 같은 키가 선택됨)"""
+    if rate <= 0:
+        return False
+    digest = hashlib.sha256(f"{salt}/{key}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64 < rate
+
+
+def agreement_summary(pairs: List[Tuple[int, int]]) -> str:
+    """두 Judge 점수 쌍의 일치율 요약"""
+    if not pairs:
+        return "표본 없음"
+    n = len(pairs)
+    exact = sum(1 for a, b in pairs if a == b) / n
+    within1 = sum(1 for a, b in pairs if abs(a - b) <= 1) / n
+    mad = sum(abs(a - b) for a, b in pairs) / n
+    return f"{n}건 | 일치 {exact:.0%} | ±1 이내 {within1:.0%} | 평균 차이 {mad:.2f}점"
+
+
+@dataclass
+class CascadePolicy:
+    """승급 조건"""
+    mid_low: int = 2
+    mid_high: int = 3
+    min_confidence: float = 0.7
+    calibration_rate: float = 0.1
+
+    @classmethod
+    def from_env(cls) -> "CascadePolicy":
+        policy = cls(min_confidence=_env_float("JUDGE_CASCADE_MIN_CONFIDENCE", 0.7),
+                     calibration_rate=_env_float("JUDGE_CASCADE_CALIBRATION", 0.1))
+        mid = os.getenv("JUDGE_CASCADE_MID")
+        if mid:
+            try:
+                low, high = (int(x) for x in mid.split(","))
+                policy.mid_low, policy.mid_high = low, high
+            except ValueError:
+                pass
+        return policy
+
+    def is_calibration(self, case_id: str) -> bool:
+        """case_id 해시로 보정 표본 결정 (실행이 바뀌어도 같은 케이스가 선택됨)"""
+        return hash_sample(case_id, self.calibration_rate, "judge-cascade")
+
+    def escalation_reason(self, case_id: str, score: Optional[int], confidence: Optional[float]) -> Optional[str]:
+        """승급 사유 (승급하지 않으면 None)"""
+        if score is None:
+            return "cheap_failed"
+        if self.mid_low <= score <= self.mid_high:
+            return "mid_score"
+        if confidence is None or confidence < self.min_confidence:
+            return "low_confidence"
+        if self.is_calibration(case_id):
+            return "calibration"
+        return None
+
+    def fingerprint(self) -> str:
+        """증분 평가 지문에 포함할 정책 문자열"""
+        return f"mid={self.mid_low},{self.mid_high};conf={self.min_confidence};cal={self.calibration_rate}"
+
+
+class CascadeStats:
+    """캐스케이드 집계 (스레드 안전): 승급 비율, 보정 표본 일치율, 절감 비용/시간"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.reasons: Dict[str, int] = {r: 0 for r in ESCALATION_REASONS}
+        self.cheap = {"calls": 0, "seconds": 0.0, "cost": 0.0}
+        self.strong = {"calls": 0, "seconds": 0.0, "cost": 0.0}
+        # (사유, 경량 점수, 강한 점수)
+        self.pairs: List[Tuple[str, int, int]] = []
+
+    def record(self, reason: Optional[str], cheap: Dict[str, Any], strong: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Args:
+            cheap/strong: {"score", "seconds", "cost"} (점수가 없으면 None)
+        """
+        with self._lock:
+            self.total += 1
+            for bucket, call in ((self.cheap, cheap), (self.strong, strong)):
+                if call is None:
+                    continue
+                bucket["calls"] += 1
+                bucket["seconds"] += call.get("seconds", 0.0)
+                bucket["cost"] += call.get("cost", 0.0)
+            if reason:
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+                if strong is not None and cheap.get("score") is not None and strong.get("score") is not None:
+                    self.pairs.append((reason, int(cheap["score"]), int(strong["score"])))
+
+    def report(self) -> str:
+        with self._lock:
+            if not self.total:
+                return "  - 기록 없음"
+            escalated = self.strong["calls"]
+            lines = [f"  - 총 {self.total}건 | 승급 {escalated}건 ({escalated / self.total:.0%}) | "
+                     + " / ".join(f"{r} {c}" for r, c in self.reasons.items() if c)]
+            calibration = [(a, b) for reason, a, b in self.pairs if reason == "calibration"]
+            lines.append(f"  - 보정 표본 일치율: {agreement_summary(calibration)}")
+            lines.append(f"  - 승급 케이스 전체 일치율: {agreement_summary([(a, b) for _, a, b in self.pairs])}")
+            # 절감 추정: 승급하지 않은 케이스에서 강한 Judge 평균 비용/시간을 아낀 만큼 - 경량 Judge에 쓴 만큼
+            if escalated:
+                avg_s = self.strong["seconds"] / escalated
+                avg_c = self.strong["cost"] / escalated
+                skipped = self.total - escalated
+                saved_s = skipped * avg_s - self.cheap["seconds"]
+                saved_c = skipped * avg_c - self.cheap["cost"]
+                baseline_c = self.total * avg_c
+                lines.append(
+                    f"  - 절감 추정: 시간 {saved_s:.1f}s / 비용 ${saved_c:.4f}"
+                    + (f" (강한 Judge 단독 대비 {saved_c / baseline_c:.0%})" if baseline_c > 0 else "")
+                )
+            lines.append(f"  - 경량 Judge {self.cheap['calls']}회 {self.cheap['seconds']:.1f}s ${self.cheap['cost']:.4f} | "
+                         f"강한 Judge {self.strong['calls']}회 {self.strong['seconds']:.1f}s ${self.strong['cost']:.4f}")
+            return "\n".join(lines)
+
+
+# 프로세스 전역 집계 (평가 종료 시 요약 출력에 사용)
+CASCADE_STATS = CascadeStats()
@@ -0,0 +1,133 @@
+"""
+자기 일관성(self-consistency) Judge
+- 같은 평가 요청을 한 API 호출에서 n개 완성(n=JUDGE_SC_N)으로 받아 점수 중앙값으로 확정하고 분산을 함께 기록
+- 첫 표본들이 서로 다를 때만(범위 > JUDGE_SC_MAX_SPREAD) 추가 표본을 요청해 최대 JUDGE_SC_MAX_N 개까지 채움
+  → 점수가 안정적인 케이스는 1회 호출/n개 표본, 흔들리는 케이스에만 표본을 더 씀
+- 표본 간 다양성을 위해 temperature JUDGE_SC_TEMPERATURE (기본 0.7) 사용 (0 이어도 응답 캐시 미적용)
+- 토큰 사용량(n개 완성 합계)과 비용을 다른 Judge 모드와 같은 단가(judge_cascade.call_cost)로 집계
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def aggregate(scores: Sequence[int]) -> Dict[str, Any]:
+    """
+    표본 점수 집계
+
+    Returns:
+        {"score": 중앙값(반올림 정수), "median", "variance"(모분산), "spread"(최대-최소), "n"}
+    """
+    median = statistics.median(scores)
+    return {
+        "score": int(median + 0.5),
+        "median": float(median),
+        "variance": round(statistics.pvariance(scores), 4) if len(scores) > 1 else 0.0,
+        "spread": max(scores) - min(scores),
+        "n": len(scores),
+    }
+
+
+def generations_of(llm_result) -> List[str]:
+    """generate() 결과(LLMResult)에서 첫 프롬프트의 n개 완성 텍스트"""
+    generations = llm_result.generations[0] if llm_result.generations else []
+    return [g.text for g in generations]
+
+
+def usage_of_generate(llm_result) -> Optional[Dict[str, int]]:
+    """generate() 결과의 토큰 사용량 (n개 완성 합계)"""
+    usage = (llm_result.llm_output or {}).get("token_usage") or {}
+    if not usage:
+        return None
+    return {"input_tokens": int(usage.get("prompt_tokens", 0)), "output_tokens": int(usage.get("completion_tokens", 0))}
+
+
+@dataclass
+class ConsistencyPolicy:
+    initial_n: int = 3
+    max_n: int = 7
+    max_spread: int = 0
+    temperature: float = 0.7
+
+    @classmethod
+    def from_env(cls) -> "ConsistencyPolicy":
+        initial_n = max(1, int(_env_float("JUDGE_SC_N", 3)))
+        return cls(initial_n=initial_n,
+                   max_n=max(initial_n, int(_env_float("JUDGE_SC_MAX_N", 7))),
+                   max_spread=int(_env_float("JUDGE_SC_MAX_SPREAD", 0)),
+                   temperature=_env_float("JUDGE_SC_TEMPERATURE", 0.7))
+
+    def extra_samples(self, scores: Sequence[int]) -> int:
+        """첫 표본이 서로 다르면 추가로 요청할 표본 수 (안정적이면 0)"""
+        if len(scores) >= self.max_n:
+            return 0
+        if scores and max(scores) - min(scores) <= self.max_spread:
+            return 0
+        return self.max_n - len(scores)
+
+    def fingerprint(self) -> str:
+        """증분 평가 지문에 포함할 정책 문자열"""
+        return f"n={self.initial_n}..{self.max_n};spread={self.max_spread};t={self.temperature}"
+
+
+class ConsistencyStats:
+    """자기 일관성 Judge 집계 (스레드 안전): 호출/표본 수, 추가 표본 비율, 분산, 토큰/비용"""
+
+    def __init__(self, max_n: int = 7):
+        self._lock = threading.Lock()
+        self.max_n = max_n
+        self.cases = 0
+        self.calls = 0
+        self.samples = 0
+        self.extended = 0
+        self.unstable = 0
+        self.variance_sum = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+
+    def record(self, calls: int, samples: int, extended: bool, variance: float, spread: int) -> None:
+        with self._lock:
+            self.cases += 1
+            self.calls += calls
+            self.samples += samples
+            self.extended += int(extended)
+            self.unstable += int(spread > 1)
+            self.variance_sum += variance
+
+    def record_usage(self, usage: Optional[Dict[str, int]], cost: float) -> None:
+        """케이스 1건의 generate 호출 토큰 합계/비용 (표본 확정 실패 케이스 포함)"""
+        with self._lock:
+            self.input_tokens += (usage or {}).get("input_tokens", 0)
+            self.output_tokens += (usage or {}).get("output_tokens", 0)
+            self.cost += cost
+
+    def report(self) -> str:
+        with self._lock:
+            if not self.cases:
+                return "  - 기록 없음"
+            naive = self.cases * self.max_n
+            return "\n".join([
+                f"  - 케이스 {self.cases}건 | 호출 {self.calls}회 | 표본 {self.samples}개 (케이스당 {self.samples / self.cases:.1f}개) | "
+                f"추가 표본 요청 {self.extended}건 ({self.extended / self.cases:.0%})",
+                f"  - 평균 점수 분산 {self.variance_sum / self.cases:.3f} | 표본 범위 2점 이상 {self.unstable}건",
+                f"  - 토큰 입력 {self.input_tokens:,} / 출력 {self.output_tokens:,} | 비용 ${self.cost:.4f} "
+                f"(케이스당 ${self.cost / self.cases:.4f})",
+                f"  - 고정 {self.max_n}회 개별 호출 대비: 호출 {naive - self.calls}회 / 표본 {naive - self.samples}개 절감",
+            ])
+
+
+# 프로세스 전역 집계 (평가 종료 시 요약 출력에 사용)
+CONSISTENCY_STATS = ConsistencyStats(max_n=ConsistencyPolicy.from_env().max_n)
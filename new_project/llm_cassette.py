@@ -0,0 +1,253 @@
+"""
+LLM / 임베딩 트래픽 녹화(record) · 재생(replay)
+- httpx 전송 계층에서 요청/응답을 카세트 파일(JSONL)에 기록하고, 재생 모드에서는 네트워크 없이 로컬로 응답
+- 구성요소(answer, judge, classifier, embeddings)별로 모드를 독립적으로 지정
+- 재생 시 합성 지연(녹화 당시 지연 / 고정 ms / 배율)을 넣어 우리 코드 경로의 처리량·지연을 재현 가능하게 측정
+
+환경변수
+    LLM_CASSETTE=record|replay|off              모든 구성요소 기본 모드 (기본 off)
+    LLM_CASSETTE_<COMPONENT>=record|replay|off  구성요소별 모드 (예: LLM_CASSETTE_JUDGE=replay)
+    LLM_CASSETTE_DIR=경로                       카세트 디렉토리 (기본 new_project/cassettes/default)
+    LLM_REPLAY_LATENCY=recorded|<ms>|0          재생 지연 (기본 recorded)
+    LLM_REPLAY_LATENCY_SCALE=1.0                재생 지연 배율
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+
+COMPONENTS = ("answer", "judge", "classifier", "embeddings")
+# llm_clients 역할 → 카세트 구성요소
+ROLE_COMPONENT = {
+    "answer": "answer",
+    "rag": "answer",
+    "chat": "answer",
+    "judge": "judge",
+    "judge_mini": "judge",
+    "classifier": "classifier",
+    "embeddings": "embeddings",
+}
+DEFAULT_CASSETTE_DIR = Path(__file__).parent / "cassettes" / "default"
+# 재생 시 httpx가 다시 해석하면 안 되는 헤더 (본문은 디코딩된 상태로 저장)
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+class CassetteMissError(RuntimeError):
+    """재생 모드에서 카세트에 없는 요청"""
+
+
+def component_mode(component: str) -> str:
+    """구성요소의 카세트 모드 ('record' | 'replay' | 'off')"""
+    mode = os.getenv(f"LLM_CASSETTE_{component.upper()}") or os.getenv("LLM_CASSETTE") or "off"
+    mode = mode.strip().lower()
+    return mode if mode in ("record", "replay") else "off"
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """요청 식별 키: 메서드 + 경로 + 정규화된 JSON 본문"""
+    try:
+        canonical = json.dumps(json.loads(body or b"{}"), sort_keys=True, ensure_ascii=False)
+    except Exception:
+        canonical = (body or b"").decode("utf-8", errors="replace")
+    return hashlib.sha256(f"{method.upper()} {path}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """구성요소 하나의 녹화 파일 (JSONL, append-only)"""
+
+    def __init__(self, component: str, directory: Optional[str] = None):
+        self.component = component
+        self.directory = Path(directory or os.getenv("LLM_CASSETTE_DIR") or DEFAULT_CASSETTE_DIR)
+        self.path = self.directory / f"{component}.jsonl"
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[Dict]]] = None
+        self._cursor: Dict[str, int] = {}
+
+    def _load(self) -> Dict[str, List[Dict]]:
+        if self._entries is None:
+            entries: Dict[str, List[Dict]] = {}
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            rec = json.loads(line)
+                        except Exception:
+                            continue
+                        entries.setdefault(rec["key"], []).append(rec)
+            self._entries = entries
+        return self._entries
+
+    def append(self, record: Dict) -> None:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if self._entries is not None:
+                self._entries.setdefault(record["key"], []).append(record)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """같은 요청이 여러 번 녹화되었으면 순서대로 돌려가며 반환"""
+        with self._lock:
+            records = self._load().get(key)
+            if not records:
+                return None
+            idx = self._cursor.get(key, 0)
+            self._cursor[key] = idx + 1
+            return records[idx % len(records)]
+
+
+def _replay_delay(record: Dict) -> float:
+    setting = (os.getenv("LLM_REPLAY_LATENCY") or "recorded").strip().lower()
+    try:
+        scale = float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1.0"))
+    except ValueError:
+        scale = 1.0
+    if setting == "recorded":
+        base = float(record.get("latency_ms", 0)) / 1000.0
+    else:
+        try:
+            base = float(setting) / 1000.0
+        except ValueError:
+            base = 0.0
+    return max(0.0, base * scale)
+
+
+def _record_from(request: httpx.Request, key: str, component: str,
+                 status: int, headers: httpx.Headers, body: bytes, latency: float) -> Dict:
+    return {
+        "key": key,
+        "component": component,
+        "recorded_at": time.time(),
+        "latency_ms": round(latency * 1000, 1),
+        "request": {
+            "method": request.method,
+            "path": request.url.path,
+            "body": (request.content or b"").decode("utf-8", errors="replace"),
+        },
+        "response": {
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+            "body": body.decode("utf-8", errors="replace"),
+        },
+    }
+
+
+def _response_from(record: Dict, request: httpx.Request) -> httpx.Response:
+    resp = record["response"]
+    return httpx.Response(
+        status_code=int(resp["status"]),
+        headers=resp.get("headers") or {},
+        content=resp.get("body", "").encode("utf-8"),
+        request=request,
+    )
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """동기 httpx 전송 계층 (record: 실제 전송 후 기록 / replay: 카세트에서 응답)"""
+
+    def __init__(self, component: str, mode: str, inner: Optional[httpx.BaseTransport] = None,
+                 cassette: Optional[Cassette] = None):
+        self.component = component
+        self.mode = mode
+        self.inner = inner
+        self.cassette = cassette or get_cassette(component)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key = request_key(request.method, request.url.path, request.content)
+        if self.mode == "replay":
+            record = self.cassette.lookup(key)
+            if record is None:
+                raise CassetteMissError(f"[{self.component}] 카세트에 없는 요청: {request.method} {request.url.path} ({key[:12]})")
+            delay = _replay_delay(record)
+            if delay:
+                time.sleep(delay)
+            return _response_from(record, request)
+
+        started = time.monotonic()
+        response = self.inner.handle_request(request)
+        body = response.read()
+        latency = time.monotonic() - started
+        if self.mode == "record" and response.status_code < 500:
+            self.cassette.append(_record_from(request, key, self.component, response.status_code,
+                                              response.headers, body, latency))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            content=body,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        if self.inner is not None:
+            self.inner.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """비동기 httpx 전송 계층 (CassetteTransport와 같은 카세트 공유)"""
+
+    def __init__(self, component: str, mode: str, inner: Optional[httpx.AsyncBaseTransport] = None,
+                 cassette: Optional[Cassette] = None):
+        self.component = component
+        self.mode = mode
+        self.inner = inner
+        self.cassette = cassette or get_cassette(component)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        import asyncio
+        await request.aread()
+        key = request_key(request.method, request.url.path, request.content)
+        if self.mode == "replay":
+            record = self.cassette.lookup(key)
+            if record is None:
+                raise CassetteMissError(f"[{self.component}] 카세트에 없는 요청: {request.method} {request.url.path} ({key[:12]})")
+            delay = _replay_delay(record)
+            if delay:
+                await asyncio.sleep(delay)
+            return _response_from(record, request)
+
+        started = time.monotonic()
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        latency = time.monotonic() - started
+        if self.mode == "record" and response.status_code < 500:
+            self.cassette.append(_record_from(request, key, self.component, response.status_code,
+                                              response.headers, body, latency))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            content=body,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+_CASSETTES: Dict[str, Cassette] = {}
+_CASSETTES_LOCK = threading.Lock()
+
+
+def get_cassette(component: str) -> Cassette:
+    """구성요소별 카세트 (동기/비동기 전송 계층이 공유)"""
+    with _CASSETTES_LOCK:
+        cassette = _CASSETTES.get(component)
+        if cassette is None:
+            cassette = Cassette(component)
+            _CASSETTES[component] = cassette
+        return cassette
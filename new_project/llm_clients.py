@@ -0,0 +1,237 @@
+"""
+LLM 클라이언트 레지스트리
+- 역할(role)별 모델 클라이언트를 한 곳에서 생성/재사용 (answer, judge, classifier, chat ...)
+- 모든 클라이언트가 하나의 HTTP 커넥션 풀(keep-alive)을 공유
+- 타임아웃/재시도 정책과 모델 이름을 이 모듈에서만 설정
+- 모든 채팅 모델은 공유 레이트 리미터(rate_limiter.py)를 거쳐 호출되고, 429 응답은 HTTP 훅으로 스케줄러에 반영
+  (임베딩 클라이언트는 rate_limiter 인자가 없어 HTTP 요청 훅에서 같은 스케줄러로 요청/토큰 확보)
+- temperature 0 Judge/분류기 역할은 SQLite 응답 캐시(response_cache.py)를 사용
+- 재시도는 resilience.py 계층이 담당하므로 SDK 자체 재시도는 기본 0회, 요청 타임아웃은 현재 데드라인으로 제한
+- LLM_CASSETTE[_<COMPONENT>]=record|replay 이면 해당 구성요소는 카세트 전송 계층(llm_cassette.py)을 쓰는 전용 클라이언트 사용
+
+모델 이름은 환경변수 LLM_MODEL_<ROLE> 로 덮어쓸 수 있습니다. (예: LLM_MODEL_JUDGE=gpt-4o-mini)
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from llm_cassette import ROLE_COMPONENT, AsyncCassetteTransport, CassetteTransport, component_mode
+from rate_limiter import (SchedulerRateLimiter, TokenUsageCallback, on_http_request, on_http_request_async,
+                          on_http_response, on_http_response_async)
+from resilience import apply_deadline_to_request, apply_deadline_to_request_async
+from response_cache import get_response_cache
+
+
+# 역할별 기본 설정 (모델 이름의 단일 설정 지점)
+ROLE_DEFAULTS: Dict[str, Dict] = {
+    "answer": {"model": "gpt-4o", "temperature": 0.7},       # 직접 답변 생성 (RAG 폴백)
+    "rag": {"model": "gpt-4o", "temperature": 0},            # RAG 컨텍스트 기반 답변
+    "judge": {"model": "gpt-4o", "temperature": 0},          # LLM-as-Judge
+    "judge_mini": {"model": "gpt-4o-mini", "temperature": 0},  # 경량 Judge (데이터셋 매니저)
+    "classifier": {"model": "gpt-4o", "temperature": 0},     # 라우팅 분류/질의 재작성/요약
+    "chat": {"model": "gpt-4o", "temperature": 0.7},         # 일반 대화
+}
+EMBEDDING_DEFAULT = "text-embedding-3-small"
+# 결정적 출력이라 응답 캐시를 적용하는 역할 (temperature 0 일 때만)
+CACHED_ROLES = {"judge", "judge_mini", "classifier"}
+
+_LOCK = threading.Lock()
+_HTTP_CLIENT: Optional[httpx.Client] = None
+_HTTP_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+_CASSETTE_CLIENTS: Dict[Tuple[str, str], httpx.Client] = {}
+_CASSETTE_ASYNC_CLIENTS: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+_CHAT_MODELS: Dict[Tuple, ChatOpenAI] = {}
+_EMBEDDINGS: Dict[Tuple[str, str], OpenAIEmbeddings] = {}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _timeout() -> httpx.Timeout:
+    """공통 타임아웃 정책 (LLM_TIMEOUT: 전체 읽기, LLM_CONNECT_TIMEOUT: 연결)"""
+    return httpx.Timeout(
+        _env_float("LLM_TIMEOUT", 60.0),
+        connect=_env_float("LLM_CONNECT_TIMEOUT", 10.0),
+    )
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(_env_float("LLM_MAX_CONNECTIONS", 64)),
+        max_keepalive_connections=int(_env_float("LLM_MAX_KEEPALIVE", 32)),
+        keepalive_expiry=_env_float("LLM_KEEPALIVE_EXPIRY", 90.0),
+    )
+
+
+def get_http_client(component: Optional[str] = None) -> httpx.Client:
+    """
+    동기 HTTP 클라이언트 (기본: 프로세스 공유 커넥션 풀)
+
+    Args:
+        component: 'answer' | 'judge' | 'classifier' | 'embeddings'
+                   (해당 구성요소가 카세트 record/replay 모드면 전용 클라이언트 반환)
+    """
+    global _HTTP_CLIENT
+    mode = component_mode(component) if component else "off"
+    with _LOCK:
+        if mode != "off":
+            client = _CASSETTE_CLIENTS.get((component, mode))
+            if client is None:
+                inner = httpx.HTTPTransport(limits=_limits()) if mode == "record" else None
+                client = httpx.Client(
+                    transport=CassetteTransport(component, mode, inner),
+                    timeout=_timeout(),
+                    event_hooks={"request": [apply_deadline_to_request] + ([on_http_request] if mode == "record" else []),
+                                 "response": [on_http_response]},
+                )
+                _CASSETTE_CLIENTS[(component, mode)] = client
+            return client
+        if _HTTP_CLIENT is None:
+            _HTTP_CLIENT = httpx.Client(
+                limits=_limits(),
+                timeout=_timeout(),
+                event_hooks={"request": [apply_deadline_to_request, on_http_request], "response": [on_http_response]},
+            )
+        return _HTTP_CLIENT
+
+
+def get_http_async_client(component: Optional[str] = None) -> httpx.AsyncClient:
+    """비동기 HTTP 클라이언트 (get_http_client와 같은 규칙)"""
+    global _HTTP_ASYNC_CLIENT
+    mode = component_mode(component) if component else "off"
+    with _LOCK:
+        if mode != "off":
+            client = _CASSETTE_ASYNC_CLIENTS.get((component, mode))
+            if client is None:
+                inner = httpx.AsyncHTTPTransport(limits=_limits()) if mode == "record" else None
+                client = httpx.AsyncClient(
+                    transport=AsyncCassetteTransport(component, mode, inner),
+                    timeout=_timeout(),
+                    event_hooks={"request": [apply_deadline_to_request_async]
+                                 + ([on_http_request_async] if mode == "record" else []),
+                                 "response": [on_http_response_async]},
+                )
+                _CASSETTE_ASYNC_CLIENTS[(component, mode)] = client
+            return client
+        if _HTTP_ASYNC_CLIENT is None:
+            _HTTP_ASYNC_CLIENT = httpx.AsyncClient(
+                limits=_limits(),
+                timeout=_timeout(),
+                event_hooks={"request": [apply_deadline_to_request_async, on_http_request_async],
+                             "response": [on_http_response_async]},
+            )
+        return _HTTP_ASYNC_CLIENT
+
+
+def _offline_kwargs(mode: str) -> Dict:
+    """재생 모드는 네트워크를 쓰지 않으므로 API 키가 없어도 클라이언트 생성이 가능하도록 더미 키 사용"""
+    if mode == "replay" and not os.getenv("OPENAI_API_KEY"):
+        return {"api_key": "replay-offline"}
+    return {}
+
+
+def model_name(role: str) -> str:
+    """역할에 설정된 모델 이름 (LLM_MODEL_<ROLE> 환경변수 우선)"""
+    if role == "embeddings":
+        return os.getenv("LLM_MODEL_EMBEDDINGS", EMBEDDING_DEFAULT)
+    if role not in ROLE_DEFAULTS:
+        raise KeyError(f"알 수 없는 LLM 역할: {role}")
+    return os.getenv(f"LLM_MODEL_{role.upper()}", ROLE_DEFAULTS[role]["model"])
+
+
+def get_chat_model(role: str, model: Optional[str] = None, **overrides) -> ChatOpenAI:
+    """
+    역할별 ChatOpenAI 인스턴스 반환 (동일 설정이면 같은 인스턴스 재사용)
+
+    Args:
+        role: 'answer' | 'rag' | 'judge' | 'judge_mini' | 'classifier' | 'chat'
+        model: 모델 이름 직접 지정 (생략 시 model_name(role))
+        **overrides: temperature 등 ChatOpenAI 인자 덮어쓰기 (cache=False 면 temperature 0 이어도 응답 캐시 미적용)
+    """
+    params = dict(ROLE_DEFAULTS[role])
+    params["model"] = model or model_name(role)
+    params.update(overrides)
+    component = ROLE_COMPONENT.get(role, "answer")
+    mode = component_mode(component)
+    key = (role, mode) + tuple(sorted((k, repr(v)) for k, v in params.items()))
+    http_client = get_http_client(component)
+    http_async_client = get_http_async_client(component)
+    cacheable = role in CACHED_ROLES and params.get("temperature") == 0 and "cache" not in overrides
+    cache = get_response_cache() if cacheable else None
+    with _LOCK:
+        llm = _CHAT_MODELS.get(key)
+        if llm is None:
+            if cache is not None:
+                params["cache"] = cache
+            if mode != "replay":
+                # 재생 모드는 실제 쿼터를 쓰지 않으므로 레이트 리미터 생략 (우리 코드 경로만 측정)
+                params["rate_limiter"] = SchedulerRateLimiter(params["model"])
+            params.update(_offline_kwargs(mode))
+            llm = ChatOpenAI(
+                http_client=http_client,
+                http_async_client=http_async_client,
+                timeout=_timeout(),
+                max_retries=int(_env_float("LLM_MAX_RETRIES", 0)),
+                callbacks=[TokenUsageCallback(params["model"])],
+                **params,
+            )
+            _CHAT_MODELS[key] = llm
+        return llm
+
+
+def get_embeddings(model: Optional[str] = None) -> OpenAIEmbeddings:
+    """공유 커넥션 풀을 사용하는 임베딩 클라이언트 (요청마다 HTTP 훅 on_http_request 가 레이트 리미터 확보)"""
+    name = model or model_name("embeddings")
+    mode = component_mode("embeddings")
+    http_client = get_http_client("embeddings")
+    http_async_client = get_http_async_client("embeddings")
+    with _LOCK:
+        emb = _EMBEDDINGS.get((name, mode))
+        if emb is None:
+            emb = OpenAIEmbeddings(
+                model=name,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                timeout=_timeout(),
+                max_retries=int(_env_float("LLM_MAX_RETRIES", 0)),
+                **_offline_kwargs(mode),
+            )
+            _EMBEDDINGS[(name, mode)] = emb
+        return emb
+
+
+def close_clients() -> None:
+    """공유 HTTP 커넥션 정리 (프로세스 종료 시 자동 호출)"""
+    global _HTTP_CLIENT, _HTTP_ASYNC_CLIENT
+    with _LOCK:
+        if _HTTP_CLIENT is not None:
+            try:
+                _HTTP_CLIENT.close()
+            except Exception:
+                pass
+        _HTTP_CLIENT = None
+        for client in _CASSETTE_CLIENTS.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _CASSETTE_CLIENTS.clear()
+        _CASSETTE_ASYNC_CLIENTS.clear()
+        # AsyncClient는 이벤트 루프 밖에서 닫을 수 없으므로 참조만 해제
+        _HTTP_ASYNC_CLIENT = None
+        _CHAT_MODELS.clear()
+        _EMBEDDINGS.clear()
+
+
+atexit.register(close_clients)
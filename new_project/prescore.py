@@ -0,0 +1,159 @@
+"""
+기대 답변 기반 사전 채점 (rapidfuzz)
+- 기대 답변(expected_answer)이 있는 케이스에서 실제 답변과 기대 답변의 유사도를 묶음 단위로 한 번에 계산
+  (process.cpdist, 정규화 후 token_set_ratio + ratio)
+- 거의 일치하는 답변은 5점, 기대 답변이 있는데 답변을 거부한 경우(모른다/정보 없음 등)는 0점으로 자동 채점해 Judge 호출 생략
+- 나머지(애매한 케이스)만 Judge로 보내고, 자동 채점 케이스 일부(PRESCORE_AUDIT 비율)는 Judge로도 채점해 일치율 집계
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rapidfuzz import fuzz, process
+
+from judge_cascade import agreement_summary, hash_sample
+
+
+REFUSAL_PATTERNS = [
+    r"모르겠", r"모릅니다", r"알 수 없", r"정보가 (없|부족)", r"찾을 수 없", r"답변(할|드릴) 수 없",
+    r"확인(할|되지) 수 없", r"컨텍스트에 (없|포함되어 있지 않)", r"근거가 없", r"i don'?t know", r"cannot (answer|find)", r"no (relevant )?information",
+]
+_REFUSAL_RE = re.compile("|".join(REFUSAL_PATTERNS), re.IGNORECASE)
+_CITATION_RE = re.compile(r"\[\d+\]")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize(text: str) -> str:
+    """인용 번호/문장부호/공백 차이 제거 후 소문자"""
+    text = _CITATION_RE.sub(" ", text or "")
+    text = _PUNCT_RE.sub(" ", text)
+    return " ".join(text.lower().split())
+
+
+def is_refusal(text: str, max_chars: int = 300) -> bool:
+    """짧은 답변이 거부/모름 표현이면 True (긴 답변 속 일부 언급은 제외)"""
+    text = (text or "").strip()
+    return bool(text) and len(text) <= max_chars and bool(_REFUSAL_RE.search(text))
+
+
+def pairwise(scorer, answers: Sequence[str], expected: Sequence[str]) -> List[float]:
+    """쌍별(element-wise) 유사도 일괄 계산 (numpy가 없거나 구버전 rapidfuzz면 쌍별 반복)"""
+    try:
+        return [float(x) for x in process.cpdist(answers, expected, scorer=scorer, workers=-1)]
+    except (ImportError, AttributeError):
+        return [float(scorer(a, e)) for a, e in zip(answers, expected)]
+
+
+@dataclass
+class PreScore:
+    """사전 채점 결과 (score가 None이면 Judge로 보냄)"""
+    score: Optional[int]
+    rule: str                 # exact_match | refusal | ambiguous | no_reference
+    token_set: float = 0.0
+    ratio: float = 0.0
+
+    @property
+    def reasoning(self) -> str:
+        if self.rule == "exact_match":
+            return f"[사전 채점] 기대 답변과 거의 일치 (token_set {self.token_set:.0f}, ratio {self.ratio:.0f})"
+        if self.rule == "refusal":
+            return "[사전 채점] 기대 답변이 있는 질문에 답변을 거부/회피함"
+        return ""
+
+
+@dataclass
+class PreScorePolicy:
+    match_token_set: float = 95.0
+    match_ratio: float = 85.0
+    refusal_score: int = 0
+    audit_rate: float = 0.1
+
+    @classmethod
+    def from_env(cls) -> "PreScorePolicy":
+        return cls(match_token_set=_env_float("PRESCORE_MATCH_TOKEN_SET", 95.0),
+                   match_ratio=_env_float("PRESCORE_MATCH_RATIO", 85.0),
+                   refusal_score=int(_env_float("PRESCORE_REFUSAL_SCORE", 0)),
+                   audit_rate=_env_float("PRESCORE_AUDIT", 0.1))
+
+    def fingerprint(self) -> str:
+        return f"ts={self.match_token_set};r={self.match_ratio};refusal={self.refusal_score}"
+
+    def score_batch(self, items: Sequence[Tuple[str, str, Optional[str]]]) -> Dict[str, PreScore]:
+        """
+        Args:
+            items: [(case_id, answer, expected_answer), ...]
+
+        Returns:
+            {case_id: PreScore}
+        """
+        results: Dict[str, PreScore] = {}
+        scored = [(cid, ans or "", exp) for cid, ans, exp in items if (exp or "").strip()]
+        for cid, _, exp in items:
+            if not (exp or "").strip():
+                results[cid] = PreScore(None, "no_reference")
+        if not scored:
+            return results
+        answers = [normalize(a) for _, a, _ in scored]
+        expected = [normalize(e) for _, _, e in scored]
+        token_set = pairwise(fuzz.token_set_ratio, answers, expected)
+        ratio = pairwise(fuzz.ratio, answers, expected)
+        for (cid, answer, exp), ts, r in zip(scored, token_set, ratio):
+            if ts >= self.match_token_set and r >= self.match_ratio:
+                results[cid] = PreScore(5, "exact_match", ts, r)
+            elif is_refusal(answer) and not is_refusal(exp):
+                results[cid] = PreScore(self.refusal_score, "refusal", ts, r)
+            else:
+                results[cid] = PreScore(None, "ambiguous", ts, r)
+        return results
+
+    def is_audit(self, case_id: str) -> bool:
+        """자동 채점 케이스 중 Judge로도 채점할 표본 (case_id 해시)"""
+        return hash_sample(case_id, self.audit_rate, "prescore-audit")
+
+
+class PreScoreStats:
+    """사전 채점 집계 (스레드 안전): 생략률, 규칙별 건수, Judge 일치율"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rules: Dict[str, int] = {}
+        self.skipped = 0
+        self.audited = 0
+        self.pairs: List[Tuple[int, int]] = []
+
+    def record(self, pre: PreScore, skipped: bool, audited: bool = False) -> None:
+        with self._lock:
+            self.rules[pre.rule] = self.rules.get(pre.rule, 0) + 1
+            self.skipped += int(skipped)
+            self.audited += int(audited)
+
+    def record_pair(self, pre_score: int, judge_score: int) -> None:
+        with self._lock:
+            self.pairs.append((pre_score, judge_score))
+
+    def report(self) -> str:
+        with self._lock:
+            total = sum(self.rules.values())
+            if not total:
+                return "  - 기록 없음"
+            rules = " / ".join(f"{k} {v}" for k, v in sorted(self.rules.items()))
+            return "\n".join([
+                f"  - 총 {total}건 | Judge 생략 {self.skipped}건 ({self.skipped / total:.0%}) | 감사 표본 {self.audited}건 | {rules}",
+                f"  - 자동 채점 vs Judge 일치율: {agreement_summary(self.pairs)}",
+            ])
+
+
+# 프로세스 전역 집계 (평가 종료 시 요약 출력에 사용)
+PRESCORE_STATS = PreScoreStats()
@@ -0,0 +1,182 @@
+"""
+RAG 품질 지표 (ragas 0.3.1)
+- 평가 결과마다 답변과 검색 컨텍스트(EVRAGAgent 인용 청크)로 다음 지표를 계산
+  · faithfulness        (Faithfulness: 답변 주장이 컨텍스트로 뒷받침되는 비율)
+  · answer_relevancy    (ResponseRelevancy: 답변에서 역생성한 질문과 원 질문의 임베딩 유사도)
+  · context_precision   (LLMContextPrecisionWithoutReference: 상위 컨텍스트가 답변에 쓸모 있는 정도)
+- 프로세스 전역 이벤트 루프 1개(백그라운드 스레드)에서 비동기로 실행하고, 세마포어로 동시 지표 호출 수를 제한
+  (RAGAS_CONCURRENCY). 평가 파이프라인의 metrics 단계가 묶음 단위로 제출하므로 답변/채점과 겹쳐 실행됨
+- 임베딩은 로컬 파일 캐시(CacheBackedEmbeddings, .cache/ragas_embeddings)를 공유해 재실행 시 다시 계산하지 않음
+- 지표 계산 실패/시간 초과는 해당 지표만 None (평가 결과 저장은 막지 않음)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from llm_clients import get_chat_model, get_embeddings, model_name
+
+
+METRIC_NAMES = ("faithfulness", "answer_relevancy", "context_precision")
+RESULT_KEYS = tuple(f"ragas_{name}" for name in METRIC_NAMES)
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "ragas_embeddings"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def ragas_enabled() -> bool:
+    return os.getenv("EVAL_RAGAS", "").lower() in ("1", "true", "yes")
+
+
+def ragas_model() -> str:
+    """지표 계산용 LLM (기본: 경량 Judge 모델)"""
+    return os.getenv("RAGAS_MODEL") or model_name("judge_mini")
+
+
+def cached_embeddings(cache_dir: Optional[Path] = None):
+    """공유 커넥션 풀 임베딩 + 로컬 파일 캐시 (문서/질의 임베딩 모두 캐시)"""
+    from langchain.embeddings import CacheBackedEmbeddings
+    from langchain.storage import LocalFileStore
+
+    underlying = get_embeddings()
+    store = LocalFileStore(str(cache_dir or os.getenv("RAGAS_EMBEDDING_CACHE_DIR") or DEFAULT_CACHE_DIR))
+    try:
+        return CacheBackedEmbeddings.from_bytes_store(underlying, store, namespace=underlying.model,
+                                                      query_embedding_cache=True)
+    except TypeError:
+        # 구버전 langchain: 질의 임베딩 캐시 미지원
+        return CacheBackedEmbeddings.from_bytes_store(underlying, store, namespace=underlying.model)
+
+
+def _clean(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else round(value, 4)
+
+
+class RagasStats:
+    """지표 집계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cases = 0
+        self.seconds = 0.0
+        self.sums: Dict[str, float] = {name: 0.0 for name in METRIC_NAMES}
+        self.counts: Dict[str, int] = {name: 0 for name in METRIC_NAMES}
+        self.failures: Dict[str, int] = {name: 0 for name in METRIC_NAMES}
+
+    def record(self, scores: Dict[str, Optional[float]], seconds: float) -> None:
+        with self._lock:
+            self.cases += 1
+            self.seconds += seconds
+            for name in METRIC_NAMES:
+                value = scores.get(f"ragas_{name}")
+                if value is None:
+                    self.failures[name] += 1
+                else:
+                    self.sums[name] += value
+                    self.counts[name] += 1
+
+    def report(self) -> str:
+        with self._lock:
+            if not self.cases:
+                return "  - 기록 없음"
+            parts = []
+            for name in METRIC_NAMES:
+                n = self.counts[name]
+                avg = f"{self.sums[name] / n:.3f}" if n else "-"
+                parts.append(f"{name} {avg}" + (f" (실패 {self.failures[name]})" if self.failures[name] else ""))
+            return "\n".join([
+                f"  - 케이스 {self.cases}건 | 지표 계산 누적 {self.seconds:.1f}s (답변/채점과 병행)",
+                "  - 평균: " + " | ".join(parts),
+            ])
+
+
+# 프로세스 전역 집계 (평가 종료 시 요약 출력에 사용)
+RAGAS_STATS = RagasStats()
+
+
+class RagasScorer:
+    """백그라운드 이벤트 루프에서 ragas 지표를 비동기 계산 (스레드 안전, 동시 호출 수 제한)"""
+
+    def __init__(self, concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        from ragas import SingleTurnSample
+        from ragas.embeddings import LangchainEmbeddingsWrapper
+        from ragas.llms import LangchainLLMWrapper
+        from ragas.metrics import Faithfulness, LLMContextPrecisionWithoutReference, ResponseRelevancy
+
+        self._sample_cls = SingleTurnSample
+        llm = LangchainLLMWrapper(get_chat_model("judge_mini", model=ragas_model()))
+        embeddings = LangchainEmbeddingsWrapper(cached_embeddings())
+        self.metrics = {
+            "faithfulness": Faithfulness(llm=llm),
+            "answer_relevancy": ResponseRelevancy(llm=llm, embeddings=embeddings),
+            "context_precision": LLMContextPrecisionWithoutReference(llm=llm),
+        }
+        self.concurrency = max(1, concurrency or int(_env_float("RAGAS_CONCURRENCY", 8)))
+        self.timeout = timeout or _env_float("RAGAS_TIMEOUT", 120.0)
+        self._loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ragas-loop", daemon=True)
+        self._thread.start()
+
+    async def _metric(self, name: str, sample) -> Optional[float]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            try:
+                return _clean(await asyncio.wait_for(self.metrics[name].single_turn_ascore(sample), self.timeout))
+            except Exception:
+                return None
+
+    async def _score_case(self, question: str, answer: str, contexts: List[str]) -> Dict[str, Optional[float]]:
+        sample = self._sample_cls(user_input=question, response=answer, retrieved_contexts=contexts)
+        values = await asyncio.gather(*(self._metric(name, sample) for name in METRIC_NAMES))
+        return {f"ragas_{name}": value for name, value in zip(METRIC_NAMES, values)}
+
+    async def _score_all(self, items: Sequence[Tuple[str, str, str, List[str]]]) -> Dict[str, Dict]:
+        started = time.monotonic()
+        results = await asyncio.gather(*(self._score_case(q, a, ctx) for _, q, a, ctx in items))
+        elapsed = time.monotonic() - started
+        for scores in results:
+            RAGAS_STATS.record(scores, elapsed / max(1, len(items)))
+        return {case_id: scores for (case_id, _, _, _), scores in zip(items, results)}
+
+    def score_batch(self, items: Sequence[Tuple[str, str, str, List[str]]]) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Args:
+            items: [(case_id, question, answer, contexts), ...]
+
+        Returns:
+            {case_id: {"ragas_faithfulness", "ragas_answer_relevancy", "ragas_context_precision"}}
+        """
+        if not items:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(self._score_all(items), self._loop)
+        return future.result()
+
+
+_SCORER: Optional[RagasScorer] = None
+_SCORER_LOCK = threading.Lock()
+
+
+def get_ragas_scorer() -> RagasScorer:
+    """프로세스 전역 RagasScorer (처음 호출 시 생성, ragas 미설치면 ImportError)"""
+    global _SCORER
+    with _SCORER_LOCK:
+        if _SCORER is None:
+            _SCORER = RagasScorer()
+        return _SCORER
@@ -0,0 +1,410 @@
+"""
+모델별 요청/토큰 레이트 리미터 + 우선순위 스케줄러
+- 모델마다 RPM(분당 요청 수)과 TPM(분당 토큰 수) 토큰 버킷을 유지
+- 429 / Retry-After 응답을 받으면 해당 모델을 일시 정지하고 유효 속도를 낮춘 뒤 성공 응답마다 서서히 복구
+- 대화형(interactive) 요청이 대기 중이면 배치 평가(batch) 요청은 양보
+
+고정 time.sleep 스로틀링을 대체합니다. 한도는 환경변수 LLM_RATE_LIMITS 로 지정할 수 있습니다.
+    예) LLM_RATE_LIMITS='{"gpt-4o": [500, 30000], "gpt-4o-mini": [500, 200000]}'  # [rpm, tpm]
+
+스케줄러는 프로세스 단위입니다. 여러 프로세스가 같은 쿼터를 나눠 쓰면 LLM_RATE_SHARE (0~1, 예: 샤드 4개면 0.25) 로
+프로세스 몫을 지정합니다. 웹 서버처럼 자식 프로세스(평가)를 띄우는 쪽은 lend_share 로 자기 몫의 일부를 자식에게 넘기고
+그동안 자기 버킷을 줄입니다 → 두 프로세스 합계가 쿼터를 넘지 않고, 남긴 몫은 대화형 요청 전용이 되어 배치 평가가
+대화형 요청을 굶기지 않습니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# 기본 한도 [rpm, tpm] (조직 쿼터에 맞게 LLM_RATE_LIMITS 로 조정)
+DEFAULT_LIMITS: Dict[str, tuple] = {
+    "gpt-4o": (500, 30_000),
+    "gpt-4o-mini": (500, 200_000),
+    "text-embedding-3-small": (3_000, 1_000_000),
+}
+FALLBACK_LIMITS = (500, 30_000)
+
+_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar("llm_request_priority", default=PRIORITY_BATCH)
+# acquire 가 실제로 확보한 (모델, 토큰 수): 응답 후 사용량 보정 기준
+_RESERVED: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar("llm_reserved_tokens", default=None)
+
+
+@contextlib.contextmanager
+def request_priority(priority: int):
+    """with 블록 안에서 발생하는 LLM 호출의 우선순위 지정"""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> int:
+    return _PRIORITY.get()
+
+
+class TokenBucket:
+    """연속 보충 토큰 버킷 (분당 한도 기준)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = float(per_minute) / 60.0  # 초당 보충량
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, factor: float = 1.0) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate * factor)
+        self.updated = now
+
+    def wait_time(self, amount: float, factor: float = 1.0) -> float:
+        """amount 만큼 확보하기까지 필요한 대기 시간(초)"""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / max(self.rate * factor, 1e-9)
+
+
+class _ModelState:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.factor = 1.0            # 429 적응 계수 (0.25 ~ 1.0)
+        self.waiting_interactive = 0
+        self.avg_tokens = 1_000.0    # 요청당 토큰 이동 평균 (추정치)
+
+
+class RateLimitScheduler:
+    """모델별 RPM/TPM 토큰 버킷 + 우선순위 대기열 (스레드 안전)"""
+
+    def __init__(self, limits: Optional[Dict[str, tuple]] = None, share: float = 1.0):
+        self.limits = dict(DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.share = min(1.0, max(share, 1e-3))
+        self.base_share = self.share
+        self.lent = 0.0
+        self._cond = threading.Condition()
+        self._states: Dict[str, _ModelState] = {}
+        self.stats = {"acquired": 0, "waited_seconds": 0.0, "throttled_429": 0}
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._states.get(model)
+        if state is None:
+            rpm, tpm = self.limits.get(model, FALLBACK_LIMITS)
+            state = _ModelState(rpm * self.share, tpm * self.share)
+            self._states[model] = state
+        return state
+
+    def _rescale_locked(self, share: float) -> None:
+        """몫 변경: 모델별 버킷 용량/보충 속도를 새 몫에 맞춤 (남은 토큰은 비율 유지)"""
+        share = min(1.0, max(share, 1e-3))
+        ratio = share / self.share
+        for state in self._states.values():
+            for bucket in (state.requests, state.tokens):
+                bucket.capacity *= ratio
+                bucket.rate *= ratio
+                bucket.tokens *= ratio
+        self.share = share
+        self._cond.notify_all()
+
+    def lend(self, fraction: float) -> float:
+        """
+        이 프로세스 기본 몫 중 fraction 을 자식 프로세스에 넘기고 자기 버킷을 줄임
+
+        Returns:
+            자식 프로세스의 LLM_RATE_SHARE 값
+        """
+        with self._cond:
+            amount = min(self.base_share * min(max(fraction, 0.0), 1.0), self.base_share - self.lent - 1e-3)
+            amount = max(0.0, amount)
+            self.lent += amount
+            self._rescale_locked(self.base_share - self.lent)
+            return amount
+
+    def reclaim(self, amount: float) -> None:
+        """lend 로 넘긴 몫을 돌려받음 (자식 프로세스 종료 후)"""
+        with self._cond:
+            self.lent = max(0.0, self.lent - amount)
+            self._rescale_locked(self.base_share - self.lent)
+
+    def estimate_tokens(self, model: str) -> float:
+        with self._cond:
+            return self._state(model).avg_tokens
+
+    def acquire(self, model: str, tokens: Optional[float] = None, priority: Optional[int] = None) -> float:
+        """
+        요청 1건과 tokens 만큼의 토큰을 확보할 때까지 대기 (확보한 토큰 수는 현재 컨텍스트에 기록 → reserved_tokens)
+
+        Args:
+            model: 모델 이름
+            tokens: 예상 토큰 수 (생략 시 이동 평균)
+            priority: PRIORITY_INTERACTIVE | PRIORITY_BATCH (생략 시 컨텍스트 우선순위)
+
+        Returns:
+            대기한 시간(초)
+        """
+        waited, reserved = self.reserve(model, tokens, priority)
+        _RESERVED.set((model, reserved))
+        return waited
+
+    def reserve(self, model: str, tokens: Optional[float] = None,
+                priority: Optional[int] = None) -> Tuple[float, float]:
+        """acquire 본체: (대기 시간(초), 확보한 토큰 수)"""
+        priority = current_priority() if priority is None else priority
+        started = time.monotonic()
+        with self._cond:
+            state = self._state(model)
+            amount = state.avg_tokens if tokens is None else float(tokens)
+            if priority == PRIORITY_INTERACTIVE:
+                state.waiting_interactive += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if state.paused_until > now:
+                        self._cond.wait(state.paused_until - now)
+                        continue
+                    if priority != PRIORITY_INTERACTIVE and state.waiting_interactive > 0:
+                        self._cond.wait(0.05)
+                        continue
+                    state.requests.refill(now, state.factor)
+                    state.tokens.refill(now, state.factor)
+                    wait = max(state.requests.wait_time(1, state.factor),
+                               state.tokens.wait_time(amount, state.factor))
+                    if wait <= 0:
+                        reserved = min(amount, state.tokens.capacity)
+                        state.requests.tokens -= 1
+                        state.tokens.tokens -= reserved
+                        break
+                    self._cond.wait(min(wait, 1.0))
+            finally:
+                if priority == PRIORITY_INTERACTIVE:
+                    state.waiting_interactive -= 1
+                    self._cond.notify_all()
+            waited = time.monotonic() - started
+            self.stats["acquired"] += 1
+            self.stats["waited_seconds"] += waited
+            return waited, reserved
+
+    def record_usage(self, model: str, estimated: float, actual: float) -> None:
+        """실제 사용 토큰으로 TPM 버킷과 이동 평균 보정"""
+        with self._cond:
+            state = self._state(model)
+            state.tokens.tokens -= (actual - estimated)
+            state.avg_tokens = 0.8 * state.avg_tokens + 0.2 * actual
+            self._cond.notify_all()
+
+    def penalize(self, model: str, retry_after: Optional[float]) -> None:
+        """429 수신: Retry-After 동안 정지하고 유효 속도를 낮춤"""
+        with self._cond:
+            state = self._state(model)
+            pause = retry_after if retry_after and retry_after > 0 else 1.0
+            state.paused_until = max(state.paused_until, time.monotonic() + pause)
+            state.factor = max(0.25, state.factor * 0.7)
+            self.stats["throttled_429"] += 1
+            self._cond.notify_all()
+
+    def record_success(self, model: str) -> None:
+        """성공 응답: 적응 계수를 서서히 복구"""
+        with self._cond:
+            state = self._state(model)
+            if state.factor < 1.0:
+                state.factor = min(1.0, state.factor * 1.02)
+
+    def report(self) -> str:
+        with self._cond:
+            s = self.stats
+            factors = ", ".join(f"{m}: x{st.factor:.2f}" for m, st in self._states.items())
+        return (f"  - 확보 {s['acquired']}건 | 누적 대기 {s['waited_seconds']:.1f}s | "
+                f"429 수신 {s['throttled_429']}건" + (f" | 속도 계수 {factors}" if factors else ""))
+
+
+def reserved_tokens(model: str) -> Optional[float]:
+    """현재 컨텍스트에서 마지막으로 acquire 가 model 에 대해 확보한 토큰 수"""
+    held = _RESERVED.get()
+    return held[1] if held and held[0] == model else None
+
+
+@contextlib.contextmanager
+def lend_share(fraction: float):
+    """
+    with 블록 동안 이 프로세스 몫의 fraction 을 자식 프로세스에 넘김
+
+    Yields:
+        자식 프로세스 환경변수 LLM_RATE_SHARE 로 넘길 문자열
+    """
+    scheduler = get_scheduler()
+    amount = scheduler.lend(fraction)
+    try:
+        yield f"{max(amount, 1e-3):.6f}"
+    finally:
+        scheduler.reclaim(amount)
+
+
+def _load_env_limits() -> Dict[str, tuple]:
+    raw = os.getenv("LLM_RATE_LIMITS")
+    if not raw:
+        return {}
+    try:
+        return {k: (float(v[0]), float(v[1])) for k, v in json.loads(raw).items()}
+    except Exception as e:
+        print(f"⚠️  LLM_RATE_LIMITS 파싱 실패, 기본 한도 사용: {e}")
+        return {}
+
+
+_SCHEDULER: Optional[RateLimitScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """프로세스 공유 스케줄러"""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            try:
+                share = float(os.getenv("LLM_RATE_SHARE", "1"))
+            except ValueError:
+                share = 1.0
+            _SCHEDULER = RateLimitScheduler(_load_env_limits(), share=share)
+        return _SCHEDULER
+
+
+class SchedulerRateLimiter(BaseRateLimiter):
+    """LangChain 채팅 모델용 rate_limiter 어댑터 (모델 1개에 바인딩)"""
+
+    def __init__(self, model: str, scheduler: Optional[RateLimitScheduler] = None):
+        self.model = model
+        self.scheduler = scheduler or get_scheduler()
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        self.scheduler.acquire(self.model)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        # 스레드에서 확보하고 확보량은 호출한 코루틴 컨텍스트에 기록 (to_thread 는 컨텍스트 복사본에서 실행)
+        _, reserved = await asyncio.to_thread(self.scheduler.reserve, self.model, None, current_priority())
+        _RESERVED.set((self.model, reserved))
+        return True
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """응답의 실제 토큰 사용량을 스케줄러에 반영"""
+
+    def __init__(self, model: str, scheduler: Optional[RateLimitScheduler] = None):
+        self.model = model
+        self.scheduler = scheduler or get_scheduler()
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        try:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            total = usage.get("total_tokens")
+            if total:
+                # acquire 가 실제로 차감한 양 기준으로 보정 (없으면 현재 이동 평균)
+                estimated = reserved_tokens(self.model)
+                if estimated is None:
+                    estimated = self.scheduler.estimate_tokens(self.model)
+                self.scheduler.record_usage(self.model, estimated, float(total))
+        except Exception:
+            pass
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Retry-After / retry-after-ms / x-ratelimit-reset-* 헤더에서 대기 시간(초) 추출"""
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return float(ms) / 1000.0
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+            value = headers.get(name)
+            if value:
+                # 예: "1s", "6m0s", "250ms"
+                total = 0.0
+                for num, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value):
+                    total += float(num) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+                if total:
+                    return total
+    except Exception:
+        return None
+    return None
+
+
+def _model_from_request(request) -> Optional[str]:
+    try:
+        body = json.loads(request.content or b"{}")
+        return body.get("model")
+    except Exception:
+        return None
+
+
+def _embedding_tokens(body: Dict) -> float:
+    """임베딩 요청 입력의 토큰 수 (토큰 ID 배열은 길이, 문자열은 4자당 1토큰으로 추정)"""
+    inputs = body.get("input") or []
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    return float(sum(len(x) if isinstance(x, list) else len(str(x)) // 4 + 1 for x in inputs))
+
+
+def _embedding_request(request) -> Optional[Tuple[str, float]]:
+    if not request.url.path.endswith("/embeddings"):
+        return None
+    try:
+        body = json.loads(request.content or b"{}")
+    except Exception:
+        return None
+    model = body.get("model")
+    return (model, _embedding_tokens(body)) if model else None
+
+
+def on_http_request(request) -> None:
+    """
+    httpx 요청 훅: 임베딩 요청은 전송 전에 스케줄러에서 요청 1건 + 입력 토큰 확보
+    (OpenAIEmbeddings 에는 rate_limiter 인자가 없음. 채팅 모델은 SchedulerRateLimiter 가 확보하므로 제외)
+    """
+    target = _embedding_request(request)
+    if target is not None:
+        get_scheduler().acquire(*target)
+
+
+async def on_http_request_async(request) -> None:
+    target = _embedding_request(request)
+    if target is not None:
+        await asyncio.to_thread(get_scheduler().reserve, *target)
+
+
+def on_http_response(response) -> None:
+    """httpx 응답 훅: 429면 스케줄러에 페널티, 성공이면 복구"""
+    model = _model_from_request(response.request)
+    if not model:
+        return
+    if response.status_code == 429:
+        get_scheduler().penalize(model, parse_retry_after(response.headers))
+    elif response.status_code < 400:
+        get_scheduler().record_success(model)
+
+
+async def on_http_response_async(response) -> None:
+    on_http_response(response)
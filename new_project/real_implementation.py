@@ -4,22 +4,42 @@
 TestCase.xlsx 데이터를 사용하여 실제 GPT-4o로 질의하고 평가하는 시스템
 """
 
-import pandas as pd
 import json
+import threading
 import time
-from typing import Dict, List, Optional
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import re
 from pathlib import Path
-from datetime import datetime
 
 from langsmith import Client as LangSmithClient
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 import os
 from langchain.callbacks.tracers.run_collector import RunCollectorCallbackHandler
 
+from batch_files import BatchWorkspace, chat_request, fetch as fetch_batch, fulfill_locally, json_schema_format, submit as submit_batch
+from bulk_writer import BulkExampleWriter, PendingExample, stable_example_id
+from eval_engine import Stage, StagedPipeline, resolve_workers
+from llm_clients import ROLE_DEFAULTS, get_chat_model, model_name
+from rate_limiter import get_scheduler
+from response_cache import discard_cache_entries, get_response_cache, track_cache_entries
+from resilience import call_with_resilience, deadline, is_conflict, llm_endpoint, report as resilience_report, wrap_langsmith_client
+from history_store import HISTORY_KEEP_ANSWERS, build_record, build_timeline, compact_history, group_by_case, has_examples, is_timeline
+from batch_judge import BATCH_JUDGE_STATS, build_batch_prompt, format_items, pack_batches, rubric_from_prompt, validate_items
+from conversation_memory import estimate_tokens
+from judge_consistency import CONSISTENCY_STATS, ConsistencyPolicy, aggregate, generations_of, usage_of_generate
+from judge_cascade import CASCADE_STATS, CascadePolicy, call_cost, hash_sample, usage_of
+from prescore import PRESCORE_STATS, PreScorePolicy
+from ragas_metrics import RAGAS_STATS, RESULT_KEYS as RAGAS_RESULT_KEYS, get_ragas_scorer, ragas_enabled, ragas_model
+from results_store import ResultsMirror, get_results_store, results_store_enabled
+from incremental import FingerprintIndex, case_fingerprint, judge_prompt_fingerprint, reused_result
+from run_journal import RunJournal, new_run_id as new_journal_id, result_example_id, runs_dir
+from sharding import launch_local, pending_results, resolve_group, shard_journals, shard_of, shard_run_id
+from testcase_loader import LoadStats, iter_testcases, supported_suffixes
+from trace_links import TraceLinker, base_web_url, new_run_id
+from structured_output import BatchJudgeVerdicts, CascadeVerdict, JudgeVerdict, PARSE_STATS, StructuredOutputError, parse_with_schema, resolve_structured, structured_llm
+
 # 환경변수 로드
 load_dotenv()
 
@@ -28,19 +48,14 @@ class RealAgentQASystem:
     
     def __init__(self):
         """시스템 초기화"""
-        self.langsmith_client = LangSmithClient()
+        # 모든 LangSmith 호출에 재시도/서킷 브레이커 적용
+        self.langsmith_client = wrap_langsmith_client(LangSmithClient())
         
-        # GPT-4o 모델 초기화 (실제 질의용)
-        self.gpt_model = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.7  # 답변 다양성을 위해 약간의 temperature 설정
-        )
+        # 답변 생성 모델 (answer 역할: 답변 다양성을 위해 temperature 0.7)
+        self.gpt_model = get_chat_model("answer")
         
-        # GPT-4o Judge 모델 초기화 (평가용)
-        self.judge_model = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0  # 평가의 일관성을 위해 temperature 0
-        )
+        # Judge 모델 (judge 역할: 평가의 일관성을 위해 temperature 0)
+        self.judge_model = get_chat_model("judge")
         
         # Judge 프롬프트 설정 - LangSmith에서 가져오기
         try:
@@ -69,7 +84,32 @@ class RealAgentQASystem:
                 ("human", "질문: {question}\n답변: {answer}\n\n위 답변을 평가해주세요.")
             ])
         
-        self.judge_chain = self.accuracy_judge_prompt | self.judge_model | StrOutputParser()
+        # JSON Schema 강제 Judge (원문을 함께 받아 스키마 실패 시 관대한 추출로 폴백)
+        self.judge_chain = self.accuracy_judge_prompt | structured_llm(self.judge_model, JudgeVerdict)
+        
+        # 평가 모드 (single: judge 단독 | cascade: judge_mini 먼저, 애매한 케이스만 judge로 승급 | batch: 다건 Judge
+        #           | consistency: 한 호출에서 n개 표본, 표본이 엇갈릴 때만 추가 표본)
+        self.judge_mode = os.getenv("JUDGE_MODE", "single").lower()
+        self.cascade_policy = CascadePolicy.from_env()
+        self.judge_mini_model = get_chat_model("judge_mini")
+        self.cascade_chain = self.accuracy_judge_prompt | structured_llm(self.judge_mini_model, CascadeVerdict)
+        # 다건 Judge (batch: 평가 기준 1회 + 여러 항목을 한 요청으로)
+        self.batch_judge_prompt = build_batch_prompt(self.accuracy_judge_prompt)
+        self.batch_judge_chain = self.batch_judge_prompt | structured_llm(self.judge_model, BatchJudgeVerdicts)
+        self.batch_rubric_tokens = estimate_tokens(rubric_from_prompt(self.accuracy_judge_prompt))
+        # 자기 일관성 Judge (consistency: 표본 다양성을 위해 temperature > 0, 응답 캐시 미적용)
+        # JUDGE_SC_TEMPERATURE=0 이어도 캐시된 같은 응답이 표본으로 반복되지 않도록 cache=False
+        self.consistency_policy = ConsistencyPolicy.from_env()
+        self.consistency_model = get_chat_model("judge", temperature=self.consistency_policy.temperature, cache=False)
+        # 기대 답변 기반 사전 채점 (거의 일치/답변 거부는 Judge 호출 없이 자동 채점)
+        self.prescore_enabled = os.getenv("PRESCORE", "").lower() in ("1", "true", "yes")
+        self.prescore_policy = PreScorePolicy.from_env()
+        # ragas RAG 품질 지표 (faithfulness / answer_relevancy / context_precision)
+        self.ragas_enabled = ragas_enabled()
+        # 로컬 결과 저장소 (RESULTS_STORE=local 기본: SQLite에 먼저 저장하고 LangSmith는 백그라운드 미러)
+        self.results_store = get_results_store() if results_store_enabled() else None
+        # persist 단계 워커 여러 개가 동시에 writer/미러를 처음 만들 수 있으므로 생성은 잠금 안에서
+        self._persist_lock = threading.Lock()
         
         # OpenEvals 관련은 현재 비활성화 (메뉴에서 제거됨)
         
@@ -77,12 +117,15 @@ class RealAgentQASystem:
         self.source_dataset = "Agent_QA_Scenario"
         self.result_dataset = "Agent_QA_Scenario_Judge_Result"
         self.history_dataset = "Agent_QA_Scenario_Judge_History"
-        self.base_web_url = self._get_base_web_url()
+        self.base_web_url = base_web_url()
         # LangSmith tracing 기본값 보장
         if not os.getenv("LANGSMITH_PROJECT"):
             os.environ["LANGSMITH_PROJECT"] = "llm-practice"
         if not os.getenv("LANGSMITH_TRACING"):
             os.environ["LANGSMITH_TRACING"] = "true"
+        # 트레이스 URL은 루트 run_id + 프로젝트/테넌트 정보로 로컬 생성 (정보는 백그라운드로 1회 조회)
+        self.trace_links = TraceLinker(self.langsmith_client, os.environ["LANGSMITH_PROJECT"])
+        self.trace_links.warm()
         
         # 데이터셋 초기화
         self._ensure_datasets()
@@ -132,55 +175,6 @@ class RealAgentQASystem:
             except Exception as e:
                 print(f"❌ 데이터셋 '{dataset_name}' 설정 오류: {e}")
 
-    def _resolve_run_url_from_handler(self, handler) -> Optional[str]:
-        """RunCollector에서 수집한 run들로부터 접근 가능한 추적 URL을 계산합니다.
-        - 우선 name == 'RunnableSequence'를 선택
-        - run.parent_run_id를 따라 루트 run까지 올라간 후 run.url 사용
-        - run.url이 없으면 projects 경로로 폴백
-        """
-        try:
-            selected = None
-            # 우선 RunnableSequence 우선 탐색
-            for r in reversed(getattr(handler, "traced_runs", []) or []):
-                if getattr(r, "name", "") == "RunnableSequence":
-                    selected = r
-                    break
-            # 대안: 마지막 run 사용
-            if selected is None and getattr(handler, "traced_runs", None):
-                selected = handler.traced_runs[-1]
-            if not selected:
-                return None
-            run_id = getattr(selected, "id", None)
-            if not run_id:
-                return None
-            # 루트 run까지 상승
-            # run이 저장되기까지 약간의 지연이 발생할 수 있으므로 재시도
-            run = None
-            for _ in range(10):
-                try:
-                    run = self.langsmith_client.read_run(run_id)
-                    if run:
-                        break
-                except Exception:
-                    pass
-                time.sleep(0.3)
-            if not run:
-                return None
-            # 루트 run까지 상승
-            while getattr(run, "parent_run_id", None):
-                run = self.langsmith_client.read_run(run.parent_run_id)
-            # url 확보 재시도 (비동기 반영 대비)
-            for _ in range(10):
-                url = getattr(run, "url", None)
-                if url:
-                    return url
-                time.sleep(0.3)
-            # url이 비어있다면 프로젝트 기반 폴백
-            project = os.getenv("LANGSMITH_PROJECT", "llm-practice")
-            return f"{self.base_web_url}/projects/{project}/runs/{run.id}"
-        except Exception:
-            return None
-    
     @staticmethod
     def _sort_testcases_by_case_id(testcases: List[Dict]) -> List[Dict]:
         """case_id에 포함된 숫자 기준 오름차순으로 정렬"""
@@ -192,23 +186,24 @@ class RealAgentQASystem:
                 return 10**9
         return sorted(testcases, key=key)
 
-    def _count_history_examples(self) -> int:
+    def _history_is_empty(self) -> bool:
         try:
-            return len(list(self.langsmith_client.list_examples(dataset_name=self.history_dataset)))
+            return not has_examples(self.langsmith_client, self.history_dataset)
         except Exception:
-            return 0
+            return False
     
     def check_history_status(self):
         """히스토리 데이터셋 상태 확인"""
         try:
             examples = list(self.langsmith_client.list_examples(dataset_name=self.history_dataset))
-            print(f"\n📈 히스토리 데이터셋 상태: {len(examples)}개 케이스")
+            groups = group_by_case(examples)
+            records = sum(1 for ex in examples if not is_timeline(ex.metadata))
+            print(f"\n📈 히스토리 데이터셋 상태: {len(groups)}개 케이스 (미압축 실행 레코드 {records}건)")
             
-            for ex in examples:
+            for case_id, case_examples in sorted(groups.items()):
                 try:
-                    case_id = ex.metadata.get("case_id") if ex.metadata else "Unknown"
-                    scores = ex.outputs.get("scores", []) if ex.outputs else []
-                    print(f"  - {case_id}: {len(scores)}회 실행")
+                    entries = build_timeline(case_examples)["entries"]
+                    print(f"  - {case_id}: {len(entries)}회 실행")
                 except Exception:
                     pass
                 
@@ -235,6 +230,8 @@ class RealAgentQASystem:
                     "answer": outputs.get("answer", ""),
                     "judge_accuracy_score": outputs.get("judge_accuracy_score", 0),
                     "reasoning": outputs.get("judge_reasoning", ""),
+                    # 결과 예제 ID 기반 키: 백필을 반복해도 같은 결과가 중복 누적되지 않음
+                    "execution_id": f"backfill/{ex.id}",
                 }
                 if self.save_result_to_history(result):
                     applied += 1
@@ -247,99 +244,26 @@ class RealAgentQASystem:
 
     def load_testcases_from_excel(self, excel_path: str) -> List[Dict]:
         """
-        TestCase.xlsx에서 테스트케이스 로드
+        테스트케이스 파일(xlsx/xls/csv/tsv/jsonl/parquet) 전체 로드 (목록이 필요한 호출용, 업로드는 iter_testcases_from_file 사용)
         
         Args:
-            excel_path: Excel 파일 경로
+            excel_path: 테스트케이스 파일 경로
             
         Returns:
-            테스트케이스 리스트 [{"case_id": str, "question": str}, ...]
+            테스트케이스 리스트 [{"case_id": str, "question": str, "expected_answer": str (있을 때만)}, ...]
         """
+        stats = LoadStats()
         try:
-            # 여러 시트를 모두 읽어 병합
-            all_sheets = pd.read_excel(excel_path, sheet_name=None)
-            if isinstance(all_sheets, dict):
-                frames = []
-                for sheet_name, sdf in all_sheets.items():
-                    if sdf is None or len(sdf) == 0:
-                        continue
-                    sdf["__sheet__"] = str(sheet_name)
-                    frames.append(sdf)
-                if not frames:
-                    print("⚠️  모든 시트가 비어 있습니다.")
-                    return []
-                df = pd.concat(frames, ignore_index=True)
-                print(f"📊 Excel 파일 로드 완료: {len(df)}개 행 | 시트 수: {len(all_sheets)}")
-            else:
-                df = all_sheets
-                print(f"📊 Excel 파일 로드 완료: {len(df)}개 행 | 시트 수: 1")
-            print(f"컬럼: {list(df.columns)}")
-            
-            # 컬럼명 정규화 (대소문자, 공백 처리)
-            df.columns = df.columns.str.strip().str.lower()
-            
-            # 필요한 컬럼 확인
-            required_columns = ['case_id', 'question', 'input']
-            available_columns = df.columns.tolist()
-            
-            # 컬럼 매핑 확인 (정확매칭 우선, 없으면 유사 매칭)
-            case_id_col = 'case_id' if 'case_id' in available_columns else None
-            question_col = 'question' if 'question' in available_columns else None
-            if question_col is None:
-                for cand in ['input', 'query']:
-                    if cand in available_columns:
-                        question_col = cand
-                        break
-            if case_id_col is None:
-                for col in available_columns:
-                    if 'case' in col or 'id' in col:
-                        case_id_col = col
-                        break
-            if question_col is None:
-                for col in available_columns:
-                    if 'question' in col or 'input' in col or 'query' in col:
-                        question_col = col
-                        break
-            
-            print(f"🔍 감지된 컬럼 - case_id: {case_id_col}, question: {question_col}")
-            
-            if not case_id_col or not question_col:
-                print(f"⚠️  필요한 컬럼을 찾을 수 없습니다. 사용 가능한 컬럼: {available_columns}")
-                # 첫 번째와 두 번째 컬럼을 기본으로 사용
-                case_id_col = available_columns[0]
-                question_col = available_columns[1] if len(available_columns) > 1 else available_columns[0]
-                print(f"💡 기본 컬럼 사용 - case_id: {case_id_col}, question: {question_col}")
-            
-            # 완전 공백 행 제거
-            df = df.dropna(how='all')
-
-            testcases = []
-            missing_case_id = 0
-            missing_question = 0
-            for _, row in df.iterrows():
-                case_id = str(row.get(case_id_col, '')).strip()
-                question = str(row.get(question_col, '')).strip()
-                
-                if not case_id or case_id.lower() == 'nan' or case_id == 'None':
-                    missing_case_id += 1
-                    continue
-                if not question or question.lower() == 'nan' or question == 'None':
-                    missing_question += 1
-                    continue
-                testcases.append({
-                    "case_id": case_id,
-                    "question": question
-                })
-            
-            print(f"✅ 유효한 테스트케이스 {len(testcases)}개 로드 완료")
-            dropped = missing_case_id + missing_question
-            if dropped > 0:
-                print(f"ℹ️  제외된 행 수: {dropped} (case_id 없음: {missing_case_id}, question 없음: {missing_question})")
-            return testcases
-            
+            testcases = list(iter_testcases(excel_path, stats))
         except Exception as e:
-            print(f"❌ Excel 파일 로드 실패: {e}")
+            print(f"❌ 테스트케이스 파일 로드 실패: {e}")
             return []
+        print(stats.report())
+        return testcases
+
+    def iter_testcases_from_file(self, path: str, stats: Optional[LoadStats] = None) -> Iterator[Dict]:
+        """테스트케이스 파일을 스트리밍으로 읽어 검증된 테스트케이스를 하나씩 yield (testcase_loader.py)"""
+        return iter_testcases(path, stats)
     
     def get_existing_case_ids(self) -> set:
         """
@@ -363,12 +287,14 @@ class RealAgentQASystem:
             print(f"⚠️  기존 케이스 조회 실패 (새 데이터셋일 수 있음): {e}")
             return set()
     
-    def save_testcases_to_langsmith(self, testcases: List[Dict]) -> bool:
+    def save_testcases_to_langsmith(self, testcases: Iterable[Dict], source: str = "TestCase.xlsx") -> bool:
         """
         테스트케이스를 LangSmith Agent_QA_Scenario 데이터셋에 저장 (중복 방지)
+        목록 대신 제너레이터(iter_testcases_from_file)를 받으면 파일을 읽는 대로 일괄 저장기에 넘겨 메모리 사용량이 일정
         
         Args:
-            testcases: 테스트케이스 리스트
+            testcases: 테스트케이스 목록 또는 반복자
+            source: 예제 메타데이터 source (업로드 파일 이름)
             
         Returns:
             성공 여부
@@ -377,30 +303,48 @@ class RealAgentQASystem:
             # 기존 케이스 ID 조회
             existing_case_ids = self.get_existing_case_ids()
             
-            # 새로운 케이스만 필터링
-            new_testcases = [tc for tc in testcases if tc["case_id"] not in existing_case_ids]
-            
-            if not new_testcases:
-                print(f"✅ 모든 테스트케이스가 이미 데이터셋에 존재합니다. (총 {len(testcases)}개)")
+            print(f"\n📝 새로운 테스트케이스를 LangSmith에 저장 중...")
+            # create_examples 일괄 저장 (case_id 기반 고정 ID: 재업로드/재시도 시 중복 생성 없음)
+            counts = {"total": 0, "new": 0, "done": 0, "duplicate": 0}
+
+            def on_saved(items: List[Dict]) -> None:
+                counts["done"] += len(items)
+                print(f"  [{counts['done']}/{counts['new']}] {items[-1]['case_id']} 까지 저장")
+
+            seen = set()
+            with BulkExampleWriter(self.langsmith_client, self.source_dataset, on_saved=on_saved) as writer:
+                for tc in testcases:
+                    counts["total"] += 1
+                    # 기존 케이스와 같은 파일 안의 중복 case_id는 건너뜀 (먼저 나온 행 우선)
+                    if tc["case_id"] in existing_case_ids or tc["case_id"] in seen:
+                        counts["duplicate"] += tc["case_id"] in seen
+                        continue
+                    seen.add(tc["case_id"])
+                    counts["new"] += 1
+                    writer.add(
+                        inputs={"question": tc["question"]},
+                        outputs={"expected_answer": tc["expected_answer"]} if tc.get("expected_answer") else None,
+                        metadata={
+                            "case_id": tc["case_id"],
+                            "source": source
+                        },
+                        example_id=stable_example_id(self.source_dataset, tc["case_id"]),
+                        item=tc,
+                    )
+            if not counts["total"]:
+                print("⚠️  저장할 테스트케이스가 없습니다.")
+                return False
+            existing = counts["total"] - counts["new"] - counts["duplicate"]
+            print(f"   (전체 {counts['total']}개 중 {existing}개는 이미 존재"
+                  + (f", 파일 내 중복 case_id {counts['duplicate']}개 제외" if counts["duplicate"] else "") + ")")
+            if writer.failed:
+                print(f"❌ {len(writer.failed)}개 테스트케이스 저장 실패 (성공 {writer.saved_count}개)")
+                return False
+            if not counts["new"]:
+                print(f"✅ 모든 테스트케이스가 이미 데이터셋에 존재합니다. (총 {counts['total']}개)")
                 return True
             
-            print(f"\n📝 {len(new_testcases)}개 새로운 테스트케이스를 LangSmith에 저장 중...")
-            print(f"   (전체 {len(testcases)}개 중 {len(testcases) - len(new_testcases)}개는 이미 존재)")
-            
-            for i, tc in enumerate(new_testcases, 1):
-                self.langsmith_client.create_example(
-                    dataset_name=self.source_dataset,
-                    inputs={"question": tc["question"]},
-                    outputs=None,
-                    metadata={
-                        "case_id": tc["case_id"],
-                        "source": "TestCase.xlsx"
-                    }
-                )
-                print(f"  [{i}/{len(new_testcases)}] {tc['case_id']}: {tc['question'][:50]}...")
-                time.sleep(0.1)  # API 부하 방지
-            
-            print(f"✅ {len(new_testcases)}개 새로운 테스트케이스가 '{self.source_dataset}' 데이터셋에 저장 완료")
+            print(f"✅ {counts['new']}개 새로운 테스트케이스가 '{self.source_dataset}' 데이터셋에 저장 완료")
             return True
             
         except Exception as e:
@@ -421,12 +365,14 @@ class RealAgentQASystem:
             for example in examples:
                 case_id = example.metadata.get("case_id") if example.metadata else str(example.id)
                 question = example.inputs.get("question", "")
+                expected = (example.outputs or {}).get("expected_answer")
                 
                 if question:
                     testcases.append({
                         "case_id": case_id,
                         "question": question,
-                        "example_id": str(example.id)
+                        "example_id": str(example.id),
+                        **({"expected_answer": expected} if expected else {})
                     })
             
             print(f"📋 LangSmith에서 {len(testcases)}개 테스트케이스 조회 완료")
@@ -439,22 +385,28 @@ class RealAgentQASystem:
             print(f"❌ 테스트케이스 조회 실패: {e}")
             return []
     
-    def generate_answer_with_gpt4o(self, question: str) -> str:
+    def generate_answer_with_gpt4o(self, question: str, raise_on_error: bool = False) -> str:
         """
         GPT-4o를 사용하여 질문에 답변 생성
         
         Args:
             question: 질문
+            raise_on_error: True면 실패 안내 문구 대신 예외를 그대로 전파 (파이프라인이 오류 케이스로 기록)
             
         Returns:
             GPT-4o 답변
         """
         try:
             handler = RunCollectorCallbackHandler()
-            response = self.gpt_model.invoke(question, config={"callbacks": [handler]})
+            response = call_with_resilience(
+                llm_endpoint(self.gpt_model),
+                self.gpt_model.invoke, question, config={"callbacks": [handler]}
+            )
             answer = response.content.strip()
             return answer
         except Exception as e:
+            if raise_on_error:
+                raise
             print(f"❌ GPT-4o 답변 생성 실패: {e}")
             return "답변 생성에 실패했습니다."
     
@@ -467,41 +419,156 @@ class RealAgentQASystem:
             answer: 답변
             
         Returns:
-            {"score": int, "reasoning": str}
+            {"score": int, "reasoning": str, "trace_url": str | None, "parse_failed": bool}
+        """
+        return self._invoke_judge(self.judge_chain, self.judge_model, JudgeVerdict, "judge", question, answer)
+
+    def _invoke_judge(self, chain, llm, schema, name: str, question: str, answer: str) -> Dict:
+        """
+        Judge 체인 1회 호출
+
+        Returns:
+            {"score", "reasoning", "trace_url", "parse_failed", "error", "confidence", "usage", "seconds"}
         """
+        started = time.monotonic()
+        root = {"run_id": None}
         try:
-            handler = RunCollectorCallbackHandler()
-            judge_result = self.judge_chain.invoke({
-                "question": question,
-                "answer": answer
-            }, config={"callbacks": [handler]})
+            # 루트 run_id를 미리 정해 트레이스 URL을 로컬에서 조립 (재시도마다 새 ID)
+            def invoke():
+                root["run_id"] = new_run_id()
+                return chain.invoke({"question": question, "answer": answer},
+                                    config={"run_id": root["run_id"]})
+
+            with track_cache_entries() as cache_keys:
+                judge_result = call_with_resilience(llm_endpoint(llm), invoke)
+            usage = usage_of(judge_result)
             
-            # JSON 파싱
-            judge_data = json.loads(judge_result)
-            score = int(judge_data.get("score", 0))  # 정수로 변환
-            reasoning = judge_data.get("reasoning", "평가 실패")
+            # 구조화 출력 확정 (스키마 → 관대한 추출 폴백)
+            try:
+                verdict = resolve_structured(judge_result, schema, name=name)
+            except StructuredOutputError as e:
+                # 파싱 실패 응답은 캐시에서 제거해 --rerun-failed 시 새로 채점
+                discard_cache_entries(cache_keys)
+                print(f"❌ Judge 출력 파싱 실패: {e}")
+                return {"score": 0, "reasoning": f"Judge 출력 파싱 실패: {e}", "parse_failed": True,
+                        "usage": usage, "seconds": time.monotonic() - started}
+            score = int(round(verdict.score))  # 정수로 변환
+            reasoning = verdict.reasoning or "평가 실패"
             
             # 점수 범위 검증
             if not (0 <= score <= 5):
                 print(f"⚠️  점수 범위 오류 ({score}), 0으로 설정")
                 score = 0
             
-            # Judge RunnableSequence 트레이스 URL 추출 (루트 run 기준)
-            trace_url = self._resolve_run_url_from_handler(handler)
-            if not trace_url:
-                # 마지막 수단: handler 내 run_id를 로그로 남기고 저장은 생략
-                if getattr(handler, "traced_runs", None):
-                    try:
-                        rid = getattr(handler.traced_runs[-1], "id", None)
-                        if rid:
-                            print(f"(debug) judge run_id: {rid}")
-                    except Exception:
-                        pass
-            return {"score": score, "reasoning": reasoning, "trace_url": trace_url}
+            # Judge RunnableSequence 트레이스 URL (루트 run 기준, LangSmith 조회 없음)
+            trace_url = self.trace_links.url(root["run_id"])
+            return {"score": score, "reasoning": reasoning, "trace_url": trace_url, "parse_failed": False,
+                    "confidence": getattr(verdict, "confidence", None), "usage": usage,
+                    "seconds": time.monotonic() - started}
             
         except Exception as e:
             print(f"❌ Judge 평가 실패: {e}")
-            return {"score": 0, "reasoning": f"평가 중 오류 발생: {str(e)}"}
+            return {"score": 0, "reasoning": f"평가 중 오류 발생: {str(e)}", "parse_failed": False,
+                    "error": True, "seconds": time.monotonic() - started}
+
+    def judge_answer_consistency(self, question: str, answer: str) -> Dict:
+        """
+        자기 일관성 Judge: 한 호출에서 n개 완성을 받아 중앙값으로 확정, 표본이 엇갈리면 추가 표본 요청
+
+        Returns:
+            judge_answer_with_gpt4o 결과 + {"judge_samples", "judge_score_median", "judge_score_variance", "judge_scores"}
+        """
+        started = time.monotonic()
+        messages = self.accuracy_judge_prompt.format_messages(question=question, answer=answer)
+        response_format = json_schema_format(JudgeVerdict)
+        llm = self.consistency_model
+        verdicts: List[JudgeVerdict] = []
+        usage: Dict[str, int] = {"input_tokens": 0, "output_tokens": 0}
+        trace_url, calls, parse_failures = None, 0, 0
+
+        def sample(n: int) -> None:
+            nonlocal trace_url, calls, parse_failures
+            root = {"run_id": None}
+
+            def invoke():
+                root["run_id"] = new_run_id()
+                return llm.generate([messages], n=n, response_format=response_format, run_id=root["run_id"])
+
+            llm_result = call_with_resilience(llm_endpoint(llm), invoke)
+            calls += 1
+            for key, tokens in (usage_of_generate(llm_result) or {}).items():
+                usage[key] += tokens
+            trace_url = trace_url or self.trace_links.url(root["run_id"])
+            for text in generations_of(llm_result):
+                try:
+                    parsed = json.loads(text)
+                except ValueError:
+                    parsed = None
+                try:
+                    # strict JSON Schema 응답은 그대로 검증, 아니면 관대한 추출로 폴백
+                    verdict = resolve_structured({"raw": text, "parsed": parsed}, JudgeVerdict, name="judge_sc")
+                except StructuredOutputError:
+                    parse_failures += 1
+                    continue
+                if 0 <= verdict.score <= 5:
+                    verdicts.append(verdict)
+
+        error = None
+        try:
+            policy = self.consistency_policy
+            sample(policy.initial_n)
+            extra = policy.extra_samples([int(round(v.score)) for v in verdicts])
+            if extra:
+                sample(extra)
+        except Exception as e:
+            error = e
+        # 실패/파싱 실패한 호출도 과금되므로 결과와 무관하게 사용량/비용 기록
+        CONSISTENCY_STATS.record_usage(usage, call_cost(model_name("judge"), usage))
+        if error is not None:
+            if not verdicts:
+                print(f"❌ Judge 평가 실패: {error}")
+                return {"score": 0, "reasoning": f"평가 중 오류 발생: {str(error)}", "parse_failed": False,
+                        "error": True, "usage": usage, "seconds": time.monotonic() - started}
+            print(f"⚠️  추가 표본 요청 실패, 첫 표본으로 확정: {error}")
+        if not verdicts:
+            return {"score": 0, "reasoning": f"Judge 출력 파싱 실패: 유효한 표본 없음 ({parse_failures}개 실패)",
+                    "parse_failed": True, "trace_url": trace_url, "usage": usage, "seconds": time.monotonic() - started}
+        scores = [int(round(v.score)) for v in verdicts]
+        agg = aggregate(scores)
+        CONSISTENCY_STATS.record(calls, len(scores), calls > 1, agg["variance"], agg["spread"])
+        # 근거는 확정 점수와 같은 표본(없으면 중앙값에 가장 가까운 표본)의 것
+        chosen = min(verdicts, key=lambda v: abs(int(round(v.score)) - agg["score"]))
+        return {"score": agg["score"], "reasoning": chosen.reasoning or "평가 실패", "trace_url": trace_url,
+                "parse_failed": False, "usage": usage, "seconds": time.monotonic() - started,
+                "judge_samples": agg["n"], "judge_score_median": agg["median"],
+                "judge_score_variance": agg["variance"], "judge_scores": scores}
+
+    def judge_answer_cascade(self, case_id: str, question: str, answer: str) -> Dict:
+        """
+        캐스케이드 Judge: judge_mini가 점수+확신도를 먼저 내고, 중간 점수/낮은 확신도/보정 표본/실패면 judge로 승급
+
+        Returns:
+            judge_answer_with_gpt4o 결과 + {"judge_model", "judge_tier", "escalation_reason", "cheap_score", "cheap_confidence"}
+        """
+        cheap = self._invoke_judge(self.cascade_chain, self.judge_mini_model, CascadeVerdict, "judge_mini",
+                                   question, answer)
+        cheap_ok = not cheap.get("parse_failed") and not cheap.get("error")
+        cheap_score = cheap["score"] if cheap_ok else None
+        cheap_call = {"score": cheap_score, "seconds": cheap["seconds"],
+                      "cost": call_cost(model_name("judge_mini"), cheap.get("usage"))}
+        reason = self.cascade_policy.escalation_reason(case_id, cheap_score, cheap.get("confidence"))
+        cascade = {"cheap_score": cheap_score, "cheap_confidence": cheap.get("confidence"), "escalation_reason": reason}
+        if reason is None:
+            CASCADE_STATS.record(None, cheap_call)
+            return {**cheap, **cascade, "judge_model": model_name("judge_mini"), "judge_tier": "mini"}
+
+        strong = self.judge_answer_with_gpt4o(question, answer)
+        strong_ok = not strong.get("parse_failed") and not strong.get("error")
+        CASCADE_STATS.record(reason, cheap_call, {
+            "score": strong["score"] if strong_ok else None, "seconds": strong["seconds"],
+            "cost": call_cost(model_name("judge"), strong.get("usage")),
+        })
+        return {**strong, **cascade, "judge_model": model_name("judge"), "judge_tier": "strong"}
     
     
     def save_results_to_langsmith(self, results: List[Dict]) -> bool:
@@ -517,30 +584,20 @@ class RealAgentQASystem:
         try:
             print(f"\n💾 {len(results)}개 평가 결과를 LangSmith에 저장 중...")
             
-            for i, result in enumerate(results, 1):
-                # LangSmith 데이터 구조: input을 단일 키로 설정하여 question 내용이 주요 표시되도록 함
-                self.langsmith_client.create_example(
-                    dataset_name=self.result_dataset,
-                    inputs={
-                        "input": result["question"]  # "input"이라는 단일 키 사용
-                    },
-                    outputs={
-                        "answer": result["answer"],
-                        "judge_accuracy_score": result["judge_accuracy_score"],
-                        "judge_reasoning": result.get("reasoning", ""),
-                        **({"trace_url": result.get("trace_url")} if result.get("trace_url") else {})
-                    },
-                    metadata={
-                        "case_id": result["case_id"],
-                        "question": result["question"],
-                        "judge_accuracy_score": result["judge_accuracy_score"],
-                        "model_used": "gpt-4o",
-                        "judge_model": "gpt-4o",
-                        "evaluation_type": "judge_accuracy"
-                    }
-                )
-                print(f"  [{i}/{len(results)}] {result['case_id']}: {result['judge_accuracy_score']}/5점")
-                time.sleep(0.1)  # API 부하 방지
+            with BulkExampleWriter(self.langsmith_client, self.result_dataset) as writer:
+                for result in results:
+                    # LangSmith 데이터 구조: input을 단일 키로 설정하여 question 내용이 주요 표시되도록 함
+                    writer.add(example_id=result_example_id(result.get("execution_id")), item=result,
+                               **self._result_example_payload(result))
+            for result in results:
+                print(f"  - {result['case_id']}: {result['judge_accuracy_score']}/5점")
+            if self.results_store is not None:
+                # 이미 LangSmith에 저장된 결과이므로 로컬에는 미러 완료로 기록 (웹 UI 조회용)
+                failed = {id(item) for item, _ in writer.failed}
+                self.results_store.add([r for r in results if id(r) not in failed], mirrored=True)
+            if writer.failed:
+                print(f"❌ {len(writer.failed)}개 평가 결과 저장 실패 (성공 {writer.saved_count}개)")
+                return False
             
             print(f"✅ 모든 평가 결과가 '{self.result_dataset}' 데이터셋에 저장 완료")
             return True
@@ -549,106 +606,425 @@ class RealAgentQASystem:
             print(f"❌ 평가 결과 저장 실패: {e}")
             return False
 
-    def save_single_result_to_langsmith(self, result: Dict) -> bool:
+    @staticmethod
+    def _result_example_payload(result: Dict) -> Dict:
+        """결과 데이터셋 예제의 inputs/outputs/metadata 구성"""
+        return {
+            "inputs": {
+                "input": result["question"]
+            },
+            "outputs": {
+                "answer": result["answer"],
+                "judge_accuracy_score": result["judge_accuracy_score"],
+                **({"judge_score_variance": result["judge_score_variance"]}
+                   if result.get("judge_score_variance") is not None else {}),
+                "judge_reasoning": result.get("reasoning", ""),
+                **({"trace_url": result.get("trace_url")} if result.get("trace_url") else {})
+            },
+            "metadata": {
+                "case_id": result["case_id"],
+                "question": result["question"],
+                "judge_accuracy_score": result["judge_accuracy_score"],
+                "model_used": model_name("rag"),
+                "judge_model": result.get("judge_model") or model_name("judge"),
+                "evaluation_type": "judge_accuracy",
+                **{k: result[k] for k in ("judge_tier", "escalation_reason", "cheap_score", "cheap_confidence", "judge_batch",
+                                          "prescore_rule", "prescore_score", "prescore_similarity",
+                                          "judge_samples", "judge_score_median", "judge_score_variance", "judge_scores",
+                                          *RAGAS_RESULT_KEYS)
+                   if result.get(k) is not None},
+                **({"reused": True, "reused_from": result.get("reused_from")} if result.get("reused") else {}),
+                **({"judge_error": True} if result.get("error") else {})
+            },
+        }
+
+    def save_single_result_to_langsmith(self, result: Dict, log=print) -> bool:
         """
         단일 평가 결과를 LangSmith에 즉시 저장
         """
+        example_id = result_example_id(result.get("execution_id"))
         try:
-            created = self.langsmith_client.create_example(
+            self.langsmith_client.create_example(
                 dataset_name=self.result_dataset,
-                inputs={
-                    "input": result["question"]
-                },
-                outputs={
-                    "answer": result["answer"],
-                    "judge_accuracy_score": result["judge_accuracy_score"],
-                    "judge_reasoning": result.get("reasoning", ""),
-                    **({"trace_url": result.get("trace_url")} if result.get("trace_url") else {})
-                },
-                metadata={
-                    "case_id": result["case_id"],
-                    "question": result["question"],
-                    "judge_accuracy_score": result["judge_accuracy_score"],
-                    "model_used": "gpt-4o",
-                    "judge_model": "gpt-4o",
-                    "evaluation_type": "judge_accuracy"
-                }
+                **({"example_id": example_id} if example_id else {}),
+                **self._result_example_payload(result)
             )
             # 데이터셋 링크 출력 제거 (요청에 따라)
-            print(f"  - 저장 완료: {result['case_id']} ({result['judge_accuracy_score']}/5점)")
-            time.sleep(0.1)
+            log(f"  - 저장 완료: {result['case_id']} ({result['judge_accuracy_score']}/5점)")
             return True
         except Exception as e:
-            print(f"  - 저장 실패: {e}")
+            if example_id and is_conflict(e):
+                # 재개 실행: 이전 실행에서 이미 저장된 결과
+                log(f"  - 이미 저장됨: {result['case_id']}")
+                return True
+            log(f"  - 저장 실패: {e}")
             return False
 
-    def _get_base_web_url(self) -> str:
-        """LangSmith 웹 URL 기본값 계산 (API 엔드포인트를 웹 도메인으로 정규화)"""
-        import os
-        endpoint = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
-        # 웹 도메인으로 정규화
-        endpoint = endpoint.replace("https://api.", "https://").replace("/api", "")
-        if not endpoint.startswith("http"):
-            endpoint = "https://smith.langchain.com"
-        return endpoint.rstrip("/")
-
-    def save_result_to_history(self, result: Dict) -> bool:
+    def save_result_to_history(self, result: Dict, log=print) -> bool:
         """
-        동일 case_id 히스토리를 배열로 누적 저장하는 전용 데이터셋 관리 함수
-        outputs 필드에 scores/answers/reasons/timestamps 배열을 유지합니다.
+        히스토리 데이터셋에 실행 레코드 1건 추가 (append-only)
+        기존 예제를 읽어 배열을 다시 쓰지 않으므로 실행 횟수와 무관하게 쓰기 크기가 일정합니다.
+        케이스별 타임라인은 history_store.load_case_timeline 으로 조회 시 구성하고,
+        주기적으로 compact_history 로 타임라인 예제에 접습니다.
         """
+        record = build_record(result, model_used=model_name("rag"),
+                              judge_model=result.get("judge_model") or model_name("judge"),
+                              timestamp=result.get("timestamp"))
         try:
-            # case_id에 해당하는 기존 예제 탐색
-            examples = list(self.langsmith_client.list_examples(dataset_name=self.history_dataset))
-            target_example = None
-            for ex in examples:
-                if ex.metadata and ex.metadata.get("case_id") == result["case_id"]:
-                    target_example = ex
-                    break
-
-            now_iso = datetime.now().isoformat()
-
-            if target_example is None:
-                # 새 예제로 배열 초기화
-                created = self.langsmith_client.create_example(
-                    dataset_name=self.history_dataset,
-                    inputs={"input": result["question"]},
-                    outputs={
-                        "scores": [int(result["judge_accuracy_score"])],
-                        "answers": [result["answer"]],
-                        "reasons": [result.get("reasoning", "")],
-                        "timestamps": [now_iso],
-                        **({"trace_urls": [result.get("trace_url")] } if result.get("trace_url") else {}),
-                    },
-                    metadata={
-                        "case_id": result["case_id"],
-                        "model_used": "gpt-4o",
-                        "judge_model": "gpt-4o",
-                        "evaluation_type": "judge_accuracy",
-                    },
-                )
-                # 데이터셋 링크 출력 제거 (요청에 따라) - 아무 것도 출력하지 않음
+            self.langsmith_client.create_example(dataset_name=self.history_dataset, **record)
+        except Exception as e:
+            if not is_conflict(e):
+                log(f"  - 히스토리 저장 실패: {result.get('case_id')}: {e}")
+                return False
+            # 재개 실행: 같은 execution_id의 레코드가 이미 저장됨
+        return True
+
+    def compact_history(self, keep_answers: int = HISTORY_KEEP_ANSWERS, dry_run: bool = False) -> Dict[str, int]:
+        """히스토리 실행 레코드를 케이스별 타임라인으로 압축하고 오래된 답변을 로컬 보관"""
+        print(f"🗜️  히스토리 압축 시작: {self.history_dataset} (최근 답변 {keep_answers}개 유지{', dry-run' if dry_run else ''})")
+        stats = compact_history(
+            self.langsmith_client, self.history_dataset, keep_answers=keep_answers, dry_run=dry_run,
+            timeline_id=lambda case_id: stable_example_id(self.history_dataset, case_id),
+        )
+        print(f"✅ 압축 완료: 케이스 {stats['cases']}개 | 레코드 {stats['records_folded']}건 접음 "
+              f"(삭제 {stats['records_deleted']}) | 답변 {stats['answers_archived']}건 보관")
+        return stats
+
+    def fingerprint_components(self) -> Dict[str, str]:
+        """증분 평가용 실행 단위 지문 (검색 인덱스 / 에이전트 모델·설정 / Judge 프롬프트·모델)"""
+        from ev_rag_agent import agent_config_fingerprint, index_fingerprint
+        return {
+            "index": index_fingerprint(),
+            "agent": agent_config_fingerprint(),
+            "judge": judge_prompt_fingerprint(self.accuracy_judge_prompt, self._judge_fingerprint_model()),
+        }
+
+    def _judge_fingerprint_model(self) -> str:
+        """지문용 Judge 구성 (캐스케이드면 두 모델 + 승급 정책, 사전 채점이면 임계값)"""
+        if self.judge_mode == "cascade":
+            judge = f"cascade:{model_name('judge_mini')}>{model_name('judge')};{self.cascade_policy.fingerprint()}"
+        elif self.judge_mode == "batch":
+            judge = f"batch:{model_name('judge')}"
+        elif self.judge_mode == "consistency":
+            judge = f"consistency:{model_name('judge')};{self.consistency_policy.fingerprint()}"
+        else:
+            judge = model_name("judge")
+        if self.prescore_enabled:
+            judge += f"+prescore:{self.prescore_policy.fingerprint()}"
+        return judge
+
+    def answer_case(self, tc: Dict, case_deadline: float = 180.0, log=print) -> str:
+        """
+        [answer 단계] 전기차 RAG Agent로 답변 생성 (실패 시 GPT-4o 직접 답변으로 폴백)
+        폴백까지 실패하면(서킷 열림 포함) 예외를 전파해 실패 안내 문구가 답변으로 채점/저장되지 않도록 함
+
+        Args:
+            tc: {"case_id", "question", ...} (RAG 답변이면 검색 컨텍스트를 tc["_contexts"]에 남김)
+            case_deadline: 단계 데드라인(초). 재시도 대기와 HTTP 타임아웃이 이 시간을 넘지 않음
+            log: 출력 함수 (병렬 평가 시 케이스별 버퍼)
+        """
+        log(f"❓ 질문: {tc['question']}")
+        with deadline(case_deadline):
+            try:
+                from ev_rag_agent import get_ev_agent
+                agent = get_ev_agent()
+                answer, citations = agent.answer(tc["question"])
+                tc["_contexts"] = [c.get("content", "") for c in citations]
+            except Exception as e:
+                log(f"RAG Agent 오류로 GPT-4o 직접 답변으로 폴백: {e}")
+                answer = self.generate_answer_with_gpt4o(tc["question"], raise_on_error=True)
+        log(f"💡 답변: {answer[:100]}...")
+        return answer
+
+    def judge_case(self, tc: Dict, answer: str, case_deadline: float = 180.0, log=print) -> Dict:
+        """
+        [judge 단계] Judge 평가 후 결과 레코드 구성
+
+        Returns:
+            {"case_id", "question", "answer", "judge_accuracy_score", "reasoning", "trace_url", "parse_failed",
+             "error"(Judge 호출 오류), "judge_model", 캐스케이드 모드면 "judge_tier", "escalation_reason", "cheap_score", "cheap_confidence",
+             consistency 모드면 "judge_samples", "judge_score_median", "judge_score_variance", "judge_scores"}
+        """
+        with deadline(case_deadline):
+            if self.judge_mode == "cascade":
+                judge_result = self.judge_answer_cascade(tc["case_id"], tc["question"], answer)
+            elif self.judge_mode == "consistency":
+                judge_result = self.judge_answer_consistency(tc["question"], answer)
             else:
-                # 기존 예제를 배열 append로 업데이트
-                outs = target_example.outputs or {}
-                outs["scores"] = list(outs.get("scores", [])) + [int(result["judge_accuracy_score"]) ]
-                outs["answers"] = list(outs.get("answers", [])) + [ result["answer"] ]
-                outs["reasons"] = list(outs.get("reasons", [])) + [ result.get("reasoning", "") ]
-                outs["timestamps"] = list(outs.get("timestamps", [])) + [ now_iso ]
-                if result.get("trace_url"):
-                    outs["trace_urls"] = list(outs.get("trace_urls", [])) + [ result.get("trace_url") ]
-
-                updated = self.langsmith_client.update_example(
-                    example_id=str(target_example.id),
-                    outputs=outs,
+                judge_result = self.judge_answer_with_gpt4o(tc["question"], answer)
+        return self._judge_record(tc, answer, judge_result, log)
+
+    def _judge_record(self, tc: Dict, answer: str, judge_result: Dict, log=print) -> Dict:
+        """Judge 결과 → 결과 레코드"""
+        tier = ""
+        if judge_result.get("judge_tier"):
+            reason = judge_result.get("escalation_reason")
+            tier = f" [{judge_result['judge_tier']}{f' ← {reason}' if reason else ''}]"
+        elif judge_result.get("judge_batch"):
+            tier = f" [batch x{judge_result['judge_batch']}]"
+        elif judge_result.get("judge_samples"):
+            tier = f" [n={judge_result['judge_samples']}, 분산 {judge_result['judge_score_variance']:.2f}]"
+        log(f"⚖️ 평가 요약{tier}: {judge_result['score']}/5점 - {judge_result.get('reasoning', '')[:100]}...")
+        result = {
+            "case_id": tc["case_id"],
+            "question": tc["question"],
+            "answer": answer,
+            "judge_accuracy_score": judge_result["score"],
+            "reasoning": judge_result["reasoning"],
+            "trace_url": judge_result.get("trace_url"),
+            "parse_failed": judge_result.get("parse_failed", False),
+            "error": judge_result.get("error", False),
+            "judge_model": judge_result.get("judge_model") or model_name("judge"),
+        }
+        if judge_result.get("judge_tier"):
+            result.update({k: judge_result.get(k) for k in ("judge_tier", "escalation_reason", "cheap_score", "cheap_confidence")})
+        if judge_result.get("judge_batch"):
+            result["judge_batch"] = judge_result["judge_batch"]
+        if judge_result.get("judge_samples"):
+            result.update({k: judge_result.get(k) for k in
+                           ("judge_samples", "judge_score_median", "judge_score_variance", "judge_scores")})
+        return result
+
+    def prescore_cases(self, entries: List[Tuple[Dict, str]], logs: Optional[List] = None) -> List[Optional[Dict]]:
+        """
+        [prescore 단계] 기대 답변 기반 사전 채점 (묶음 단위로 유사도 일괄 계산)
+
+        Args:
+            entries: [(tc, answer), ...]
+            logs: 케이스별 로그 함수 목록 (entries와 같은 순서)
+
+        Returns:
+            entries와 같은 순서의 결과: 자동 채점이면 결과 레코드, Judge로 보낼 케이스면 None
+            (감사 표본은 None이지만 tc["_prescore_audit"]에 자동 채점 점수를 남겨 Judge 점수와 비교)
+        """
+        logs = logs or [print] * len(entries)
+        scores = self.prescore_policy.score_batch(
+            [(tc["case_id"], answer, tc.get("expected_answer")) for tc, answer in entries])
+        results: List[Optional[Dict]] = []
+        for (tc, answer), log in zip(entries, logs):
+            pre = scores[tc["case_id"]]
+            if pre.score is None:
+                PRESCORE_STATS.record(pre, skipped=False)
+                results.append(None)
+                continue
+            if self.prescore_policy.is_audit(tc["case_id"]):
+                # 감사 표본: Judge로도 채점 (최종 점수는 Judge)
+                PRESCORE_STATS.record(pre, skipped=False, audited=True)
+                tc["_prescore_audit"] = {"prescore_rule": pre.rule, "prescore_score": pre.score,
+                                         "prescore_similarity": round(pre.token_set, 1)}
+                log(f"🔎 사전 채점 {pre.score}/5점 ({pre.rule}) - 감사 표본이므로 Judge로도 채점")
+                results.append(None)
+                continue
+            PRESCORE_STATS.record(pre, skipped=True)
+            result = self._judge_record(tc, answer, {"score": pre.score, "reasoning": pre.reasoning,
+                                                     "judge_model": "prescore"}, log)
+            result.update({"prescore_rule": pre.rule, "prescore_score": pre.score,
+                           "prescore_similarity": round(pre.token_set, 1)})
+            results.append(result)
+        return results
+
+    def judge_cases_batch(self, entries: List[Tuple[Dict, str]], case_deadline: float = 180.0,
+                          logs: Optional[List] = None) -> List[Dict]:
+        """
+        [judge 단계, batch 모드] 여러 케이스를 다건 Judge로 채점해 결과 레코드 목록 반환 (입력 순서 유지)
+
+        Args:
+            entries: [(tc, answer), ...]
+            logs: 케이스별 출력 함수 목록 (생략 시 print)
+        """
+        logs = logs or [print] * len(entries)
+        verdicts = self.judge_answers_batch(
+            [(tc["case_id"], tc["question"], answer) for tc, answer in entries], case_deadline
+        )
+        return [self._judge_record(tc, answer, verdicts[tc["case_id"]], log)
+                for (tc, answer), log in zip(entries, logs)]
+
+    def judge_answers_batch(self, items: List[Tuple[str, str, str]], case_deadline: float = 180.0) -> Dict[str, Dict]:
+        """
+        다건 Judge: 평가 기준 1회 + 항목 여러 건을 한 요청으로 채점
+
+        토큰 예산/항목 수 상한으로 묶고, 검증에 실패한 항목(ID 누락/중복, 점수 범위 오류)이나
+        요청 자체가 실패한 묶음은 단건 Judge로 재채점. JUDGE_BATCH_AGREEMENT 비율의 항목은
+        단건 Judge로도 채점해 일치율을 집계
+
+        Args:
+            items: [(case_id, question, answer), ...]
+
+        Returns:
+            {case_id: judge_answer_with_gpt4o 형식 결과 (+ "judge_batch": 묶음 크기)}
+        """
+        results: Dict[str, Dict] = {}
+        agreement_rate = float(os.getenv("JUDGE_BATCH_AGREEMENT", "0.05"))
+        for batch in pack_batches(items, rubric_tokens=self.batch_rubric_tokens):
+            if len(batch) == 1:
+                case_id, question, answer = batch[0]
+                with deadline(case_deadline):
+                    results[case_id] = self.judge_answer_with_gpt4o(question, answer)
+                continue
+
+            # 항목 ID는 묶음 내 순번 (case_id 형식과 무관하게 모델이 그대로 옮겨 쓰기 쉬움)
+            by_id = {str(n): item for n, item in enumerate(batch, 1)}
+            valid: Dict[str, Dict] = {}
+            invalid = list(by_id)
+            usage, trace_url, failed = None, None, True
+            root = {"run_id": None}
+
+            def invoke():
+                root["run_id"] = new_run_id()
+                return self.batch_judge_chain.invoke(
+                    {"items": format_items([(i, q, a) for i, (_, q, a) in by_id.items()]), "count": len(by_id)},
+                    config={"run_id": root["run_id"]},
                 )
-                # 데이터셋 링크 출력 제거
 
-            time.sleep(0.1)
-            return True
+            cache_keys: List[str] = []
+            try:
+                with deadline(case_deadline), track_cache_entries() as cache_keys:
+                    raw = call_with_resilience(llm_endpoint(self.judge_model), invoke)
+                usage = usage_of(raw)
+                verdicts = resolve_structured(raw, BatchJudgeVerdicts, name="judge_batch")
+                valid, invalid = validate_items(verdicts, list(by_id))
+                trace_url = self.trace_links.url(root["run_id"])
+                failed = False
+            except Exception as e:
+                print(f"❌ 배치 Judge 실패 ({len(batch)}건), 단건으로 재채점: {e}")
+            if invalid:
+                # 파싱 실패/누락 항목이 있는 묶음 응답은 캐시에 남기지 않음
+                discard_cache_entries(cache_keys)
+            BATCH_JUDGE_STATS.record_request(len(batch), self.batch_rubric_tokens, usage, failed)
+
+            for item_id, verdict in valid.items():
+                case_id = by_id[item_id][0]
+                results[case_id] = {**verdict, "trace_url": trace_url, "parse_failed": False,
+                                    "judge_model": model_name("judge"), "judge_batch": len(batch)}
+            if invalid:
+                BATCH_JUDGE_STATS.record_rejudged(len(invalid))
+            for item_id in invalid:
+                case_id, question, answer = by_id[item_id]
+                with deadline(case_deadline):
+                    results[case_id] = self.judge_answer_with_gpt4o(question, answer)
+
+            # 단건 Judge와의 일치율 점검 (case_id 해시 표본)
+            for item_id in valid:
+                case_id, question, answer = by_id[item_id]
+                if not hash_sample(case_id, agreement_rate, "judge-batch"):
+                    continue
+                with deadline(case_deadline):
+                    single = self.judge_answer_with_gpt4o(question, answer)
+                if not single.get("parse_failed") and not single.get("error"):
+                    BATCH_JUDGE_STATS.record_pair(valid[item_id]["score"], single["score"])
+        return results
+
+    def _result_writer(self, log=print) -> BulkExampleWriter:
+        """persist 단계용 결과 데이터셋 writer (배치는 파이프라인이 모으므로 즉시 저장만 사용)"""
+        with self._persist_lock:
+            writer = getattr(self, "_result_writer_cache", None)
+            if writer is None:
+                writer = BulkExampleWriter(self.langsmith_client, self.result_dataset, flush_interval=0, log=log)
+                self._result_writer_cache = writer
+            return writer
+
+    def persist_results(self, results: List[Dict], log=print) -> List[Dict]:
+        """
+        [persist 단계] 결과 여러 건을 저장
+        로컬 결과 저장소가 켜져 있으면(RESULTS_STORE=local, 기본) SQLite에 한 트랜잭션으로 저장하고
+        LangSmith 결과/히스토리 반영은 백그라운드 미러에 맡김 → LangSmith 지연/장애가 평가 처리량에 영향 없음.
+        RESULTS_STORE=langsmith면 기존처럼 LangSmith에 직접 저장
+
+        실행 저널(track_journals로 등록, 없으면 결과의 run_id로 찾음)의 저장 완료(persisted)는
+        LangSmith 결과/히스토리 반영이 끝난 뒤에 기록 (로컬 저장소 모드면 미러 완료 시점)
+
+        Returns:
+            저장에 성공한 결과 목록 (로컬 저장소 모드는 로컬 저장 기준)
+        """
+        if not results:
+            return []
+        if self.results_store is None:
+            saved = self._persist_to_langsmith(results, log=log)
+            self._record_persisted(saved)
+            return saved
+        try:
+            self.results_store.add(results)
         except Exception as e:
-            return False
-    
+            log(f"  - 로컬 저장 실패, LangSmith에 직접 저장: {e}")
+            saved = self._persist_to_langsmith(results, log=log)
+            self._record_persisted(saved)
+            return saved
+        log(f"  - 로컬 저장 완료: {len(results)}건 ({', '.join(r['case_id'] for r in results)}) → LangSmith 미러 대기")
+        # 재개 실행: 이전 실행에서 이미 미러까지 끝난 결과는 바로 저장 완료로 기록
+        done = set(self.results_store.fully_mirrored([r["execution_id"] for r in results]))
+        self._record_persisted([r for r in results if r["execution_id"] in done])
+        self.results_mirror().wake()
+        return list(results)
+
+    def track_journals(self, journals: List[RunJournal]) -> None:
+        """저장 완료를 기록할 실행 저널 등록 (미러 스레드도 같은 인스턴스에 기록)"""
+        registry = getattr(self, "_journals", None)
+        if registry is None:
+            registry = self._journals = {}
+        registry.update({j.run_id: j for j in journals})
+
+    def _record_persisted(self, results: List[Dict]) -> None:
+        """결과의 run_id별 실행 저널에 저장 완료 기록 (등록되지 않은 실행은 저널 파일이 있으면 열어서 기록)"""
+        registry = getattr(self, "_journals", None) or {}
+        for run_id, items in _group_by_run([r for r in results if r.get("run_id")]).items():
+            journal = registry.get(run_id)
+            if journal is None and (runs_dir() / f"{run_id}.jsonl").exists():
+                journal = RunJournal(run_id)
+            if journal is not None:
+                journal.record_persisted(items)
+
+    def _persist_to_langsmith(self, results: List[Dict], log=print) -> List[Dict]:
+        """결과 데이터셋에 저장 후 히스토리에 누적 (직접 저장 모드)"""
+        saved = self._write_results_remote(results, log=log)
+        for r in saved:
+            # 증분 평가로 재사용한 결과는 새 실행이 아니므로 히스토리에 누적하지 않음
+            if not r.get("reused"):
+                self.save_result_to_history(r)
+        return saved
+
+    def _write_results_remote(self, results: List[Dict], log=print) -> List[Dict]:
+        """
+        결과 여러 건을 결과 데이터셋에 한 번의 create_examples 호출로 저장
+        (배치 저장 실패 시 배치를 나눠 재시도해 실패 항목만 제외)
+        """
+        writer = self._result_writer(log)
+        outcome = writer.write_batch([
+            PendingExample(example_id=result_example_id(r.get("execution_id")) or uuid.uuid4(), item=r,
+                           **self._result_example_payload(r))
+            for r in results
+        ])
+        saved = [p.item for p in outcome.saved]
+        if saved:
+            log(f"  - 배치 저장 완료: {len(saved)}건 ({', '.join(r['case_id'] for r in saved)})")
+        for p, error in outcome.failed:
+            log(f"  - 저장 실패: {p.item['case_id']}: {error}")
+        return saved
+
+    def results_mirror(self) -> ResultsMirror:
+        """로컬 결과 → LangSmith 미러 (처음 호출 시 백그라운드 스레드 시작)"""
+        with self._persist_lock:
+            mirror = getattr(self, "_results_mirror", None)
+            if mirror is None:
+                # 결과/히스토리 ID가 execution_id 기반 결정적 ID이므로 재시도해도 중복 생성 없음
+                mirror = ResultsMirror(self.results_store,
+                                       push_results=lambda batch: self._write_results_remote(batch, log=lambda _: None),
+                                       push_history=self.save_result_to_history,
+                                       on_mirrored=self._record_persisted)
+                self._results_mirror = mirror.start()
+            return mirror
+
+    def flush_results_mirror(self, timeout: Optional[float] = None) -> None:
+        """미러 대기열이 빌 때까지 대기 후 요약 출력 (남은 항목은 다음 실행 또는 --results-store sync 에서 반영)"""
+        if self.results_store is None:
+            return
+        mirror = self.results_mirror()
+        drained = mirror.drain(timeout)
+        if not drained or any(c.get("failed") for c in self.results_store.mirror_counts().values()):
+            print("⚠️  LangSmith 미러에 반영하지 못한 결과가 남아 있습니다 (다음 실행 또는 --results-store sync 에서 재시도)")
+        print(f"🗃️  로컬 결과 저장소:")
+        print(self.results_store.report())
+        print(mirror.report())
+
     def run_full_evaluation(self, excel_path: str) -> bool:
         """
         전체 평가 프로세스 실행
@@ -709,9 +1085,7 @@ class RealAgentQASystem:
             
             print(f"💡 답변: {answer[:100]}...")
             print(f"📊 평가 요약: {judge_result['score']}/5점 - {judge_result['reasoning'][:100]}...")
-            
-            # API 부하 방지를 위한 대기
-            time.sleep(1)
+            # 호출 속도는 공유 레이트 리미터(rate_limiter.py)가 모델 쿼터에 맞춰 조절
         
         # 5. 결과를 결과 데이터셋에 저장
         print(f"\n5️⃣  LangSmith '{self.result_dataset}' 데이터셋에 결과 저장")
@@ -727,6 +1101,15 @@ class RealAgentQASystem:
         print(f"  - 평균 점수: {sum(r['judge_accuracy_score'] for r in results) / len(results):.2f}/5")
         print(f"  - 최고 점수: {max(r['judge_accuracy_score'] for r in results)}/5")
         print(f"  - 최저 점수: {min(r['judge_accuracy_score'] for r in results)}/5")
+        print(f"🧩 구조화 출력 파싱 통계:")
+        print(PARSE_STATS.report())
+        print(f"🚦 레이트 리미터 통계:")
+        print(get_scheduler().report())
+        print(f"🛡️  재시도/서킷 브레이커 통계:")
+        print(resilience_report())
+        if get_response_cache() is not None:
+            print(f"🗄️  응답 캐시 통계:")
+            print(get_response_cache().report())
         
         return True
 
@@ -755,7 +1138,7 @@ def main():
 
 def save_testcases_only(uploaded_excel_path: Optional[str] = None):
     """
-    3. TestCase.xlsx를 Agent_QA_Scenario 데이터셋에 저장하는 기능만 실행
+    3. 테스트케이스 파일(기본 TestCase.xlsx, csv/jsonl/parquet 지원)을 Agent_QA_Scenario 데이터셋에 저장하는 기능만 실행
     """
     # 우선순위: 인자 > 환경변수 > 기본 파일
     env_path = os.getenv("UPLOADED_EXCEL_PATH")
@@ -773,27 +1156,31 @@ def save_testcases_only(uploaded_excel_path: Optional[str] = None):
         print(f"   경로: {excel_path}")
     
     if not excel_path.exists():
-        print(f"❌ Excel 파일을 찾을 수 없습니다: {excel_path}")
+        print(f"❌ 테스트케이스 파일을 찾을 수 없습니다: {excel_path}")
         return
     
     try:
         print("📥 TestCase → Agent_QA_Scenario 데이터셋 저장 시작")
         print("="*60)
         
+        if excel_path.suffix.lower() not in supported_suffixes():
+            print(f"❌ 지원하지 않는 파일 형식입니다: {excel_path.suffix} (지원: {', '.join(supported_suffixes())})")
+            return
+        
         system = RealAgentQASystem()
         
-        # 1. Excel에서 테스트케이스 로드
-        print(f"1️⃣  Excel 파일에서 테스트케이스 로드: {excel_path.name}")
-        testcases = system.load_testcases_from_excel(str(excel_path))
+        # 1~2. 파일을 스트리밍으로 읽으면서 LangSmith에 저장 (중복 방지)
+        print(f"1️⃣  테스트케이스 파일 스트리밍 로드: {excel_path.name}")
+        print("2️⃣  LangSmith 'Agent_QA_Scenario' 데이터셋에 저장 (읽는 대로 일괄 저장)")
+        stats = LoadStats()
+        success = system.save_testcases_to_langsmith(system.iter_testcases_from_file(str(excel_path), stats),
+                                                     source=excel_path.name)
+        print(stats.report())
         
-        if not testcases:
+        if not stats.loaded:
             print("❌ 유효한 테스트케이스를 찾을 수 없습니다.")
             return
         
-        # 2. LangSmith에 저장 (중복 방지)
-        print("\n2️⃣  LangSmith 'Agent_QA_Scenario' 데이터셋에 저장")
-        success = system.save_testcases_to_langsmith(testcases)
-        
         if success:
             print("\n✅ 테스트케이스 저장 완료!")
             print("🔍 LangSmith에서 'Agent_QA_Scenario' 데이터셋을 확인하세요.")
@@ -803,15 +1190,251 @@ def save_testcases_only(uploaded_excel_path: Optional[str] = None):
     except Exception as e:
         print(f"❌ 테스트케이스 저장 중 오류: {e}")
 
-def run_evaluation_only():
+def build_evaluation_stages(system: RealAgentQASystem, workers: Optional[int] = None,
+                            journal: Optional[RunJournal] = None,
+                            fingerprints: Optional[FingerprintIndex] = None,
+                            persist: bool = True) -> List[Stage]:
+    """
+    평가 파이프라인 단계 구성 (answer → judge → persist)
+
+    journal이 있으면 채점 완료/저장 완료 시점을 실행 저널에 기록하고, 케이스에
+    "_journal_result"(저널에서 복구한 채점 결과)가 있으면 답변/채점을 건너뛰고 저장만 수행.
+    "_reused_result"(증분 평가로 재사용할 이전 결과)가 있으면 새 execution_id만 부여해 저장.
+    케이스의 "_fingerprint"는 결과에 기록되고, 저장 완료 시 fingerprints 인덱스를 갱신
+
+    단계별 동시성은 EVAL_ANSWER_WORKERS / EVAL_JUDGE_WORKERS (생략 시 workers 또는 EVAL_WORKERS),
+    저장은 EVAL_PERSIST_WORKERS(기본 1)개 워커가 EVAL_PERSIST_BATCH(기본 20)건씩 모아 쓰며,
+    배치를 채우기 위해 최대 EVAL_PERSIST_WAIT(기본 2초) 대기.
+    batch Judge 모드면 judge 단계도 JUDGE_BATCH_MAX_ITEMS(기본 8)건씩 최대 JUDGE_BATCH_WAIT(기본 3초) 모아 채점.
+    사전 채점(system.prescore_enabled)이면 answer와 judge 사이에 prescore 단계를 두어 PRESCORE_BATCH(기본 32)건씩
+    최대 PRESCORE_WAIT(기본 1초) 모아 유사도를 일괄 계산하고, 자동 채점된 케이스는 judge 단계를 건너뜀.
+    ragas 지표(system.ragas_enabled)면 judge와 persist 사이에 metrics 단계를 두어 RAGAS_BATCH(기본 16)건씩
+    최대 RAGAS_WAIT(기본 2초) 모아 비동기로 계산 (동시 호출 수는 RAGAS_CONCURRENCY로 프로세스 전체에서 제한).
+    persist=False(샤드 워커)면 persist 단계 없이 저널에 채점 완료까지만 기록 (저장은 샤드 병합에서)
+    """
+    case_deadline = float(os.getenv("EVAL_CASE_DEADLINE", "180"))
+    if journal is not None:
+        system.track_journals([journal])
+
+    def stamp(result: Dict) -> None:
+        """실행 ID 부여 후 채점 완료로 저널 기록"""
+        if journal is not None:
+            result["run_id"] = journal.run_id
+            result["execution_id"] = journal.next_execution_id(result["case_id"])
+            journal.record_judged(result)
+
+    def answer_stage(outcome):
+        tc = outcome.item
+        if tc.get("_journal_result"):
+            outcome.result = dict(tc["_journal_result"])
+            outcome.logs.append("↩️  저널에서 채점 결과 복구 (답변/채점 생략, 저장만 재시도)")
+            return
+        if tc.get("_reused_result"):
+            result = dict(tc["_reused_result"])
+            stamp(result)
+            outcome.result = result
+            outcome.logs.append(f"♻️  변경 없음: 이전 결과 재사용 ({result.get('reused_from')}) "
+                                f"- {result['judge_accuracy_score']}/5점")
+            return
+        outcome.result = {"answer": system.answer_case(tc, case_deadline, log=outcome.logs.append)}
+
+    def prescore_stage(outcomes):
+        pending = [o for o in outcomes if "judge_accuracy_score" not in o.result]
+        if not pending:
+            return
+        results = system.prescore_cases([(o.item, o.result["answer"]) for o in pending],
+                                        logs=[o.logs.append for o in pending])
+        for o, result in zip(pending, results):
+            if result is None:
+                continue
+            if o.item.get("_fingerprint"):
+                result["fingerprint"] = o.item["_fingerprint"]
+            stamp(result)
+            o.result = result
+
+    def audit_prescore(tc: Dict, result: Dict) -> None:
+        """감사 표본이면 사전 채점 점수를 결과에 남기고 Judge 점수와의 일치 집계"""
+        audit = tc.get("_prescore_audit")
+        if audit:
+            result.update(audit)
+            PRESCORE_STATS.record_pair(audit["prescore_score"], result["judge_accuracy_score"])
+
+    def judge_stage(outcome):
+        if "judge_accuracy_score" in outcome.result:
+            return
+        result = system.judge_case(outcome.item, outcome.result["answer"], case_deadline,
+                                   log=outcome.logs.append)
+        audit_prescore(outcome.item, result)
+        if outcome.item.get("_fingerprint"):
+            result["fingerprint"] = outcome.item["_fingerprint"]
+        stamp(result)
+        outcome.result = result
+
+    def judge_batch_stage(outcomes):
+        pending = [o for o in outcomes if "judge_accuracy_score" not in o.result]
+        if not pending:
+            return
+        results = system.judge_cases_batch([(o.item, o.result["answer"]) for o in pending], case_deadline,
+                                           logs=[o.logs.append for o in pending])
+        for o, result in zip(pending, results):
+            audit_prescore(o.item, result)
+            if o.item.get("_fingerprint"):
+                result["fingerprint"] = o.item["_fingerprint"]
+            stamp(result)
+            o.result = result
+
+    def metrics_stage(outcomes):
+        # 이번 실행에서 RAG로 새로 답변한 케이스만 (재사용/저널 복구/폴백 답변은 컨텍스트 없음)
+        pending = [o for o in outcomes if o.item.get("_contexts") and "judge_accuracy_score" in o.result
+                   and not o.result.get("reused")]
+        if not pending:
+            return
+        try:
+            scores = get_ragas_scorer().score_batch(
+                [(o.item["case_id"], o.item["question"], o.result["answer"], o.item["_contexts"]) for o in pending])
+        except Exception as e:
+            pending[0].logs.append(f"⚠️  ragas 지표 계산 실패 (결과 저장은 계속): {e}")
+            return
+        for o in pending:
+            metrics = scores.get(o.item["case_id"]) or {}
+            o.result.update({k: v for k, v in metrics.items() if v is not None})
+            if journal is not None and o.result.get("execution_id"):
+                # 지표를 포함한 결과로 저널 갱신 (재개/샤드 병합 시 지표까지 저장)
+                journal.record_judged(o.result)
+            o.logs.append("📐 ragas: " + " / ".join(f"{k[6:]} {v:.2f}" if v is not None else f"{k[6:]} -"
+                                                    for k, v in metrics.items()))
+
+    def persist_stage(outcomes):
+        outcomes[0].logs.append("💾 결과 배치 저장 중...")
+        saved = system.persist_results([o.result for o in outcomes], log=outcomes[-1].logs.append)
+        saved_ids = {id(r) for r in saved}
+        if fingerprints is not None:
+            fingerprints.record(saved)
+        for o in outcomes:
+            if id(o.result) not in saved_ids:
+                # 저널에는 채점 완료로 남아 있으므로 --resume 시 저장만 다시 시도
+                o.error = "[persist] 결과 저장 실패"
+
+    if system.judge_mode == "batch":
+        # 다건 Judge: 단계에서 최대 JUDGE_BATCH_MAX_ITEMS 건을 모으고, 토큰 예산에 맞춰 다시 나눠 채점
+        judge = Stage("judge", judge_batch_stage, workers=resolve_workers(workers, "EVAL_JUDGE_WORKERS"),
+                      batched=True,
+                      batch_size=max(1, int(os.getenv("JUDGE_BATCH_MAX_ITEMS", "8"))),
+                      batch_wait=float(os.getenv("JUDGE_BATCH_WAIT", "3")))
+    else:
+        judge = Stage("judge", judge_stage, workers=resolve_workers(workers, "EVAL_JUDGE_WORKERS"))
+    prescore = []
+    if system.prescore_enabled:
+        prescore = [Stage("prescore", prescore_stage, workers=1, batched=True,
+                          batch_size=max(1, int(os.getenv("PRESCORE_BATCH", "32"))),
+                          batch_wait=float(os.getenv("PRESCORE_WAIT", "1")))]
+    metrics = []
+    if system.ragas_enabled:
+        metrics = [Stage("metrics", metrics_stage, workers=max(1, int(os.getenv("RAGAS_STAGE_WORKERS", "2"))),
+                         batched=True,
+                         batch_size=max(1, int(os.getenv("RAGAS_BATCH", "16"))),
+                         batch_wait=float(os.getenv("RAGAS_WAIT", "2")))]
+    return [
+        Stage("answer", answer_stage, workers=resolve_workers(workers, "EVAL_ANSWER_WORKERS")),
+        *prescore,
+        judge,
+        *metrics,
+    ] + ([Stage("persist", persist_stage,
+                workers=max(1, int(os.getenv("EVAL_PERSIST_WORKERS", "1"))),
+                batched=True,
+                batch_size=max(1, int(os.getenv("EVAL_PERSIST_BATCH", "20"))),
+                batch_wait=float(os.getenv("EVAL_PERSIST_WAIT", "2")))] if persist else [])
+
+
+def _plan_from_journal(testcases: List[Dict], journal: RunJournal, rerun_failed: bool):
+    """
+    저널 상태로 이번 실행에서 처리할 케이스와 이전 결과를 그대로 쓰는 케이스를 나눔
+
+    Returns:
+        (todo, carried): todo는 파이프라인에 넣을 케이스, carried는 {case_id: 이전 결과}
+    """
+    todo, carried = [], {}
+    for tc in testcases:
+        st = journal.state(tc["case_id"])
+        redo = rerun_failed and st is not None and st.failed
+        if st is not None and st.status == "persisted" and not redo:
+            carried[tc["case_id"]] = st.result
+        elif st is not None and st.status == "judged" and not redo:
+            todo.append({**tc, "_journal_result": st.result})
+        elif rerun_failed and not redo:
+            # --rerun-failed 는 실패 케이스만 (미처리 케이스는 --resume 으로 이어서 실행)
+            continue
+        else:
+            todo.append(tc)
+    return todo, carried
+
+
+def _apply_fingerprints(todo: List[Dict], components: Dict[str, str],
+                        index: FingerprintIndex, incremental: bool) -> int:
+    """
+    케이스별 지문을 붙이고, 증분 모드면 지문이 같은 케이스에 재사용할 이전 결과를 지정
+
+    Returns:
+        재사용 케이스 수
+    """
+    reused = 0
+    for tc in todo:
+        tc["_fingerprint"] = case_fingerprint(tc["question"], components, reference=tc.get("expected_answer"))
+        if not incremental or tc.get("_journal_result"):
+            continue
+        entry = index.lookup(tc["case_id"], tc["_fingerprint"])
+        if entry:
+            tc["_reused_result"] = reused_result(entry)
+            reused += 1
+    return reused
+
+
+def run_evaluation_only(workers: Optional[int] = None, resume: Optional[str] = None,
+                        rerun_failed: Optional[str] = None, incremental: Optional[bool] = None,
+                        judge_mode: Optional[str] = None, prescore: Optional[bool] = None,
+                        ragas: Optional[bool] = None, shards: Optional[int] = None,
+                        shard_index: Optional[int] = None, run_id: Optional[str] = None):
     """
     4. Agent_QA_Scenario 데이터셋에서 GPT-4o 평가만 실행
+
+    Args:
+        workers: 동시 처리 케이스 수 (생략 시 EVAL_WORKERS 환경변수, 기본 4)
+        resume: 이어서 실행할 run_id ('latest' 가능). 저장 완료 케이스는 건너뛰고 채점 완료 케이스는 저장만 재시도
+        rerun_failed: 오류/파싱 실패 케이스만 다시 실행할 run_id ('latest' 가능)
+        incremental: 증분 모드 (생략 시 EVAL_INCREMENTAL 환경변수). 질문/검색 인덱스/에이전트 설정/Judge 프롬프트
+                     지문이 이전 결과와 같은 케이스는 다시 평가하지 않고 "reused" 표시로 이전 결과를 사용
+        judge_mode: 'single' | 'cascade' | 'batch' | 'consistency' (생략 시 JUDGE_MODE 환경변수, 기본 single)
+        prescore: 기대 답변 기반 사전 채점 (생략 시 PRESCORE 환경변수). 거의 일치/답변 거부 케이스는 Judge 생략
+        ragas: ragas 지표 계산 (생략 시 EVAL_RAGAS 환경변수). 결과 메타데이터에 ragas_* 로 기록
+        shards / shard_index: 샤드 워커로 실행. case_id 해시가 shard_index 인 케이스만 답변/채점하고
+                              샤드 저널(<run_id>.shard<i>of<N>)에 기록 (저장은 merge_shard_runs 에서)
+        run_id: 샤드 실행 그룹 ID (생략 시 새로 발급, 재개면 resume/rerun_failed 값)
     """
+    sharded = bool(shards and shards > 1 and shard_index is not None)
+    if incremental is None:
+        incremental = os.getenv("EVAL_INCREMENTAL", "").lower() in ("1", "true", "yes")
     try:
         print("🚀 Agent_QA_Scenario → GPT-4o 평가 실행 시작")
         print("="*60)
         
         system = RealAgentQASystem()
+        if judge_mode:
+            system.judge_mode = judge_mode
+        if system.judge_mode != "single":
+            print(f"⚖️  Judge 모드: {system.judge_mode}")
+        if prescore is not None:
+            system.prescore_enabled = prescore
+        if system.prescore_enabled:
+            print(f"🔎 사전 채점 사용 (감사 표본 {system.prescore_policy.audit_rate:.0%})")
+        if ragas is not None:
+            system.ragas_enabled = ragas
+        if system.ragas_enabled:
+            try:
+                get_ragas_scorer()
+                print(f"📐 ragas 지표 사용 ({ragas_model()})")
+            except Exception as e:
+                print(f"⚠️  ragas 초기화 실패, 지표 없이 진행: {e}")
+                system.ragas_enabled = False
         
         # 1. LangSmith에서 테스트케이스 조회
         print("1️⃣  LangSmith에서 테스트케이스 조회")
@@ -827,57 +1450,66 @@ def run_evaluation_only():
         
         print(f"📋 정렬된 테스트케이스 순서: {[tc['case_id'] for tc in testcases]}")
         
+        # 실행 저널: 새 실행이면 run_id 발급, 재개/재실행이면 기존 저널 재생
+        if resume and rerun_failed:
+            print("❌ --resume 과 --rerun-failed 는 함께 사용할 수 없습니다.")
+            return
+        journal_id = resume or rerun_failed
+        if sharded:
+            testcases = [tc for tc in testcases if shard_of(tc["case_id"], shards) == shard_index]
+            group = resolve_group(journal_id) if journal_id else (run_id or new_journal_id())
+            print(f"🧩 샤드 {shard_index}/{shards}: 케이스 {len(testcases)}건 (그룹 {group})")
+            journal_id = shard_run_id(group, shard_index, shards)
+            journal = RunJournal.open(journal_id) if (resume or rerun_failed) else RunJournal.create(journal_id)
+        else:
+            journal = RunJournal.open(journal_id) if journal_id else RunJournal.create()
+        todo, carried = _plan_from_journal(testcases, journal, rerun_failed=bool(rerun_failed))
+        mode = "rerun-failed" if rerun_failed else ("resume" if resume else "new")
+        if incremental:
+            mode += "+incremental"
+        journal.record_start(mode, len(todo))
+        print(f"🧾 실행 ID: {journal.run_id} ({mode}) | 처리 대상 {len(todo)}건 / 이전 결과 재사용 {len(carried)}건")
+        print(f"   저널: {journal.path}")
+        
+        # 케이스 지문 (증분 모드면 지문이 같은 케이스는 이전 결과 재사용)
+        fingerprints = FingerprintIndex()
+        try:
+            components = system.fingerprint_components()
+        except Exception as e:
+            print(f"⚠️  지문 계산 실패, 증분 평가 없이 진행: {e}")
+            components, incremental = {}, False
+        reused_count = _apply_fingerprints(todo, components, fingerprints, incremental) if components else 0
+        if incremental:
+            print(f"♻️  증분 평가: 변경 없는 케이스 {reused_count}건 재사용 / 재평가 {len(todo) - reused_count}건")
         
         # 2. 전기차 RAG Agent를 통한 질의 및 Judge 평가 실행
+        #    answer → judge → persist 단계를 제한 큐로 연결 (단계별 동시성, 저장은 배치, 출력은 케이스 순서)
         print(f"\n2️⃣  전기차 RAG Agent로 질의 및 Judge 평가 실행")
-        results = []
-        
-        for i, tc in enumerate(testcases, 1):
-            print(f"\n[{i}/{len(testcases)}] 처리 중: {tc['case_id']}")
-            print(f"❓ 질문: {tc['question']}")
-            
-            # 전기차 RAG Agent로 답변 생성
-            try:
-                from ev_rag_agent import get_ev_agent
-                agent = get_ev_agent()
-                answer, _ = agent.answer(tc["question"]) 
-            except Exception as e:
-                print(f"RAG Agent 오류로 GPT-4o 직접 답변으로 폴백: {e}")
-                answer = system.generate_answer_with_gpt4o(tc["question"]) 
-            
-            # Judge로 평가
-            judge_result = system.judge_answer_with_gpt4o(tc["question"], answer)
-            
-            # 요약 출력 (답변 먼저, 평가 요약 나중에)
-            print(f"💡 답변: {answer[:100]}...")
-            print(f"⚖️ 평가 요약: {judge_result['score']}/5점 - {judge_result.get('reasoning', '')[:100]}...")
-            
-            
-            single_result = {
-                "case_id": tc["case_id"],
-                "question": tc["question"],
-                "answer": answer,
-                "judge_accuracy_score": judge_result["score"],
-                "reasoning": judge_result["reasoning"],
-                "trace_url": judge_result.get("trace_url")
-            }
-            
-            # 즉시 저장
-            print("💾 결과 즉시 저장 중...")
-            system.save_single_result_to_langsmith(single_result)
-            # 히스토리에도 누적
-            system.save_result_to_history(single_result)
-            results.append(single_result)
-            
-            # API 부하 방지를 위한 대기
-            time.sleep(1)
+        outcomes = []
+        if todo:
+            pipeline = StagedPipeline(build_evaluation_stages(system, workers, journal=journal,
+                                                              fingerprints=fingerprints, persist=not sharded))
+            outcomes = pipeline.run(todo, label=lambda tc: tc["case_id"])
+        else:
+            print("✅ 처리할 케이스가 없습니다. (모두 저장 완료)")
+        for o in outcomes:
+            if not o.ok and not (o.result and o.result.get("execution_id")):
+                journal.record_error(o.item["case_id"], o.error)
+        new_results = {o.item["case_id"]: o.result for o in outcomes if o.ok and o.result}
+        results = [new_results.get(tc["case_id"]) or carried.get(tc["case_id"]) for tc in testcases]
+        results = [r for r in results if r]
+        failed_cases = [(o.item["case_id"], o.error) for o in outcomes if not o.ok]
+        # 로컬 결과 저장소면 먼저 미러를 비워 이번 실행 결과의 저장 완료가 저널에 기록된 뒤 종료 기록
+        if not sharded:
+            system.flush_results_mirror()
+        journal.record_end({**journal.counts(), "results": len(results), "failed": len(failed_cases)})
         
         # 3. 처리 통계 요약
         success = len(results) > 0
         # 히스토리 데이터셋이 비어있다면 기존 결과를 백필하여 일관성 유지
-        if self := system:  # 명시적 참조 회피용
+        if not sharded:
             try:
-                if system._count_history_examples() == 0:
+                if system._history_is_empty():
                     system.backfill_history_from_results()
             except Exception:
                 pass
@@ -890,6 +1522,47 @@ def run_evaluation_only():
             print(f"  - 평균 점수: {sum(r['judge_accuracy_score'] for r in results) / len(results):.2f}/5")
             print(f"  - 최고 점수: {max(r['judge_accuracy_score'] for r in results)}/5")
             print(f"  - 최저 점수: {min(r['judge_accuracy_score'] for r in results)}/5")
+            if carried:
+                print(f"  - 이전 실행 결과 재사용: {len(carried)}개")
+            reused_total = sum(1 for r in results if r.get("reused"))
+            if reused_total:
+                print(f"  - 증분 평가 재사용(reused): {reused_total}개 / 재평가 {len(results) - reused_total}개")
+            if failed_cases:
+                print(f"  - 실패 케이스: {len(failed_cases)}개")
+                for case_id, error in failed_cases:
+                    print(f"    · {case_id}: {error[:120]}")
+            parse_failed = sum(1 for r in results if r.get("parse_failed") or r.get("error"))
+            if failed_cases or parse_failed:
+                print(f"  💡 실패/파싱 실패 케이스만 다시 실행: python new_project/real_implementation.py --rerun-failed {journal.run_id}")
+            print(f"🧩 구조화 출력 파싱 통계:")
+            print(PARSE_STATS.report())
+            if system.judge_mode == "batch":
+                print(f"📦 다건 Judge ({model_name('judge')}):")
+                print(BATCH_JUDGE_STATS.report())
+            if system.judge_mode == "cascade":
+                print(f"🪜 캐스케이드 Judge ({model_name('judge_mini')} → {model_name('judge')}):")
+                print(CASCADE_STATS.report())
+            if system.judge_mode == "consistency":
+                print(f"🎲 자기 일관성 Judge ({model_name('judge')}, temperature {system.consistency_policy.temperature}):")
+                print(CONSISTENCY_STATS.report())
+            if system.prescore_enabled:
+                print(f"🔎 기대 답변 사전 채점:")
+                print(PRESCORE_STATS.report())
+            if system.ragas_enabled:
+                print(f"📐 ragas 지표 ({ragas_model()}):")
+                print(RAGAS_STATS.report())
+            print(f"🚦 레이트 리미터 통계:")
+            print(get_scheduler().report())
+            print(f"🛡️  재시도/서킷 브레이커 통계:")
+            print(resilience_report())
+            if get_response_cache() is not None:
+                print(f"🗄️  응답 캐시 통계:")
+                print(get_response_cache().report())
+            if sharded:
+                group = journal.run_id.rsplit(".shard", 1)[0]
+                print(f"🧩 샤드 {shard_index}/{shards} 채점 완료 - 저장은 병합 단계에서 수행:")
+                print(f"  python new_project/real_implementation.py --merge-shards {group}")
+                return
             print("\n🎉 GPT-4o 평가가 성공적으로 완료되었습니다!")
             print("🔍 LangSmith에서 다음 데이터셋을 확인하세요:")
             print(f"  - 평가 결과: {system.result_dataset}")
@@ -899,7 +1572,348 @@ def run_evaluation_only():
     except Exception as e:
         print(f"❌ 평가 실행 중 오류: {e}")
 
+def merge_shard_runs(group: str) -> Dict[str, int]:
+    """
+    샤드 저널의 채점 완료·미저장 결과를 결과/히스토리 데이터셋에 저장 (정확히 한 번)
+
+    case_id 순서로 EVAL_PERSIST_BATCH 건씩 저장하고 저장된 결과를 각 샤드 저널에 저장 완료로 기록.
+    결과 예제/히스토리 ID가 execution_id 기반이므로 중단 후 다시 병합해도 중복 저장되지 않음
+
+    Returns:
+        {"shards", "pending", "saved", "failed", "errors"}
+    """
+    group = resolve_group(group)
+    journals = shard_journals(group)
+    pending = pending_results(journals)
+    errors = sum(1 for j in journals for st in j.states.values() if st.status == "error")
+    print(f"🧩 샤드 병합: {group} | 샤드 {len(journals)}개 | 저장 대기 {len(pending)}건 | 오류 {errors}건")
+    for j in journals:
+        print(f"  - {j.run_id}: {j.counts()}")
+    stats = {"shards": len(journals), "pending": len(pending), "saved": 0, "failed": 0, "errors": errors}
+    if not pending:
+        print("✅ 저장할 결과가 없습니다. (모두 병합 완료)")
+        return stats
+
+    system = RealAgentQASystem()
+    system.track_journals(journals)
+    fingerprints = FingerprintIndex()
+    order = {tc["case_id"]: n for n, tc in enumerate(system._sort_testcases_by_case_id(
+        [{"case_id": r["case_id"]} for _, r in pending]))}
+    results = sorted((r for _, r in pending), key=lambda r: (order[r["case_id"]], r.get("execution_id", "")))
+    chunk = max(1, int(os.getenv("EVAL_PERSIST_BATCH", "20")))
+    for start in range(0, len(results), chunk):
+        batch = results[start:start + chunk]
+        saved = system.persist_results(batch)
+        fingerprints.record(saved)
+        stats["saved"] += len(saved)
+        stats["failed"] += len(batch) - len(saved)
+        print(f"  [{min(start + chunk, len(results))}/{len(results)}] 저장 {len(saved)}건")
+    system.flush_results_mirror()
+    for j in journals:
+        j.record_end({**j.counts(), "merged": True})
+    print(f"✅ 샤드 병합 완료: 저장 {stats['saved']}건 / 실패 {stats['failed']}건"
+          + (" (실패 건은 --merge-shards 를 다시 실행하면 재시도)" if stats["failed"] else ""))
+    if errors:
+        print(f"💡 오류 케이스 재실행: python new_project/real_implementation.py --shards {len(journals)} "
+              f"--rerun-failed {group}")
+    return stats
+
+
+def _group_by_run(results: List[Dict]) -> Dict[str, List[Dict]]:
+    grouped: Dict[str, List[Dict]] = {}
+    for r in results:
+        grouped.setdefault(r["run_id"], []).append(r)
+    return grouped
+
+
+def run_sharded(shards: int, workers: Optional[int] = None, resume: Optional[str] = None,
+                rerun_failed: Optional[str] = None, incremental: Optional[bool] = None,
+                judge_mode: Optional[str] = None, prescore: Optional[bool] = None,
+                ragas: Optional[bool] = None) -> None:
+    """
+    로컬 런처: 샤드 워커 N개 프로세스로 평가 후 병합
+
+    재개/실패 재실행이면 같은 그룹의 샤드 저널을 이어서 사용
+    """
+    group = resolve_group(resume or rerun_failed) if (resume or rerun_failed) else new_journal_id()
+    extra: List[str] = []
+    if resume:
+        extra += ["--resume", group]
+    if rerun_failed:
+        extra += ["--rerun-failed", group]
+    if workers:
+        extra += ["--workers", str(workers)]
+    if incremental:
+        extra.append("--incremental")
+    if judge_mode:
+        extra += ["--judge-mode", judge_mode]
+    if prescore:
+        extra.append("--prescore")
+    if ragas:
+        extra.append("--ragas")
+    print(f"🚀 샤드 평가 시작: 그룹 {group} | 워커 프로세스 {shards}개")
+    codes = launch_local(shards, group, extra)
+    if any(codes):
+        print(f"⚠️  비정상 종료한 샤드가 있습니다 (로그: {runs_dir() / group}.shard*.log)")
+    merge_shard_runs(group)
+
+
 # OpenEvals 실행 로직 제거됨 (메뉴에서 삭제)
 
+def run_batch_file_command(action: str, phase: str, batch_id: Optional[str] = None,
+                           results_file: Optional[str] = None) -> Optional[str]:
+    """
+    배치 파일 평가 (OpenAI Batch API JSONL): export → submit/fetch 또는 fulfill-local → ingest
+
+    - answer 단계: 검색까지 로컬에서 수행해 답변 생성 요청을 내보내고, 수집한 답변은 작업 manifest에 보관
+    - judge 단계: 수집한 답변으로 Judge 요청을 내보내고, 수집 시 결과/히스토리 데이터셋에 저장
+      (실행 저널 run_id = 배치 작업 ID, execution_id 기반 고정 예제 ID → 여러 번 수집해도 한 번만 저장)
+
+    Args:
+        action: 'export' | 'submit' | 'fetch' | 'fulfill-local' | 'ingest'
+        phase: 'answer' | 'judge'
+        batch_id: 작업 ID ('latest' 가능, answer export는 생략 시 새 작업)
+        results_file: ingest할 결과 파일 (생략 시 작업 디렉터리의 <phase>_results.jsonl)
+
+    Returns:
+        작업 ID
+    """
+    try:
+        if action == "export" and phase == "answer" and not batch_id:
+            ws = BatchWorkspace.create()
+        else:
+            ws = BatchWorkspace.open(batch_id or "latest")
+        print(f"📦 배치 작업: {ws.batch_id} ({phase} / {action})")
+        print(f"   디렉터리: {ws.dir}")
+
+        if action == "submit":
+            provider_id = submit_batch(ws, phase)
+            print(f"✅ 제출 완료: {provider_id} (완료 후 --batch fetch --phase {phase} --batch-id {ws.batch_id})")
+        elif action == "fetch":
+            status = fetch_batch(ws, phase)
+            print(f"{'✅' if status == 'completed' else '⏳'} 배치 상태: {status}")
+            if status == "completed":
+                print(f"   결과 파일: {ws.results_path(phase)}")
+        elif action == "fulfill-local":
+            path = fulfill_locally(ws, phase)
+            print(f"🧪 로컬 대체 처리 완료 (네트워크 호출 없음): {path}")
+        elif action == "export":
+            _batch_export(ws, phase)
+        elif action == "ingest":
+            _batch_ingest(ws, phase, results_file)
+        else:
+            raise ValueError(f"알 수 없는 작업: {action}")
+        return ws.batch_id
+    except Exception as e:
+        print(f"❌ 배치 파일 평가 실패: {e}")
+        return None
+
+
+def _batch_export(ws: BatchWorkspace, phase: str) -> None:
+    system = RealAgentQASystem()
+    requests = []
+    if phase == "answer":
+        from ev_rag_agent import get_ev_agent
+        agent = get_ev_agent()
+        testcases = system._sort_testcases_by_case_id(system.get_testcases_from_langsmith())
+        for tc in testcases:
+            docs = agent.retrieve(tc["question"])
+            messages, citations = agent.build_messages(tc["question"], docs)
+            ws.cases.setdefault(tc["case_id"], {}).update({"question": tc["question"], "citations": citations})
+            requests.append(chat_request("answer", tc["case_id"], model_name("rag"), messages,
+                                         temperature=ROLE_DEFAULTS["rag"].get("temperature")))
+    else:
+        missing = [cid for cid, case in ws.cases.items() if not case.get("answer")]
+        for case_id, case in ws.cases.items():
+            if not case.get("answer"):
+                continue
+            messages = system.accuracy_judge_prompt.format_messages(question=case["question"], answer=case["answer"])
+            requests.append(chat_request("judge", case_id, model_name("judge"), messages, temperature=0,
+                                         response_format=json_schema_format(JudgeVerdict)))
+        if missing:
+            print(f"⚠️  답변이 없는 케이스 {len(missing)}건 제외 (answer 단계 ingest 필요): {', '.join(missing[:10])}")
+    path = ws.write_requests(phase, requests)
+    print(f"✅ {len(requests)}건 요청 내보내기 완료: {path}")
+    print(f"   다음: --batch submit --phase {phase} --batch-id {ws.batch_id} "
+          f"(오프라인 점검은 --batch fulfill-local)")
+
+
+def _batch_ingest(ws: BatchWorkspace, phase: str, results_file: Optional[str]) -> None:
+    parsed = ws.read_results(phase, results_file)
+    if phase == "answer":
+        ok = 0
+        for case_id, content, error, _ in parsed:
+            case = ws.cases.setdefault(case_id, {})
+            case["answer"], case["answer_error"] = (content, None) if error is None else (None, error)
+            ok += error is None
+        ws.phase("answer")["status"] = "ingested"
+        ws.save()
+        print(f"✅ 답변 수집: {ok}건 / 실패 {len(parsed) - ok}건")
+        print(f"   다음: --batch export --phase judge --batch-id {ws.batch_id}")
+        return
+
+    system = RealAgentQASystem()
+    journal = RunJournal(ws.batch_id)
+    system.track_journals([journal])
+    journal.record_start("batch-file", len(parsed))
+    pending: List[Dict] = []
+    skipped = failed = 0
+    for case_id, content, error, _ in parsed:
+        st = journal.state(case_id)
+        if st is not None and st.status == "persisted":
+            skipped += 1
+            continue
+        if st is not None and st.status == "judged":
+            pending.append(st.result)
+            continue
+        case = ws.cases.get(case_id)
+        if error is not None or not case:
+            journal.record_error(case_id, f"[batch] {error or 'manifest에 없는 케이스'}")
+            failed += 1
+            continue
+        try:
+            verdict = parse_with_schema(content, JudgeVerdict)
+            PARSE_STATS.record("judge_batchfile", "structured")
+            score = int(round(verdict.score))
+            judge_result = {"score": score if 0 <= score <= 5 else 0, "reasoning": verdict.reasoning or "평가 실패",
+                            "parse_failed": False}
+        except StructuredOutputError as e:
+            PARSE_STATS.record("judge_batchfile", "failed")
+            judge_result = {"score": 0, "reasoning": f"Judge 출력 파싱 실패: {e}", "parse_failed": True}
+        result = system._judge_record({"case_id": case_id, "question": case["question"]}, case["answer"],
+                                      judge_result, log=lambda *_: None)
+        result["run_id"] = journal.run_id
+        result["execution_id"] = journal.next_execution_id(case_id)
+        journal.record_judged(result)
+        pending.append(result)
+
+    batch_size = max(1, int(os.getenv("EVAL_PERSIST_BATCH", "20")))
+    saved_total = 0
+    for start in range(0, len(pending), batch_size):
+        saved = system.persist_results(pending[start:start + batch_size])
+        saved_total += len(saved)
+    system.flush_results_mirror()
+    journal.record_end({"ingested": saved_total, "skipped": skipped, "failed": failed})
+    ws.phase("judge")["status"] = "ingested"
+    ws.save()
+    print(f"✅ Judge 결과 수집: 저장 {saved_total}건 / 이미 저장됨 {skipped}건 / 실패 {failed}건 "
+          f"(저장 실패 {len(pending) - saved_total}건은 다시 ingest 하면 재시도)")
+    print(f"   실행 저널: {journal.path}")
+
+
+def results_store_command(action: str, output: Optional[str] = None) -> None:
+    """
+    로컬 결과 저장소 관리
+    - status: 저장 건수/미러 대기열 현황
+    - sync: 미러 대기열(실패 항목 포함)을 LangSmith에 반영
+    - export: Parquet 내보내기 (기본 .cache/results.parquet)
+    - import: LangSmith 결과 데이터셋의 기존 결과를 로컬로 가져오기 (웹 UI 조회용, 미러 완료로 기록)
+    """
+    store = get_results_store()
+    if action == "status":
+        print(f"🗃️  로컬 결과 저장소:")
+        print(store.report())
+        return
+    if action == "export":
+        path, rows = store.export_parquet(output or str(store.path.with_suffix(".parquet")))
+        print(f"✅ Parquet 내보내기: {rows}건 → {path}")
+        return
+    system = RealAgentQASystem()
+    if action == "sync":
+        retried = store.retry_failed()
+        if retried:
+            print(f"♻️  실패했던 미러 항목 {retried}건 재시도")
+        system.flush_results_mirror()
+        return
+    # import: 이 저장소에서 미러한 예제(execution_id 기반 ID)는 이미 로컬에 있으므로 제외
+    known = {str(result_example_id(eid)) for eid in store.execution_ids()}
+    imported = []
+    for ex in system.langsmith_client.list_examples(dataset_name=system.result_dataset):
+        metadata, outputs = ex.metadata or {}, ex.outputs or {}
+        if str(ex.id) in known or not metadata.get("case_id") or "judge_accuracy_score" not in outputs:
+            continue
+        imported.append({
+            **{k: metadata[k] for k in ("judge_model", "judge_tier", "prescore_rule", "judge_samples", *RAGAS_RESULT_KEYS)
+               if metadata.get(k) is not None},
+            "case_id": metadata["case_id"],
+            "question": (ex.inputs or {}).get("input") or metadata.get("question", ""),
+            "answer": outputs.get("answer", ""),
+            "judge_accuracy_score": outputs["judge_accuracy_score"],
+            "reasoning": outputs.get("judge_reasoning", ""),
+            "trace_url": outputs.get("trace_url"),
+            "reused": bool(metadata.get("reused")),
+            "execution_id": f"langsmith/{ex.id}",
+            "timestamp": ex.created_at.isoformat() if getattr(ex, "created_at", None) else None,
+        })
+    for r in imported:
+        if r["timestamp"] is None:
+            del r["timestamp"]
+    store.add(imported, mirrored=True)
+    print(f"✅ LangSmith 결과 {len(imported)}건을 로컬 저장소로 가져옴")
+    print(store.report())
+
+
+def _parse_args(argv: Optional[List[str]] = None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Agent QA 평가 실행 (인자 없이 실행하면 Excel → 평가 전체 파이프라인)")
+    parser.add_argument("--eval-only", action="store_true",
+                        help="Agent_QA_Scenario 데이터셋 평가만 실행 (메뉴 4번과 동일)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--resume", metavar="RUN_ID",
+                       help="중단된 실행 이어서 실행 (저장 완료 케이스 건너뜀, 'latest' 가능)")
+    group.add_argument("--rerun-failed", metavar="RUN_ID",
+                       help="해당 실행의 오류/파싱 실패 케이스만 다시 실행 ('latest' 가능)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="지문(질문/검색 인덱스/에이전트 설정/Judge 프롬프트)이 바뀐 케이스만 재평가")
+    parser.add_argument("--workers", type=int, default=None, help="단계별 동시 처리 수 (기본 EVAL_WORKERS)")
+    parser.add_argument("--judge-mode", choices=["single", "cascade", "batch", "consistency"], default=None,
+                        help="Judge 모드 (기본 JUDGE_MODE). cascade: judge_mini 먼저, 애매한 케이스만 judge로 승급 | "
+                             "batch: 여러 항목을 한 요청으로 채점 | consistency: 한 호출에서 n개 표본의 중앙값")
+    parser.add_argument("--prescore", action="store_true",
+                        help="기대 답변과 유사도로 사전 채점, 거의 일치/답변 거부 케이스는 Judge 생략 (기본 PRESCORE)")
+    parser.add_argument("--ragas", action="store_true",
+                        help="ragas 지표(faithfulness / answer_relevancy / context_precision)를 채점과 병행 계산 (기본 EVAL_RAGAS)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="샤드 수. --shard-index 없이 쓰면 로컬 워커 프로세스 N개 실행 후 병합")
+    parser.add_argument("--shard-index", type=int, default=None, help="샤드 워커로 실행할 샤드 번호 (0..N-1)")
+    parser.add_argument("--run-id", default=None, help="샤드 실행 그룹 ID (머신 여러 대에서 같은 값 사용)")
+    parser.add_argument("--merge-shards", metavar="GROUP",
+                        help="샤드 저널을 결과/히스토리 데이터셋에 병합 ('latest' 가능)")
+    parser.add_argument("--batch", choices=["export", "submit", "fetch", "fulfill-local", "ingest"],
+                        help="배치 파일 평가 (OpenAI Batch JSONL): export → submit/fetch 또는 fulfill-local → ingest")
+    parser.add_argument("--phase", choices=["answer", "judge"], default="judge", help="--batch 대상 단계 (기본 judge)")
+    parser.add_argument("--batch-id", default=None, help="--batch 작업 ID ('latest' 가능, answer export는 생략 시 새 작업)")
+    parser.add_argument("--results-file", default=None, help="--batch ingest 결과 파일 (기본 작업 디렉터리의 <phase>_results.jsonl)")
+    parser.add_argument("--compact-history", action="store_true",
+                        help="히스토리 실행 레코드를 케이스별 타임라인으로 압축하고 오래된 답변을 로컬 보관")
+    parser.add_argument("--keep-answers", type=int, default=HISTORY_KEEP_ANSWERS,
+                        help="압축 시 답변 원문을 남길 최근 실행 수 (기본 HISTORY_KEEP_ANSWERS)")
+    parser.add_argument("--dry-run", action="store_true", help="--compact-history 변경 없이 집계만")
+    parser.add_argument("--results-store", choices=["status", "sync", "export", "import"], default=None,
+                        help="로컬 결과 저장소: 현황 / LangSmith 미러 재반영 / Parquet 내보내기 / LangSmith 결과 가져오기")
+    parser.add_argument("--output", default=None, help="--results-store export 출력 경로 (기본 .cache/results.parquet)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
+    args = _parse_args()
+    if args.batch:
+        run_batch_file_command(args.batch, args.phase, batch_id=args.batch_id, results_file=args.results_file)
+    elif args.merge_shards:
+        merge_shard_runs(args.merge_shards)
+    elif args.shards and args.shards > 1 and args.shard_index is None:
+        run_sharded(args.shards, workers=args.workers, resume=args.resume, rerun_failed=args.rerun_failed,
+                    incremental=args.incremental or None, judge_mode=args.judge_mode,
+                    prescore=args.prescore or None, ragas=args.ragas or None)
+    elif args.results_store:
+        results_store_command(args.results_store, output=args.output)
+    elif args.compact_history:
+        RealAgentQASystem().compact_history(keep_answers=args.keep_answers, dry_run=args.dry_run)
+    elif (args.eval_only or args.resume or args.rerun_failed or args.incremental or args.judge_mode
+          or args.prescore or args.ragas):
+        run_evaluation_only(workers=args.workers, resume=args.resume, rerun_failed=args.rerun_failed,
+                            incremental=args.incremental or None, judge_mode=args.judge_mode,
+                            prescore=args.prescore or None, ragas=args.ragas or None,
+                            shards=args.shards, shard_index=args.shard_index, run_id=args.run_id)
+    else:
+        main()
@@ -0,0 +1,402 @@
+"""
+재시도 / 백오프 / 서킷 브레이커 / 데드라인 공통 계층
+- 지수 백오프 + full jitter 재시도 (Retry-After 헤더가 있으면 우선)
+- 멱등성 인지: 멱등이 아닌 호출은 요청이 서버에 도달하지 않았음이 확실한 오류에서만 재시도
+- 엔드포인트별 서킷 브레이커: 연속 실패 시 일정 시간 즉시 실패시켜 장애 중 API를 계속 두드리지 않음
+- 데드라인 전파: with deadline(초): 블록 안의 재시도 대기와 HTTP 타임아웃이 남은 시간을 넘지 않도록 제한
+
+LLM(OpenAI) 호출과 LangSmith 호출 모두 call_with_resilience 로 감쌉니다.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from rate_limiter import parse_retry_after
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# 서버가 요청을 처리하기 전에 거절한 것이 확실한 상태 코드 (비멱등 호출도 재시도 가능)
+NOT_PROCESSED_STATUS = {429, 503}
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출을 즉시 거부"""
+
+
+class DeadlineExceeded(Exception):
+    """데드라인 내에 호출을 완료할 수 없음"""
+
+
+# ---- 데드라인 ----
+
+_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("call_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]):
+    """블록 안의 모든 호출에 남은 시간 제한을 적용 (중첩 시 더 이른 데드라인 유지)"""
+    if not seconds:
+        yield
+        return
+    new = time.monotonic() + float(seconds)
+    current = _DEADLINE.get()
+    token = _DEADLINE.set(min(new, current) if current else new)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """현재 데드라인까지 남은 시간(초), 데드라인이 없으면 None"""
+    dl = _DEADLINE.get()
+    if dl is None:
+        return None
+    return dl - time.monotonic()
+
+
+def apply_deadline_to_request(request) -> None:
+    """httpx 요청 훅: 남은 데드라인이 요청 타임아웃보다 짧으면 타임아웃을 줄임"""
+    left = remaining_time()
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceeded("데드라인 초과로 요청을 보내지 않음")
+    timeout = dict(request.extensions.get("timeout") or {})
+    for key in ("connect", "read", "write", "pool"):
+        value = timeout.get(key)
+        timeout[key] = left if value is None else min(value, left)
+    request.extensions["timeout"] = timeout
+
+
+async def apply_deadline_to_request_async(request) -> None:
+    apply_deadline_to_request(request)
+
+
+# ---- 오류 분류 ----
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "status"):
+        code = getattr(exc, attr, None)
+        if isinstance(code, int):
+            return code
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_conflict(exc: BaseException) -> bool:
+    """409 Conflict (클라이언트가 지정한 ID의 리소스가 이미 존재)"""
+    if _status_code(exc) == 409:
+        return True
+    return any(cls.__name__ == "LangSmithConflictError" for cls in type(exc).__mro__)
+
+
+def is_not_found(exc: BaseException) -> bool:
+    """404 Not Found (삭제되었거나 존재하지 않는 리소스)"""
+    if _status_code(exc) == 404:
+        return True
+    return any(cls.__name__ == "LangSmithNotFoundError" for cls in type(exc).__mro__)
+
+
+def _is_connect_error(exc: BaseException) -> bool:
+    """연결 수립 실패 (요청 본문이 서버에 전달되지 않음)"""
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {"ConnectError", "ConnectTimeout", "PoolTimeout", "LangSmithConnectionError"})
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {
+        "APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException",
+        "RemoteProtocolError", "ConnectionError", "TimeoutError", "LangSmithConnectionError",
+    })
+
+
+def _is_cassette_miss(exc: BaseException) -> bool:
+    """재생 모드 카세트 미스 (SDK가 연결 오류로 감싸므로 원인 체인까지 확인)"""
+    seen = 0
+    while exc is not None and seen < 5:
+        if type(exc).__name__ == "CassetteMissError":
+            return True
+        exc = exc.__cause__ or exc.__context__
+        seen += 1
+    return False
+
+
+def is_retryable(exc: BaseException, idempotent: bool = True) -> bool:
+    """재시도 가능 여부 (비멱등 호출은 미처리가 확실한 경우만)"""
+    if isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    if _is_cassette_miss(exc):
+        return False
+    status = _status_code(exc)
+    if status is not None:
+        if idempotent:
+            return status in RETRYABLE_STATUS
+        return status in NOT_PROCESSED_STATUS
+    if idempotent:
+        return _is_transport_error(exc) or _is_connect_error(exc)
+    return _is_connect_error(exc)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    return parse_retry_after(headers) if headers is not None else None
+
+
+# ---- 서킷 브레이커 ----
+
+class CircuitBreaker:
+    """연속 실패 기반 서킷 브레이커 (closed → open → half-open)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_in_flight = False
+        self._trial_owner: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.half_open_in_flight:
+                # 시험 호출 1건만 통과
+                self.half_open_in_flight = True
+                self._trial_owner = threading.get_ident()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.half_open_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.half_open_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.half_open_in_flight:
+                    print(f"⛔ 서킷 열림: {self.name} (연속 실패 {self.failures}회, {self.reset_timeout:.0f}초간 차단)")
+                self.opened_at = time.monotonic()
+            self.half_open_in_flight = False
+
+    def release(self) -> None:
+        """결과 기록 없이 끝난 시험 호출(인터럽트 등)의 half-open 슬롯 반환 (슬롯을 잡은 스레드만)"""
+        with self._lock:
+            if self.half_open_in_flight and self._trial_owner == threading.get_ident():
+                self.half_open_in_flight = False
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint)
+            _BREAKERS[endpoint] = breaker
+        return breaker
+
+
+# ---- 재시도 ----
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+
+    def backoff(self, attempt: int) -> float:
+        """full jitter: [0, min(max_delay, base * 2^(attempt-1))]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+_STATS_LOCK = threading.Lock()
+RESILIENCE_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def _count(endpoint: str, key: str) -> None:
+    with _STATS_LOCK:
+        bucket = RESILIENCE_STATS.setdefault(endpoint, {"calls": 0, "retries": 0, "failures": 0, "rejected": 0})
+        bucket[key] += 1
+
+
+def call_with_resilience(endpoint: str,
+                         fn: Callable[..., T],
+                         *args: Any,
+                         idempotent: bool = True,
+                         conflict_ok: bool = False,
+                         policy: Optional[RetryPolicy] = None,
+                         **kwargs: Any) -> Optional[T]:
+    """
+    재시도/서킷 브레이커/데드라인을 적용해 fn(*args, **kwargs) 호출
+
+    Args:
+        endpoint: 서킷 브레이커/통계 키 (예: 'openai.chat', 'langsmith.create_example')
+        fn: 호출할 함수
+        idempotent: 멱등 호출 여부 (False면 미처리가 확실한 오류에서만 재시도)
+        conflict_ok: 재시도 중 409(이미 생성됨)를 성공으로 간주하고 None 반환
+                     (클라이언트가 지정한 ID로 생성하는 호출에 사용)
+        policy: 재시도 정책
+
+    Raises:
+        CircuitOpenError, DeadlineExceeded, 또는 마지막 원본 예외
+    """
+    policy = policy or DEFAULT_POLICY
+    breaker = get_breaker(endpoint)
+    _count(endpoint, "calls")
+    attempt = 0
+    while True:
+        attempt += 1
+        left = remaining_time()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(f"{endpoint} 데드라인 초과")
+        if not breaker.allow():
+            _count(endpoint, "rejected")
+            raise CircuitOpenError(f"{endpoint} 서킷이 열려 있어 호출을 건너뜁니다")
+        try:
+            result = fn(*args, **kwargs)
+            breaker.record_success()
+            return result
+        except Exception as exc:
+            status = _status_code(exc)
+            # 409(이미 존재)/404(없음)는 서버가 정상 응답한 예상 결과: 상태 코드 없이 클래스 이름으로만
+            # 구분되는 LangSmith 예외도 있으므로 서킷 판정 전에 먼저 분류하고 실패로 세지 않음
+            if is_conflict(exc) or is_not_found(exc):
+                breaker.record_success()
+                if conflict_ok and attempt > 1 and is_conflict(exc):
+                    return None
+                raise
+            retryable = is_retryable(exc, idempotent=idempotent)
+            # 4xx(요청 자체 문제)는 서버가 정상 응답한 것이므로 서킷 입장에서는 성공
+            if retryable or status is None or status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if not retryable or attempt >= policy.max_attempts:
+                _count(endpoint, "failures")
+                raise
+            delay = _retry_after(exc)
+            delay = min(delay, policy.max_delay) if delay is not None else policy.backoff(attempt)
+            left = remaining_time()
+            if left is not None and delay >= left:
+                _count(endpoint, "failures")
+                raise DeadlineExceeded(f"{endpoint} 재시도 대기({delay:.1f}s)가 남은 데드라인({left:.1f}s)을 초과") from exc
+            _count(endpoint, "retries")
+            time.sleep(delay)
+        finally:
+            # 어떤 경로로 끝나든 half-open 시험 슬롯이 잠긴 채 남지 않도록 반환
+            breaker.release()
+
+
+def resilient(endpoint: str, idempotent: bool = True, conflict_ok: bool = False):
+    """call_with_resilience 데코레이터 버전"""
+    def decorator(fn: Callable[..., T]) -> Callable[..., Optional[T]]:
+        def wrapper(*args: Any, **kwargs: Any) -> Optional[T]:
+            return call_with_resilience(endpoint, fn, *args, idempotent=idempotent,
+                                        conflict_ok=conflict_ok, **kwargs)
+        wrapper.__name__ = getattr(fn, "__name__", "wrapper")
+        wrapper.__doc__ = getattr(fn, "__doc__", None)
+        return wrapper
+    return decorator
+
+
+def report() -> str:
+    with _STATS_LOCK:
+        snap = {k: dict(v) for k, v in RESILIENCE_STATS.items()}
+    if not snap:
+        return "  - 기록 없음"
+    lines = []
+    for name, c in sorted(snap.items()):
+        lines.append(
+            f"  - {name}: 호출 {c['calls']} | 재시도 {c['retries']} | 실패 {c['failures']} | "
+            f"서킷 차단 {c['rejected']} | 상태 {get_breaker(name).state}"
+        )
+    return "\n".join(lines)
+
+
+# ---- LangSmith 클라이언트 래퍼 ----
+
+class ResilientLangSmithClient:
+    """
+    LangSmith Client 프록시: 모든 메서드 호출에 call_with_resilience 적용
+
+    - list_* 메서드는 지연 제너레이터 대신 리스트로 받아 재시도 범위 안에서 완전히 소비
+    - create_example / create_examples / create_run 은 클라이언트 측 ID를 미리 발급해 멱등 호출로 만들고,
+      재시도 중 409(이미 생성됨)는 성공으로 간주
+    - 그 외 create_* / delete_* 는 비멱등으로 취급
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    @property
+    def raw(self):
+        return self._client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        endpoint = f"langsmith.{name}"
+
+        def wrapped(*args: Any, **kwargs: Any):
+            if name == "create_example" and not kwargs.get("example_id"):
+                kwargs["example_id"] = uuid.uuid4()
+            if name == "create_run" and not kwargs.get("id"):
+                kwargs["id"] = uuid.uuid4()
+            if name == "create_examples" and kwargs.get("inputs") is not None and not kwargs.get("ids"):
+                kwargs["ids"] = [uuid.uuid4() for _ in kwargs["inputs"]]
+            if name.startswith("list_"):
+                return call_with_resilience(endpoint, lambda: list(attr(*args, **kwargs)))
+            idempotent_creates = ("create_example", "create_examples", "create_run")
+            idempotent = not name.startswith(("create_", "delete_")) or name in idempotent_creates
+            conflict_ok = name in idempotent_creates
+            return call_with_resilience(endpoint, attr, *args, idempotent=idempotent,
+                                        conflict_ok=conflict_ok, **kwargs)
+
+        return wrapped
+
+
+def wrap_langsmith_client(client) -> ResilientLangSmithClient:
+    return client if isinstance(client, ResilientLangSmithClient) else ResilientLangSmithClient(client)
+
+
+def llm_endpoint(llm, kind: str = "chat") -> str:
+    """LLM 호출용 서킷 브레이커 키 (모델 단위)"""
+    name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or "unknown"
+    return f"openai.{kind}/{name}"
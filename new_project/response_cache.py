@@ -0,0 +1,210 @@
+"""
+결정적(temperature 0) LLM 응답 디스크 캐시
+- SQLite 기반 LangChain BaseCache 구현: 모델 + 호출 파라미터 + 렌더링된 메시지로 키 생성
+  (Judge 프롬프트가 바뀌면 렌더링 결과가 달라지므로 자동으로 새 키가 됨)
+- 크기 상한을 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+- 바이패스: 환경변수 LLM_CACHE_BYPASS=1 (조회만 건너뛰고 결과는 갱신)
+- 파싱 실패 응답 제거: with track_cache_entries() as keys: 블록에서 조회/저장된 키를 모아 두었다가
+  구조화 출력 파싱이 실패하면 discard_cache_entries(keys) 로 삭제 (--rerun-failed 가 같은 출력을 다시 받지 않도록)
+  (표본마다 다른 응답이 필요한 호출은 get_chat_model(..., cache=False) 로 캐시 자체를 붙이지 않음)
+
+동일한 (프롬프트 버전, 질문, 답변) 재채점과 분류 호출이 비용 없이 즉시 반환됩니다.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "llm_responses.sqlite"
+
+# 현재 호출 흐름에서 조회 적중/저장된 키 (LangChain 실행기 스레드에도 컨텍스트가 복사되므로 같은 리스트를 공유)
+_TRACKED: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("llm_cache_tracked", default=None)
+
+
+def _track(key: str) -> None:
+    keys = _TRACKED.get()
+    if keys is not None:
+        keys.append(key)
+
+
+def _bypass_active() -> bool:
+    return os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+
+def _model_from_llm_string(llm_string: str) -> str:
+    m = re.search(r"['\"]model_name['\"]\s*[:,]\s*['\"]([^'\"]+)['\"]", llm_string) or \
+        re.search(r"['\"]model['\"]\s*[:,]\s*['\"]([^'\"]+)['\"]", llm_string)
+    return m.group(1) if m else "unknown"
+
+
+class SQLiteResponseCache(BaseCache):
+    """크기 기반 LRU 삭제를 지원하는 SQLite 응답 캐시 (스레드 안전)"""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path: SQLite 파일 경로 (기본: LLM_CACHE_PATH 또는 new_project/.cache/llm_responses.sqlite)
+            max_bytes: 캐시 크기 상한 (기본: LLM_CACHE_MAX_MB, 256MB)
+        """
+        self.path = Path(path or os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                prompt_hash TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "evicted": 0, "discarded": 0}
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{llm_string}\n{prompt_hash}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if _bypass_active():
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return None
+        key = self.make_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.stats["hits"] += 1
+        _track(key)
+        try:
+            return loads(row[0])
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self.make_key(prompt, llm_string)
+        try:
+            value = dumps(list(return_val))
+        except Exception:
+            return
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, model, prompt_hash, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, _model_from_llm_string(llm_string), prompt_hash, value, size, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+        _track(key)
+
+    def discard(self, keys: Iterable[str]) -> int:
+        """지정한 키의 항목 삭제 (파싱에 실패한 응답을 다시 재생하지 않도록), 삭제 건수 반환"""
+        removed = 0
+        with self._lock:
+            for key in set(keys):
+                row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= row[0]
+                removed += 1
+            self.stats["discarded"] += removed
+        return removed
+
+    def _evict_locked(self) -> None:
+        """상한의 90%까지 최근 사용이 가장 오래된 항목부터 삭제"""
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 200"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats["evicted"] += 1
+                if self._total_bytes <= target:
+                    break
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def report(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+            total_bytes = self._total_bytes
+        total = s["hits"] + s["misses"]
+        rate = (s["hits"] / total * 100) if total else 0.0
+        return (f"  - 적중 {s['hits']} / 미스 {s['misses']} (적중률 {rate:.1f}%) | 바이패스 {s['bypassed']} | "
+                f"삭제 {s['evicted']} | 파싱 실패 제거 {s['discarded']} | 크기 {total_bytes / 1024 / 1024:.1f}MB / {self.max_bytes / 1024 / 1024:.0f}MB")
+
+
+_CACHE: Optional[SQLiteResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[SQLiteResponseCache]:
+    """프로세스 공유 응답 캐시 (LLM_CACHE_DISABLED=1 이면 None)"""
+    global _CACHE
+    if os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                _CACHE = SQLiteResponseCache()
+            except Exception as e:
+                print(f"⚠️  응답 캐시 초기화 실패, 캐시 없이 진행: {e}")
+                return None
+        return _CACHE
+
+
+@contextlib.contextmanager
+def track_cache_entries():
+    """블록 안에서 조회 적중/저장된 응답 캐시 키 목록을 모음 (discard_cache_entries 와 함께 사용)"""
+    keys: List[str] = []
+    token = _TRACKED.set(keys)
+    try:
+        yield keys
+    finally:
+        _TRACKED.reset(token)
+
+
+def discard_cache_entries(keys: Iterable[str]) -> int:
+    """track_cache_entries 로 모은 키의 캐시 항목 삭제 (캐시 비활성화면 0)"""
+    keys = list(keys)
+    cache = get_response_cache() if keys else None
+    return cache.discard(keys) if cache is not None else 0
@@ -0,0 +1,409 @@
+"""
+로컬 평가 결과 저장소 (SQLite) + LangSmith 비동기 미러
+- 평가 결과는 먼저 로컬 SQLite(.cache/results.sqlite)에 저장 → 평가 처리량이 LangSmith 지연과 무관
+- 같은 트랜잭션에서 미러 대기열(outbox)에 결과 데이터셋/히스토리 항목을 추가하고,
+  백그라운드 미러 스레드가 묶음으로 LangSmith에 반영 (실패 시 다음 주기에 재시도, RESULTS_MIRROR_MAX_ATTEMPTS 초과 시 failed)
+- LangSmith 예제 ID는 execution_id 기반 결정적 ID이므로 미러가 중단/재시작돼도 중복 생성 없음
+- 웹 UI 조회는 로컬 저장소에서 (결과 목록, 케이스별 점수 추이)
+- 분석용 Parquet 내보내기 (export_parquet, pyarrow 필요)
+
+테이블
+    results(execution_id PK, case_id, run_id, question, answer, score, reasoning, trace_url, judge_model,
+            reused, created_at, payload)          # payload = 결과 레코드 전체 JSON
+    mirror(execution_id, target, status, attempts, last_error, updated_at)   # target: result | history
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_STORE_PATH = Path(__file__).parent / ".cache" / "results.sqlite"
+MIRROR_TARGETS = ("result", "history")
+
+_COLUMNS = ("execution_id", "case_id", "run_id", "question", "answer", "score", "reasoning", "trace_url",
+            "judge_model", "reused", "created_at", "payload")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_timestamp(value) -> str:
+    """
+    시각 → UTC ISO 문자열 (정렬/비교용)
+    로컬에서 만든 naive ISO 문자열(datetime.now().isoformat())은 로컬 시간대로 보고, LangSmith의 tz-aware 시각과 같은 기준으로 맞춤
+    """
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        try:
+            moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            return str(value or "")
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.astimezone(timezone.utc).isoformat()
+
+
+def results_store_enabled() -> bool:
+    """RESULTS_STORE=local(기본)이면 로컬 저장소가 1차 저장소, langsmith면 기존처럼 LangSmith에 직접 저장"""
+    return os.getenv("RESULTS_STORE", "local").lower() != "langsmith"
+
+
+class ResultsStore:
+    """평가 결과 SQLite 저장소 (스레드 안전, 여러 프로세스는 WAL로 공유)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("RESULTS_STORE_PATH") or DEFAULT_STORE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                execution_id TEXT PRIMARY KEY,
+                case_id TEXT NOT NULL,
+                run_id TEXT,
+                question TEXT,
+                answer TEXT,
+                score INTEGER,
+                reasoning TEXT,
+                trace_url TEXT,
+                judge_model TEXT,
+                reused INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                payload TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_case ON results(case_id, created_at)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS mirror (
+                execution_id TEXT NOT NULL,
+                target TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (execution_id, target)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_mirror_status ON mirror(target, status, updated_at)")
+        # 이전 버전이 저장한 naive 로컬 시각을 UTC 기준으로 변환 (정렬 기준 통일)
+        stale = self._conn.execute("SELECT execution_id, created_at FROM results WHERE created_at NOT LIKE '%+00:00'").fetchall()
+        if stale:
+            self._conn.executemany("UPDATE results SET created_at = ? WHERE execution_id = ?",
+                                   [(normalize_timestamp(ts), eid) for eid, ts in stale])
+
+    # -- 쓰기 --
+
+    def add(self, results: Iterable[Dict], mirrored: bool = False) -> int:
+        """
+        결과 저장 + 미러 대기열 등록 (한 트랜잭션, 같은 execution_id는 덮어씀)
+
+        Args:
+            mirrored: True면 이미 LangSmith에 있는 결과 (가져오기) → 미러 대기열에 완료로 기록
+
+        Returns:
+            저장 건수 (execution_id/timestamp가 없던 결과에는 값을 채워 넣음)
+        """
+        now = time.time()
+        rows, queue = [], []
+        for r in results:
+            # 저널 없이 저장하는 결과도 미러/조회 키가 필요하므로 실행 ID를 부여하고,
+            # 미러가 나중에 반영해도 실행 시각이 바뀌지 않도록 저장 시각을 결과에 고정
+            execution_id = r.setdefault("execution_id", f"local/{uuid.uuid4()}")
+            r["timestamp"] = normalize_timestamp(r.get("timestamp") or datetime.now(timezone.utc))
+            rows.append((
+                execution_id, r["case_id"], r.get("run_id"), r.get("question", ""), r.get("answer", ""),
+                int(r["judge_accuracy_score"]), r.get("reasoning", ""), r.get("trace_url"), r.get("judge_model"),
+                int(bool(r.get("reused"))), r["timestamp"],
+                json.dumps({k: v for k, v in r.items() if not k.startswith("_")}, ensure_ascii=False, default=str),
+            ))
+            status = "done" if mirrored else "pending"
+            queue.append((execution_id, "result", status, now))
+            # 증분 평가로 재사용한 결과는 새 실행이 아니므로 히스토리에 누적하지 않음
+            if not r.get("reused"):
+                queue.append((execution_id, "history", status, now))
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO results({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    rows)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO mirror(execution_id, target, status, updated_at) VALUES (?, ?, ?, ?)", queue)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def pending(self, target: str, limit: int = 100, max_attempts: int = 5) -> List[Dict]:
+        """미러 대기 중인 결과 (오래된 순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.payload FROM mirror m JOIN results r ON r.execution_id = m.execution_id "
+                "WHERE m.target = ? AND m.status = 'pending' AND m.attempts < ? ORDER BY m.updated_at, r.created_at LIMIT ?",
+                (target, max_attempts, limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def mark_mirrored(self, target: str, execution_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE mirror SET status = 'done', last_error = NULL, updated_at = ? WHERE execution_id = ? AND target = ?",
+                [(time.time(), eid, target) for eid in execution_ids])
+
+    def mark_failed(self, target: str, execution_ids: List[str], error: str, max_attempts: int = 5) -> None:
+        """실패 횟수 증가 (max_attempts 도달 시 failed, 아니면 다음 주기에 재시도)"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE mirror SET attempts = attempts + 1, last_error = ?, updated_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE execution_id = ? AND target = ?",
+                [(error[:500], time.time(), max_attempts, eid, target) for eid in execution_ids])
+
+    def fully_mirrored(self, execution_ids: List[str]) -> List[str]:
+        """결과/히스토리 미러가 모두 끝난 execution_id"""
+        if not execution_ids:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT execution_id FROM mirror WHERE execution_id IN ({', '.join('?' * len(execution_ids))}) "
+                "GROUP BY execution_id HAVING SUM(status != 'done') = 0", list(execution_ids)).fetchall()
+        return [r[0] for r in rows]
+
+    def retry_failed(self) -> int:
+        """failed 항목을 다시 대기열로 (수동 재동기화)"""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE mirror SET status = 'pending', attempts = 0, updated_at = ? WHERE status = 'failed'", (time.time(),))
+            return cur.rowcount
+
+    # -- 읽기 --
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def execution_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT execution_id FROM results")]
+
+    def mirror_counts(self) -> Dict[str, Dict[str, int]]:
+        """{target: {status: 건수}}"""
+        counts: Dict[str, Dict[str, int]] = {t: {} for t in MIRROR_TARGETS}
+        with self._lock:
+            for target, status, n in self._conn.execute(
+                    "SELECT target, status, COUNT(*) FROM mirror GROUP BY target, status"):
+                counts.setdefault(target, {})[status] = n
+        return counts
+
+    def list_results(self, limit: Optional[int] = None) -> List[Dict]:
+        """결과 목록 (오래된 순, 결과 데이터셋과 같은 단위)"""
+        sql = ("SELECT case_id, question, answer, score, trace_url, created_at, execution_id FROM results "
+               "ORDER BY created_at" + (f" LIMIT {int(limit)}" if limit else ""))
+        with self._lock:
+            rows = self._conn.execute(sql).fetchall()
+        keys = ("case_id", "question", "answer", "score", "trace_url", "timestamp", "execution_id")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def case_ids(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT case_id FROM results WHERE reused = 0").fetchall()
+        return sorted(r[0] for r in rows)
+
+    def case_timeline(self, case_id: str) -> Dict:
+        """케이스별 실행 이력 (history_store.build_timeline 과 같은 형식: {"question", "entries"})"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question, score, answer, reasoning, created_at, trace_url, execution_id FROM results "
+                "WHERE case_id = ? AND reused = 0 ORDER BY created_at", (case_id,)).fetchall()
+        entries = [{"score": score, "answer": answer, "reasoning": reasoning, "timestamp": ts,
+                    "trace_url": trace_url or "", "execution_id": eid}
+                   for _, score, answer, reasoning, ts, trace_url, eid in rows]
+        return {"question": rows[-1][0] if rows else "", "entries": entries}
+
+    def export_parquet(self, path: str) -> Tuple[Path, int]:
+        """results 테이블 → Parquet (payload의 부가 필드는 컬럼으로 펼침, pyarrow 필요)"""
+        import pandas as pd
+
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT {', '.join(_COLUMNS)} FROM results ORDER BY created_at", self._conn)
+        if len(df):
+            extra = pd.json_normalize([json.loads(p) for p in df["payload"]])
+            extra = extra[[c for c in extra.columns if c not in df.columns]]
+            for c in extra.columns:
+                # 표본 점수 목록 등 중첩 값은 JSON 문자열로 (Parquet 컬럼 타입 고정)
+                if extra[c].map(lambda v: isinstance(v, (list, dict))).any():
+                    extra[c] = extra[c].map(lambda v: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v)
+            df = pd.concat([df.drop(columns=["payload"]), extra], axis=1)
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(out, index=False)
+        return out, len(df)
+
+    def report(self) -> str:
+        counts = self.mirror_counts()
+        mirror = " | ".join(f"{t}: " + ", ".join(f"{s} {n}" for s, n in sorted(c.items())) if c else f"{t}: -"
+                            for t, c in counts.items())
+        return f"  - 로컬 결과 {self.count()}건 ({self.path}) | 미러 {mirror}"
+
+
+class ResultsMirror:
+    """미러 대기열을 주기적으로 LangSmith에 반영하는 백그라운드 스레드"""
+
+    def __init__(self, store: ResultsStore,
+                 push_results: Callable[[List[Dict]], List[Dict]],
+                 push_history: Callable[[Dict], bool],
+                 batch_size: Optional[int] = None, interval: Optional[float] = None,
+                 max_attempts: Optional[int] = None, log: Callable[[str], None] = print,
+                 on_mirrored: Optional[Callable[[List[Dict]], None]] = None):
+        """
+        Args:
+            push_results: 결과 목록을 결과 데이터셋에 저장하고 저장된 결과 목록 반환
+            push_history: 결과 1건을 히스토리에 저장하고 성공 여부 반환
+            on_mirrored: 결과/히스토리 반영이 모두 끝난 결과 목록을 받는 콜백 (실행 저널 저장 완료 기록)
+        """
+        self.store = store
+        self.push_results = push_results
+        self.push_history = push_history
+        self.batch_size = batch_size or int(_env_float("RESULTS_MIRROR_BATCH", 50))
+        self.interval = interval if interval is not None else _env_float("RESULTS_MIRROR_INTERVAL", 2.0)
+        self.max_attempts = max_attempts or int(_env_float("RESULTS_MIRROR_MAX_ATTEMPTS", 5))
+        self.log = log
+        self.on_mirrored = on_mirrored
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"result": 0, "history": 0, "failed": 0}
+
+    def start(self) -> "ResultsMirror":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop = False
+                self._thread = threading.Thread(target=self._run, name="results-mirror", daemon=True)
+                self._thread.start()
+        return self
+
+    def wake(self) -> None:
+        self._idle.clear()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop:
+            try:
+                busy = self.sync_once()
+            except Exception as e:
+                self.log(f"⚠️  LangSmith 미러 오류 (다음 주기에 재시도): {e}")
+                busy = 0
+            if not busy:
+                self._idle.set()
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+    def sync_once(self) -> int:
+        """대기열 한 묶음씩 반영 (결과 → 히스토리 순), 반영 성공 건수 반환 (0이면 다음 주기까지 대기)"""
+        processed = 0
+        touched: Dict[str, Dict] = {}
+        batch = self.store.pending("result", self.batch_size, self.max_attempts)
+        if batch:
+            try:
+                saved = self.push_results(batch)
+            except Exception as e:
+                saved, error = [], str(e)
+            else:
+                error = "결과 데이터셋 저장 실패"
+            saved_ids = {r["execution_id"] for r in saved}
+            self.store.mark_mirrored("result", list(saved_ids))
+            failed = [r["execution_id"] for r in batch if r["execution_id"] not in saved_ids]
+            if failed:
+                self.store.mark_failed("result", failed, error, self.max_attempts)
+                self.log(f"⚠️  LangSmith 미러: 결과 {len(failed)}건 반영 실패 (다음 주기에 재시도): {error}")
+            self.stats["result"] += len(saved_ids)
+            self.stats["failed"] += len(failed)
+            processed += len(saved_ids)
+            touched.update({r["execution_id"]: r for r in batch if r["execution_id"] in saved_ids})
+        for r in self.store.pending("history", self.batch_size, self.max_attempts):
+            try:
+                ok = self.push_history(r)
+            except Exception:
+                ok = False
+            if ok:
+                self.store.mark_mirrored("history", [r["execution_id"]])
+                self.stats["history"] += 1
+                processed += 1
+                touched[r["execution_id"]] = r
+            else:
+                self.store.mark_failed("history", [r["execution_id"]], "히스토리 저장 실패", self.max_attempts)
+                self.stats["failed"] += 1
+        if touched and self.on_mirrored is not None:
+            done = self.store.fully_mirrored(list(touched))
+            if done:
+                try:
+                    self.on_mirrored([touched[eid] for eid in done])
+                except Exception as e:
+                    self.log(f"⚠️  미러 완료 기록 실패: {e}")
+        return processed
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        대기열이 빌 때까지 대기 (스레드가 없으면 현재 스레드에서 직접 반영)
+
+        Returns:
+            대기열을 모두 비웠으면 True (시간 초과/재시도 대기 항목이 남으면 False)
+        """
+        timeout = timeout if timeout is not None else _env_float("RESULTS_MIRROR_DRAIN_TIMEOUT", 300)
+        deadline_at = time.monotonic() + timeout
+        while time.monotonic() < deadline_at:
+            if self._thread is None or not self._thread.is_alive():
+                if not self.sync_once():
+                    break
+                continue
+            self.wake()
+            self._idle.wait(max(0.0, min(self.interval + 1, deadline_at - time.monotonic())))
+            if self._idle.is_set() and not self._has_pending():
+                break
+        return not self._has_pending()
+
+    def _has_pending(self) -> bool:
+        counts = self.store.mirror_counts()
+        return any(c.get("pending", 0) for c in counts.values())
+
+    def stop(self) -> None:
+        self._stop = True
+        self._wake.set()
+
+    def report(self) -> str:
+        s = self.stats
+        return f"  - 이번 실행 미러: 결과 {s['result']}건 / 히스토리 {s['history']}건 / 실패 시도 {s['failed']}건"
+
+
+_STORE: Optional[ResultsStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_results_store() -> ResultsStore:
+    """프로세스 공유 로컬 결과 저장소"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ResultsStore()
+        return _STORE
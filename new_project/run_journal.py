@@ -0,0 +1,198 @@
+"""
+평가 실행(run) 저널
+- 실행마다 run_id를 발급하고, 케이스 진행 상황을 로컬 append-only JSONL 파일에 기록
+- 중단된 실행을 --resume <run_id> 로 이어서 실행 (완료 케이스 건너뜀, 채점까지 끝난 케이스는 저장만 재시도)
+- --rerun-failed <run_id> 로 오류/파싱 실패 케이스만 다시 실행
+
+레코드 종류 (한 줄에 JSON 1개, 같은 케이스는 마지막 레코드가 유효)
+    {"type": "start",     "run_id", "ts", "mode", "total"}
+    {"type": "judged",    "case_id", "attempt", "execution_id", "result"}   # 답변+채점 완료 (저장 전)
+    {"type": "persisted", "case_id", "execution_id"}                        # 결과/히스토리 저장 완료
+    {"type": "error",     "case_id", "error"}                               # 케이스 처리 실패
+    {"type": "end",       "ts", "summary"}
+
+execution_id(= run_id/case_id/attempt)는 결과 예제 ID와 히스토리 중복 방지 키로 쓰여,
+재개 시 같은 결과가 두 번 저장되지 않습니다.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_RUNS_DIR = Path(__file__).parent / ".runs"
+
+
+def runs_dir() -> Path:
+    return Path(os.getenv("EVAL_RUNS_DIR") or DEFAULT_RUNS_DIR)
+
+
+def new_run_id() -> str:
+    """시간 순 정렬 가능한 run_id (예: 20261018-153000-1a2b)"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+
+
+def latest_run_id() -> Optional[str]:
+    """가장 최근 실행의 run_id (샤드 저널 <group>.shard<i>of<N> 제외)"""
+    paths = sorted(p for p in runs_dir().glob("*.jsonl") if ".shard" not in p.stem)
+    return paths[-1].stem if paths else None
+
+
+def result_example_id(execution_id: Optional[str]) -> Optional[uuid.UUID]:
+    """execution_id에서 결정적인 결과 예제 ID 생성 (재시도/재개 시 중복 생성 방지)"""
+    if not execution_id:
+        return None
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"agent-qa-result/{execution_id}")
+
+
+class CaseState:
+    """저널을 재생해 얻은 케이스 1건의 최신 상태"""
+
+    def __init__(self, case_id: str):
+        self.case_id = case_id
+        self.status = "pending"        # pending | judged | persisted | error
+        self.attempt = 0
+        self.execution_id: Optional[str] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        """재실행 대상: 처리 오류, Judge 호출 오류(0점 처리) 또는 Judge 출력 파싱 실패"""
+        if self.status == "error":
+            return True
+        return bool(self.result and (self.result.get("parse_failed") or self.result.get("error")))
+
+
+class RunJournal:
+    """append-only JSONL 실행 저널 (스레드 안전)"""
+
+    def __init__(self, run_id: str, directory: Optional[Path] = None):
+        self.run_id = run_id
+        self.path = Path(directory or runs_dir()) / f"{run_id}.jsonl"
+        self._lock = threading.Lock()
+        self.states: Dict[str, CaseState] = {}
+        self.started_at: Optional[str] = None
+        self._tail_checked = False
+        if self.path.exists():
+            self._replay()
+
+    @classmethod
+    def create(cls, run_id: Optional[str] = None) -> "RunJournal":
+        return cls(run_id or new_run_id())
+
+    @classmethod
+    def open(cls, run_id: str) -> "RunJournal":
+        """기존 실행 저널 열기 ('latest' 는 가장 최근 실행)"""
+        if run_id == "latest":
+            run_id = latest_run_id() or ""
+        journal = cls(run_id)
+        if not run_id or not journal.path.exists():
+            raise FileNotFoundError(f"실행 저널을 찾을 수 없습니다: {run_id or '(없음)'} ({runs_dir()})")
+        return journal
+
+    # -- 재생 --
+
+    def _replay(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    # 중단 시점에 잘린 마지막 줄은 무시
+                    continue
+                self._apply(rec)
+
+    def _apply(self, rec: Dict) -> None:
+        kind = rec.get("type")
+        if kind == "start":
+            self.started_at = self.started_at or rec.get("ts")
+            return
+        case_id = rec.get("case_id")
+        if not case_id:
+            return
+        state = self.states.setdefault(case_id, CaseState(case_id))
+        if kind == "judged":
+            state.status = "judged"
+            state.attempt = rec.get("attempt", state.attempt + 1)
+            state.execution_id = rec.get("execution_id")
+            state.result = rec.get("result")
+            state.error = None
+        elif kind == "persisted":
+            if rec.get("execution_id") == state.execution_id:
+                state.status = "persisted"
+        elif kind == "error":
+            state.status = "error"
+            state.error = rec.get("error")
+
+    # -- 기록 --
+
+    def _append(self, rec: Dict) -> None:
+        rec.setdefault("ts", datetime.now().isoformat())
+        line = json.dumps(rec, ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if not self._tail_checked:
+                self._repair_tail()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(rec)
+
+    def _repair_tail(self) -> None:
+        """중단으로 잘린 마지막 줄 뒤에 이어 쓰지 않도록 줄바꿈 보정"""
+        self._tail_checked = True
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def record_start(self, mode: str, total: int) -> None:
+        self._append({"type": "start", "run_id": self.run_id, "mode": mode, "total": total})
+
+    def next_execution_id(self, case_id: str) -> str:
+        """새 답변/채점 시도에 쓸 execution_id"""
+        with self._lock:
+            state = self.states.get(case_id)
+            attempt = (state.attempt if state else 0) + 1
+        return f"{self.run_id}/{case_id}/{attempt}"
+
+    def record_judged(self, result: Dict) -> None:
+        execution_id = result["execution_id"]
+        attempt = int(execution_id.rsplit("/", 1)[-1])
+        self._append({"type": "judged", "case_id": result["case_id"], "attempt": attempt,
+                      "execution_id": execution_id, "result": result})
+
+    def record_persisted(self, results: List[Dict]) -> None:
+        for r in results:
+            self._append({"type": "persisted", "case_id": r["case_id"], "execution_id": r.get("execution_id")})
+
+    def record_error(self, case_id: str, error: str) -> None:
+        self._append({"type": "error", "case_id": case_id, "error": error})
+
+    def record_end(self, summary: Dict) -> None:
+        self._append({"type": "end", "summary": summary})
+
+    # -- 조회 --
+
+    def state(self, case_id: str) -> Optional[CaseState]:
+        return self.states.get(case_id)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for s in self.states.values():
+            counts[s.status] = counts.get(s.status, 0) + 1
+        counts["parse_failed"] = sum(1 for s in self.states.values() if s.result and s.result.get("parse_failed"))
+        return counts
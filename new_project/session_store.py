@@ -0,0 +1,279 @@
+"""
+채팅 세션 저장소
+- Gradio session_hash 단위로 대화 메모리, 검색 결과 캐시, 라우팅 이력을 보관
+- 전역 메모리 상한 + 세션 유휴 TTL + LRU 축출로 웹 프로세스 메모리 사용량을 제한
+- (선택) 축출된 세션은 디스크에 내려두었다가 재방문 시 복원
+- 한 턴(질의 재작성 → 답변 → 메모리 갱신) 동안은 lease() 로 세션 잠금을 유지
+  → 같은 세션의 동시 요청은 순서대로 처리되고, 사용 중인 세션은 축출/만료되지 않음
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from conversation_memory import ConversationMemory
+
+
+@dataclass
+class ChatSession:
+    """세션 단위 상태"""
+    session_id: str
+    memory: ConversationMemory
+    retrieval_cache: "OrderedDict[str, Tuple[str, List[dict]]]" = field(default_factory=OrderedDict)
+    route_history: List[Dict] = field(default_factory=list)
+    last_access: float = field(default_factory=time.time)
+    approx_bytes: int = 0
+    # 턴 단위 잠금 (직렬화 대상 아님), discard 된 세션은 다시 저장소에 넣지 않음
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    discarded: bool = False
+
+    max_cached_retrievals: int = 16
+    max_route_history: int = 50
+
+    def cache_retrieval(self, query: str, answer: str, citations: List[dict]) -> None:
+        """독립 질의 기준 RAG 결과 캐시 (세션 내 LRU)"""
+        self.retrieval_cache[query] = (answer, citations)
+        self.retrieval_cache.move_to_end(query)
+        while len(self.retrieval_cache) > self.max_cached_retrievals:
+            self.retrieval_cache.popitem(last=False)
+
+    def get_cached_retrieval(self, query: str) -> Optional[Tuple[str, List[dict]]]:
+        hit = self.retrieval_cache.get(query)
+        if hit is not None:
+            self.retrieval_cache.move_to_end(query)
+        return hit
+
+    def record_route(self, query: str, route: str) -> None:
+        self.route_history.append({"query": query, "route": route, "ts": time.time()})
+        if len(self.route_history) > self.max_route_history:
+            del self.route_history[: len(self.route_history) - self.max_route_history]
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "memory": self.memory.to_dict(),
+            "retrieval_cache": [[q, a, c] for q, (a, c) in self.retrieval_cache.items()],
+            "route_history": self.route_history,
+            "last_access": self.last_access,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChatSession":
+        session = cls(
+            session_id=data["session_id"],
+            memory=ConversationMemory.from_dict(data.get("memory", {})),
+            route_history=list(data.get("route_history", [])),
+            last_access=float(data.get("last_access", time.time())),
+        )
+        for q, a, c in data.get("retrieval_cache", []):
+            session.retrieval_cache[q] = (a, c)
+        return session
+
+    def measure(self) -> int:
+        """직렬화 크기 기준 메모리 사용량 근사치(bytes) 갱신"""
+        self.approx_bytes = len(json.dumps(self.to_dict(), ensure_ascii=False).encode("utf-8"))
+        return self.approx_bytes
+
+
+class SessionStore:
+    """LRU + TTL + 전역 메모리 상한을 가진 세션 저장소 (스레드 안전)"""
+
+    def __init__(self,
+                 max_bytes: Optional[int] = None,
+                 max_sessions: Optional[int] = None,
+                 idle_ttl: Optional[float] = None,
+                 spill_dir: Optional[str] = None,
+                 spill_ttl: float = 24 * 3600,
+                 memory_turns: int = 4,
+                 summary_token_cap: int = 400):
+        """
+        Args:
+            max_bytes: 전체 세션 메모리 상한 (기본: SESSION_MAX_MB 환경변수, 64MB)
+            max_sessions: 메모리에 유지할 최대 세션 수 (기본: SESSION_MAX_COUNT, 2000)
+            idle_ttl: 세션 유휴 만료 시간(초) (기본: SESSION_IDLE_TTL, 1800)
+            spill_dir: 축출 세션을 저장할 디렉토리 (기본: SESSION_SPILL_DIR, 미설정 시 폐기)
+            spill_ttl: 디스크에 내려둔 세션 보존 시간(초)
+            memory_turns: 새 세션의 원문 유지 턴 수
+            summary_token_cap: 새 세션의 요약 토큰 상한
+        """
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("SESSION_MAX_MB", "64")) * 1024 * 1024)
+        self.max_sessions = max_sessions if max_sessions is not None else int(os.getenv("SESSION_MAX_COUNT", "2000"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("SESSION_IDLE_TTL", "1800"))
+        spill_dir = spill_dir if spill_dir is not None else os.getenv("SESSION_SPILL_DIR")
+        self.spill_dir: Optional[Path] = Path(spill_dir) if spill_dir else None
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.spill_ttl = spill_ttl
+        self.memory_turns = memory_turns
+        self.summary_token_cap = summary_token_cap
+
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._last_sweep = 0.0
+        self.stats_counters = {"created": 0, "evicted": 0, "expired": 0, "spilled": 0, "restored": 0, "reinserted": 0}
+
+    # ---- public API ----
+
+    def get(self, session_id: str) -> ChatSession:
+        """세션 조회 (메모리 → 디스크 → 신규 생성 순)"""
+        with self._lock:
+            self._maybe_sweep()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._restore(session_id)
+                if session is None:
+                    session = ChatSession(
+                        session_id=session_id,
+                        memory=ConversationMemory(max_turns=self.memory_turns, summary_token_cap=self.summary_token_cap),
+                    )
+                    self.stats_counters["created"] += 1
+                self._sessions[session_id] = session
+                self._total_bytes += session.measure()
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.time()
+            self._enforce_limits(protect=session_id)
+            return session
+
+    @contextlib.contextmanager
+    def lease(self, session_id: str) -> Iterator[ChatSession]:
+        """
+        한 턴 동안 세션 잠금을 잡고 세션을 넘겨줌 (블록이 끝나면 touch)
+        잠금을 기다리는 사이 discard 된 세션이면 새 세션으로 다시 조회
+        """
+        while True:
+            session = self.get(session_id)
+            session.lock.acquire()
+            if not session.discarded:
+                break
+            session.lock.release()
+        try:
+            yield session
+        finally:
+            try:
+                self.touch(session)
+            finally:
+                session.lock.release()
+
+    def touch(self, session: ChatSession) -> None:
+        """세션 변경 후 호출: 크기 재계산 및 상한 초과 시 LRU 축출 (그사이 빠진 세션은 다시 넣음)"""
+        with self._lock:
+            if session.discarded:
+                return
+            current = self._sessions.get(session.session_id)
+            if current is not session:
+                # get() 이후 축출/만료된 세션: 이번 턴 변경분을 버리지 않도록 다시 넣고 낡은 디스크 사본은 삭제
+                if current is not None:
+                    self._total_bytes -= current.approx_bytes
+                self._sessions[session.session_id] = session
+                session.approx_bytes = 0
+                self.stats_counters["reinserted"] += 1
+                path = self._spill_path(session.session_id)
+                if path is not None and path.exists():
+                    path.unlink()
+            self._total_bytes -= session.approx_bytes
+            self._total_bytes += session.measure()
+            session.last_access = time.time()
+            self._sessions.move_to_end(session.session_id)
+            self._enforce_limits(protect=session.session_id)
+
+    def discard(self, session_id: str) -> None:
+        """세션 완전 삭제 (메모리 + 디스크), 진행 중인 턴이 있으면 끝난 뒤 삭제"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None:
+            with session.lock:
+                session.discarded = True
+                with self._lock:
+                    if self._sessions.get(session_id) is session:
+                        del self._sessions[session_id]
+                        self._total_bytes -= session.approx_bytes
+        with self._lock:
+            path = self._spill_path(session_id)
+            if path is not None and path.exists():
+                path.unlink()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "approx_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                **self.stats_counters,
+            }
+
+    # ---- internals ----
+
+    def _enforce_limits(self, protect: Optional[str] = None) -> None:
+        while self._sessions and (self._total_bytes > self.max_bytes or len(self._sessions) > self.max_sessions):
+            # 가장 오래된 세션부터, 보호 대상과 턴 진행 중(잠금 보유)인 세션은 건너뜀
+            victim = next((sid for sid, s in self._sessions.items() if sid != protect and not s.lock.locked()), None)
+            if victim is None:
+                break
+            self._evict(victim, reason="evicted")
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._total_bytes -= session.approx_bytes
+        self.stats_counters[reason] += 1
+        self._spill(session)
+
+    def _maybe_sweep(self) -> None:
+        """유휴 세션 만료 처리 (최대 30초 간격)"""
+        now = time.time()
+        if now - self._last_sweep < 30:
+            return
+        self._last_sweep = now
+        # OrderedDict는 접근 순서이므로 앞에서부터 만료된 것만 확인 (턴 진행 중인 세션은 제외)
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_access <= self.idle_ttl:
+                break
+            if not session.lock.locked():
+                self._evict(session_id, reason="expired")
+        if self.spill_dir:
+            for path in self.spill_dir.glob("*.json"):
+                try:
+                    if now - path.stat().st_mtime > self.spill_ttl:
+                        path.unlink()
+                except OSError:
+                    pass
+
+    def _spill_path(self, session_id: str) -> Optional[Path]:
+        if not self.spill_dir:
+            return None
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return self.spill_dir / f"{digest}.json"
+
+    def _spill(self, session: ChatSession) -> None:
+        path = self._spill_path(session.session_id)
+        if path is None:
+            return
+        try:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(session.to_dict(), ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+            self.stats_counters["spilled"] += 1
+        except Exception as e:
+            print(f"⚠️  세션 디스크 저장 실패 ({session.session_id}): {e}")
+
+    def _restore(self, session_id: str) -> Optional[ChatSession]:
+        path = self._spill_path(session_id)
+        if path is None or not path.exists():
+            return None
+        try:
+            session = ChatSession.from_dict(json.loads(path.read_text(encoding="utf-8")))
+            path.unlink()
+            self.stats_counters["restored"] += 1
+            return session
+        except Exception as e:
+            print(f"⚠️  세션 복원 실패 ({session_id}): {e}")
+            return None
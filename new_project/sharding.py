@@ -0,0 +1,133 @@
+"""
+샤드 평가 (다중 프로세스 / 다중 머신)
+- case_id 해시로 케이스를 N개 샤드에 고정 배정 (shard_of) → 어느 머신에서 실행해도 같은 분할
+- 샤드 워커 (--shards N --shard-index i --run-id <group>): 답변/채점만 수행하고 샤드 저널
+  .runs/<group>.shard<i>of<N>.jsonl 에 기록 (LangSmith 저장 없음)
+- 로컬 런처 (launch_local): 같은 group으로 N개 워커 프로세스를 띄우고 끝나면 병합
+- 병합 (merge): 그룹의 샤드 저널에서 채점 완료·미저장 결과를 case_id 순서로 모아 결과/히스토리 데이터셋에 저장하고,
+  각 샤드 저널에 저장 완료를 기록. 결과 예제/히스토리 레코드 ID는 execution_id 기반 결정적 ID이므로
+  병합을 중단 후 다시 실행하거나 두 번 실행해도 정확히 한 번 저장됨
+
+다른 머신에서 실행한 샤드는 저널 파일(<group>.shard*.jsonl)을 한 EVAL_RUNS_DIR 로 모은 뒤 병합합니다.
+레이트 한도는 프로세스 단위이므로 런처는 워커마다 LLM_RATE_SHARE=1/N 을 지정해 조직 쿼터를 나눠 씁니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from run_journal import RunJournal, runs_dir
+
+
+_SHARD_RE = re.compile(r"^(?P<group>.+)\.shard(?P<index>\d+)of(?P<total>\d+)$")
+
+
+def shard_of(case_id: str, total: int) -> int:
+    """case_id → 샤드 번호 (0..total-1, 프로세스/머신과 무관하게 고정)"""
+    if total <= 1:
+        return 0
+    digest = hashlib.sha256(str(case_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % total
+
+
+def shard_run_id(group: str, index: int, total: int) -> str:
+    return f"{group}.shard{index}of{total}"
+
+
+def parse_shard_run_id(run_id: str) -> Optional[Tuple[str, int, int]]:
+    """샤드 run_id → (group, index, total), 샤드가 아니면 None"""
+    m = _SHARD_RE.match(run_id or "")
+    if not m:
+        return None
+    return m.group("group"), int(m.group("index")), int(m.group("total"))
+
+
+def latest_group() -> Optional[str]:
+    """가장 최근 샤드 실행 그룹"""
+    groups = sorted({parsed[0] for p in runs_dir().glob("*.shard*of*.jsonl")
+                     if (parsed := parse_shard_run_id(p.stem))})
+    return groups[-1] if groups else None
+
+
+def resolve_group(group: str) -> str:
+    if group == "latest":
+        found = latest_group()
+        if not found:
+            raise FileNotFoundError(f"샤드 실행을 찾을 수 없습니다 ({runs_dir()})")
+        return found
+    return group
+
+
+def shard_journals(group: str) -> List[RunJournal]:
+    """그룹의 샤드 저널 (샤드 번호 순). 샤드 수가 섞여 있거나 빠진 샤드가 있으면 경고만 출력"""
+    found: Dict[int, RunJournal] = {}
+    totals = set()
+    for path in sorted(runs_dir().glob(f"{group}.shard*of*.jsonl")):
+        parsed = parse_shard_run_id(path.stem)
+        if not parsed or parsed[0] != group:
+            continue
+        totals.add(parsed[2])
+        found[parsed[1]] = RunJournal(path.stem)
+    if not found:
+        raise FileNotFoundError(f"샤드 저널이 없습니다: {group} ({runs_dir()})")
+    if len(totals) > 1:
+        print(f"⚠️  샤드 수가 다른 저널이 섞여 있습니다: {sorted(totals)}")
+    total = max(totals)
+    missing = [i for i in range(total) if i not in found]
+    if missing:
+        print(f"⚠️  저널이 없는 샤드: {missing} (해당 샤드 케이스는 이번 병합에서 제외)")
+    return [found[i] for i in sorted(found)]
+
+
+def pending_results(journals: Sequence[RunJournal]) -> List[Tuple[RunJournal, Dict]]:
+    """채점 완료·미저장 결과 (저널, 결과) 목록"""
+    pending = []
+    for journal in journals:
+        for state in journal.states.values():
+            if state.status == "judged" and state.result:
+                pending.append((journal, state.result))
+    return pending
+
+
+def launch_local(total: int, group: str, extra_args: Sequence[str], script: Optional[str] = None) -> List[int]:
+    """
+    샤드 워커 N개를 로컬 프로세스로 실행하고 모두 끝날 때까지 대기
+
+    Args:
+        total: 샤드 수
+        group: 샤드 실행 그룹 ID (--run-id)
+        extra_args: 워커에 그대로 넘길 인자 (--judge-mode, --workers ...)
+        script: 워커 스크립트 (기본 real_implementation.py)
+
+    Returns:
+        샤드별 종료 코드
+    """
+    script = script or str(Path(__file__).parent / "real_implementation.py")
+    env = dict(os.environ)
+    env.setdefault("LLM_RATE_SHARE", f"{1.0 / total:.6f}")
+    env.setdefault("PYTHONUNBUFFERED", "1")
+    runs_dir().mkdir(parents=True, exist_ok=True)
+    procs = []
+    for index in range(total):
+        log_path = runs_dir() / f"{shard_run_id(group, index, total)}.log"
+        cmd = [sys.executable, script, "--eval-only", "--shards", str(total), "--shard-index", str(index),
+               "--run-id", group, *extra_args]
+        log = open(log_path, "a", encoding="utf-8")
+        procs.append((index, subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env), log, log_path))
+        print(f"  ▶ 샤드 {index}/{total} 시작 (pid {procs[-1][1].pid}) → {log_path}")
+    started = time.monotonic()
+    codes = []
+    for index, proc, log, log_path in procs:
+        code = proc.wait()
+        log.close()
+        codes.append(code)
+        mark = "✅" if code == 0 else "❌"
+        print(f"  {mark} 샤드 {index}/{total} 종료 (코드 {code}, {time.monotonic() - started:.1f}s)")
+    return codes
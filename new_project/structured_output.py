@@ -0,0 +1,213 @@
+"""
+구조화 출력 유틸
+- 라우팅 분류기 / Judge 출력을 JSON Schema로 강제 (OpenAI structured output)
+- 스키마 강제가 실패하면 원문에서 JSON을 관대하게 추출하는 폴백 파서 사용
+- 파싱 결과(스키마 성공 / 폴백 성공 / 실패)를 이름별로 집계하여 보고
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Literal, Optional, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+class RouteDecision(BaseModel):
+    """라우팅 분류기 출력"""
+    route: Literal["RAG", "CHAT"] = Field(description="EV 관련이면 RAG, 일반 대화면 CHAT")
+    confidence: float = Field(description="분류 확신도 (0~1)")
+
+
+class JudgeVerdict(BaseModel):
+    """LLM-as-Judge 출력"""
+    score: float = Field(description="0-5 사이의 정확성 점수")
+    reasoning: str = Field(description="평가 근거")
+
+
+class CascadeVerdict(JudgeVerdict):
+    """캐스케이드 1차(경량) Judge 출력: 점수 + 자기 확신도"""
+    confidence: float = Field(description="이 점수에 대한 확신도 (0~1, 판단이 애매하면 낮게)")
+
+
+class BatchJudgeItem(BaseModel):
+    """배치 Judge 항목 1건 (id는 요청에 붙인 항목 ID 그대로)"""
+    id: str = Field(description="평가 대상 항목 ID (입력의 [ID] 그대로)")
+    score: float = Field(description="0-5 사이의 정확성 점수")
+    reasoning: str = Field(description="평가 근거")
+
+
+class BatchJudgeVerdicts(BaseModel):
+    """배치 Judge 출력: 입력 항목마다 1건"""
+    items: List[BatchJudgeItem] = Field(description="입력 항목별 평가 결과 (모든 ID를 한 번씩)")
+
+
+class StructuredOutputError(Exception):
+    """스키마 강제와 폴백 추출이 모두 실패한 경우"""
+
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def _balanced_objects(text: str):
+    """문자열 내 중괄호 균형이 맞는 {...} 구간을 앞에서부터 순서대로 반환"""
+    depth = 0
+    start = -1
+    in_str = False
+    escape = False
+    for i, ch in enumerate(text):
+        if in_str:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth > 0:
+            depth -= 1
+            if depth == 0 and start >= 0:
+                yield text[start:i + 1]
+
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    LLM 원문에서 JSON 객체를 관대하게 추출
+
+    - ```json 코드펜스, 앞뒤 설명 문장, 작은따옴표, 후행 쉼표를 허용
+    - 어떤 방법으로도 찾지 못하면 None
+    """
+    if not text:
+        return None
+    candidates = [m.group(1) for m in _FENCE_RE.finditer(text)] + [text]
+    for cand in candidates:
+        cand = cand.strip()
+        try:
+            data = json.loads(cand)
+            if isinstance(data, dict):
+                return data
+        except Exception:
+            pass
+        for obj in _balanced_objects(cand):
+            for variant in (obj, re.sub(r",\s*([}\]])", r"\1", obj).replace("'", '"')):
+                try:
+                    data = json.loads(variant)
+                    if isinstance(data, dict):
+                        return data
+                except Exception:
+                    continue
+    return None
+
+
+def _extract_loose_fields(text: str, schema: Type[T]) -> Optional[Dict[str, Any]]:
+    """JSON이 아예 깨진 경우: "key": value 패턴을 필드별로 직접 찾음"""
+    data: Dict[str, Any] = {}
+    for name in schema.model_fields:
+        m = re.search(rf'["\']?{name}["\']?\s*[:=]\s*("([^"]*)"|[-+]?\d+(?:\.\d+)?|\w+)', text, re.IGNORECASE)
+        if m:
+            data[name] = m.group(2) if m.group(2) is not None else m.group(1)
+    return data or None
+
+
+def parse_with_schema(text: str, schema: Type[T]) -> T:
+    """원문 텍스트를 관대하게 파싱하여 스키마 객체로 검증"""
+    for data in (extract_json_object(text), _extract_loose_fields(text or "", schema)):
+        if not data:
+            continue
+        if "route" in data and isinstance(data["route"], str):
+            data["route"] = data["route"].strip().upper()
+        try:
+            return schema.model_validate(data)
+        except ValidationError:
+            continue
+    raise StructuredOutputError(f"{schema.__name__} 파싱 실패: {(text or '')[:200]!r}")
+
+
+class ParseStats:
+    """이름별 파싱 결과 집계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, outcome: str) -> None:
+        """outcome: 'structured' | 'fallback' | 'failed'"""
+        with self._lock:
+            bucket = self._counts.setdefault(name, {"structured": 0, "fallback": 0, "failed": 0})
+            bucket[outcome] = bucket.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._counts.items()}
+
+    def failures(self, name: Optional[str] = None) -> int:
+        snap = self.snapshot()
+        if name is not None:
+            return snap.get(name, {}).get("failed", 0)
+        return sum(v.get("failed", 0) for v in snap.values())
+
+    def report(self) -> str:
+        lines = []
+        for name, c in sorted(self.snapshot().items()):
+            total = sum(c.values())
+            lines.append(
+                f"  - {name}: 총 {total}건 | 스키마 {c['structured']} / 폴백 {c['fallback']} / 실패 {c['failed']}"
+            )
+        return "\n".join(lines) if lines else "  - 기록 없음"
+
+
+# 프로세스 전역 집계 (평가 종료 시 요약 출력에 사용)
+PARSE_STATS = ParseStats()
+
+
+def structured_llm(llm, schema: Type[BaseModel]):
+    """JSON Schema 강제 + 원문 동반(include_raw) 러너블 생성"""
+    return llm.with_structured_output(schema, method="json_schema", include_raw=True)
+
+
+def resolve_structured(result: Any, schema: Type[T], name: str, stats: ParseStats = PARSE_STATS) -> T:
+    """
+    include_raw 구조화 출력 결과를 스키마 객체로 확정
+
+    Args:
+        result: structured_llm(...).invoke() 결과 ({"raw", "parsed", "parsing_error"}) 또는 원문 문자열
+        schema: 기대 스키마
+        name: 집계 이름 (예: 'classifier', 'judge')
+
+    Raises:
+        StructuredOutputError: 폴백 추출까지 실패한 경우 (집계에는 'failed'로 기록)
+    """
+    raw_text = result
+    if isinstance(result, dict):
+        parsed = result.get("parsed")
+        if isinstance(parsed, schema):
+            stats.record(name, "structured")
+            return parsed
+        if isinstance(parsed, dict):
+            try:
+                obj = schema.model_validate(parsed)
+                stats.record(name, "structured")
+                return obj
+            except ValidationError:
+                pass
+        raw = result.get("raw")
+        raw_text = getattr(raw, "content", raw) or ""
+    elif hasattr(result, "content"):
+        raw_text = result.content
+    try:
+        obj = parse_with_schema(str(raw_text or ""), schema)
+        stats.record(name, "fallback")
+        return obj
+    except StructuredOutputError:
+        stats.record(name, "failed")
+        raise
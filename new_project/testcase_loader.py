@@ -0,0 +1,246 @@
+"""
+테스트케이스 파일 로더 (스트리밍)
+- 형식별 리더가 (소스 이름, 헤더, 행 반복자)를 차례로 내보내고 iter_testcases 가 검증된 테스트케이스를 하나씩 yield
+  → 파일 전체를 DataFrame으로 올리지 않으므로 큰 파일/여러 시트도 메모리 사용량이 일정
+  · .xlsx/.xlsm: openpyxl read_only 모드로 시트별 행 스트리밍 (.xls 는 pandas 시트 단위 폴백)
+  · .csv/.tsv: csv 모듈 (utf-8-sig)
+  · .jsonl/.ndjson: 한 줄에 JSON 객체 1개
+  · .parquet: pyarrow 레코드 배치 단위 (TESTCASE_PARQUET_BATCH 행)
+- 컬럼 자동 감지(case_id / question / expected_answer)는 소스(시트)마다 헤더로 수행
+- 새 형식은 register_loader(확장자, 리더)로 추가
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# 리더: 경로 → (소스 이름, 헤더, 행 반복자) 반복자. 행은 헤더 순서의 값 시퀀스 또는 {컬럼: 값} dict
+Source = Tuple[str, List[str], Iterator[Any]]
+Reader = Callable[[Path], Iterator[Source]]
+
+EXPECTED_COLUMNS = ["expected_answer", "expected", "reference", "ground_truth", "answer", "정답", "기대답변", "기대 답변"]
+
+
+@dataclass
+class ColumnMap:
+    case_id: str
+    question: str
+    expected: Optional[str] = None
+    fallback: bool = False      # 필요한 컬럼을 찾지 못해 첫 번째/두 번째 컬럼을 사용
+
+
+def detect_columns(columns: Sequence[str]) -> Optional[ColumnMap]:
+    """
+    정규화된(소문자, 앞뒤 공백 제거) 컬럼 목록에서 case_id / question / expected_answer 컬럼 감지
+    (정확 매칭 우선, 없으면 유사 매칭, 그래도 없으면 첫 번째/두 번째 컬럼)
+    """
+    available = [c for c in columns if c]
+    if not available:
+        return None
+    case_id_col = "case_id" if "case_id" in available else None
+    question_col = "question" if "question" in available else None
+    if question_col is None:
+        question_col = next((c for c in ("input", "query") if c in available), None)
+    if case_id_col is None:
+        case_id_col = next((c for c in available if "case" in c or "id" in c), None)
+    if question_col is None:
+        question_col = next((c for c in available if "question" in c or "input" in c or "query" in c), None)
+
+    # 기대 답변 컬럼 (선택)
+    expected_col = next((c for c in EXPECTED_COLUMNS if c in available), None)
+    if expected_col is None:
+        expected_col = next((c for c in available if "expected" in c or "reference" in c or "정답" in c), None)
+
+    if not case_id_col or not question_col:
+        return ColumnMap(available[0], available[1] if len(available) > 1 else available[0], expected_col, fallback=True)
+    return ColumnMap(case_id_col, question_col, expected_col)
+
+
+def _normalize_header(values: Sequence[Any]) -> List[str]:
+    return ["" if v is None else str(v).strip().lower() for v in values]
+
+
+def _cell_text(value: Any) -> str:
+    """셀 값 → 문자열 (빈 값/NaN은 빈 문자열, 정수형 실수는 소수점 없이)"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    text = str(value).strip()
+    return "" if text.lower() == "nan" or text == "None" else text
+
+
+# ---- 형식별 리더 ----
+
+def _read_xlsx(path: Path) -> Iterator[Source]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            # 첫 번째 비어 있지 않은 행을 헤더로 사용
+            header = next((r for r in rows if any(v is not None and str(v).strip() for v in r)), None)
+            if header is None:
+                continue
+            yield sheet.title, _normalize_header(header), rows
+    finally:
+        workbook.close()
+
+
+def _read_xls(path: Path) -> Iterator[Source]:
+    """구형 .xls (openpyxl 미지원): pandas로 시트 단위 로드"""
+    import pandas as pd
+
+    for sheet_name in pd.ExcelFile(path).sheet_names:
+        df = pd.read_excel(path, sheet_name=sheet_name)
+        if len(df):
+            yield str(sheet_name), _normalize_header(df.columns), df.itertuples(index=False, name=None)
+
+
+def _read_csv(path: Path) -> Iterator[Source]:
+    delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is not None:
+            yield path.name, _normalize_header(header), reader
+
+
+def _chain_first(first, rest: Iterator) -> Iterator:
+    yield first
+    yield from rest
+
+
+def _read_jsonl(path: Path) -> Iterator[Source]:
+    def records(lines):
+        for line in lines:
+            if line.strip():
+                yield {str(k).strip().lower(): v for k, v in json.loads(line).items()}
+
+    # 헤더는 첫 번째 객체의 키 (이후 객체는 키 이름으로 조회)
+    with open(path, encoding="utf-8-sig") as f:
+        rows = records(f)
+        first = next(rows, None)
+        if first is not None:
+            yield path.name, list(first), _chain_first(first, rows)
+
+
+def _read_parquet(path: Path) -> Iterator[Source]:
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    batch_size = int(os.getenv("TESTCASE_PARQUET_BATCH", "1024"))
+
+    def rows():
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    yield path.name, _normalize_header(parquet.schema_arrow.names), rows()
+
+
+LOADERS: Dict[str, Reader] = {
+    ".xlsx": _read_xlsx,
+    ".xlsm": _read_xlsx,
+    ".xls": _read_xls,
+    ".csv": _read_csv,
+    ".tsv": _read_csv,
+    ".jsonl": _read_jsonl,
+    ".ndjson": _read_jsonl,
+    ".parquet": _read_parquet,
+}
+
+
+def register_loader(suffix: str, reader: Reader) -> None:
+    """새 파일 형식 등록 (suffix 예: ".json")"""
+    LOADERS[suffix.lower()] = reader
+
+
+def supported_suffixes() -> List[str]:
+    return sorted(LOADERS)
+
+
+# ---- 검증 + 스트리밍 ----
+
+@dataclass
+class LoadStats:
+    """로드 집계 (iter_testcases 가 채움)"""
+    sources: List[Tuple[str, ColumnMap]] = field(default_factory=list)
+    rows: int = 0
+    loaded: int = 0
+    with_expected: int = 0
+    missing_case_id: int = 0
+    missing_question: int = 0
+
+    def report(self) -> str:
+        lines = [f"✅ 유효한 테스트케이스 {self.loaded}개 로드 완료"
+                 + (f" (기대 답변 포함 {self.with_expected}개)" if self.with_expected else "")
+                 + f" | 소스 {len(self.sources)}개, {self.rows}개 행"]
+        dropped = self.missing_case_id + self.missing_question
+        if dropped > 0:
+            lines.append(f"ℹ️  제외된 행 수: {dropped} (case_id 없음: {self.missing_case_id}, question 없음: {self.missing_question})")
+        return "\n".join(lines)
+
+
+def iter_testcases(path: str, stats: Optional[LoadStats] = None, log: Callable[[str], None] = print) -> Iterator[Dict]:
+    """
+    테스트케이스 파일을 스트리밍으로 읽어 검증된 테스트케이스를 하나씩 yield
+
+    Yields:
+        {"case_id": str, "question": str, "expected_answer": str (있을 때만)}
+    """
+    path = Path(path)
+    reader = LOADERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"지원하지 않는 파일 형식: {path.suffix} (지원: {', '.join(supported_suffixes())})")
+    stats = stats if stats is not None else LoadStats()
+    for source, header, rows in reader(path):
+        columns = detect_columns(header)
+        if columns is None:
+            log(f"⚠️  [{source}] 헤더가 비어 있어 건너뜀")
+            continue
+        stats.sources.append((source, columns))
+        log(f"📊 [{source}] 컬럼: {[c for c in header if c]}")
+        if columns.fallback:
+            log(f"⚠️  [{source}] 필요한 컬럼을 찾을 수 없어 기본 컬럼 사용 - case_id: {columns.case_id}, question: {columns.question}")
+        log(f"🔍 [{source}] 감지된 컬럼 - case_id: {columns.case_id}, question: {columns.question}, "
+            f"expected_answer: {columns.expected}")
+        position = {name: i for i, name in reversed(list(enumerate(header)))}
+
+        def get(row, column: Optional[str]) -> str:
+            if column is None:
+                return ""
+            if isinstance(row, dict):
+                return _cell_text(row.get(column))
+            i = position.get(column)
+            return _cell_text(row[i]) if i is not None and i < len(row) else ""
+
+        for row in rows:
+            values = row.values() if isinstance(row, dict) else row
+            if not any(_cell_text(v) for v in values):
+                continue  # 완전 공백 행
+            stats.rows += 1
+            case_id = get(row, columns.case_id)
+            question = get(row, columns.question)
+            if not case_id:
+                stats.missing_case_id += 1
+                continue
+            if not question:
+                stats.missing_question += 1
+                continue
+            testcase = {"case_id": case_id, "question": question}
+            expected = get(row, columns.expected)
+            if expected:
+                testcase["expected_answer"] = expected
+                stats.with_expected += 1
+            stats.loaded += 1
+            yield testcase
@@ -0,0 +1,19 @@
+"""
+단위 테스트 공통 설정
+- new_project 모듈은 평면 임포트(from run_journal import ...)를 쓰므로 상위 디렉토리를 임포트 경로에 추가
+- 실행 저널 디렉토리(EVAL_RUNS_DIR)는 테스트마다 임시 경로 사용
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def runs_dir(tmp_path, monkeypatch):
+    path = tmp_path / "runs"
+    monkeypatch.setenv("EVAL_RUNS_DIR", str(path))
+    return path
@@ -0,0 +1,37 @@
+from batch_judge import validate_items
+from structured_output import BatchJudgeItem, BatchJudgeVerdicts
+
+
+def _verdicts(*items):
+    return BatchJudgeVerdicts(items=[BatchJudgeItem(id=i, score=s, reasoning=r) for i, s, r in items])
+
+
+def test_valid_items_pass_through():
+    valid, invalid = validate_items(_verdicts(("A1", 4, "정확"), ("A2", 0.0, "오답")), ["A1", "A2"])
+    assert valid == {"A1": {"score": 4, "reasoning": "정확"}, "A2": {"score": 0, "reasoning": "오답"}}
+    assert invalid == []
+
+
+def test_bracketed_ids_are_normalized():
+    valid, invalid = validate_items(_verdicts(("[A1]", 5, "ok"), (" A2 ", 3, "ok")), ["A1", "A2"])
+    assert set(valid) == {"A1", "A2"} and invalid == []
+
+
+def test_invalid_items_are_rejudged_in_request_order():
+    verdicts = _verdicts(
+        ("A1", 6, "범위 밖"),
+        ("A2", 3.5, "정수가 아님"),
+        ("A3", 4, "   "),
+        ("A4", 2, "중복 1"),
+        ("A4", 3, "중복 2"),
+        ("ZZ", 5, "요청에 없는 ID"),
+        ("A6", 5, "정상"),
+    )
+    valid, invalid = validate_items(verdicts, ["A1", "A2", "A3", "A4", "A5", "A6"])
+    assert valid == {"A6": {"score": 5, "reasoning": "정상"}}
+    assert invalid == ["A1", "A2", "A3", "A4", "A5"]
+
+
+def test_missing_or_empty_output():
+    assert validate_items(None, ["A1"]) == ({}, ["A1"])
+    assert validate_items(BatchJudgeVerdicts(items=[]), ["A1", "A2"]) == ({}, ["A1", "A2"])
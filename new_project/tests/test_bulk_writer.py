@@ -0,0 +1,87 @@
+import uuid
+
+from bulk_writer import BulkExampleWriter, PendingExample
+
+
+class Conflict(Exception):
+    status_code = 409
+
+
+class Rejected(Exception):
+    status_code = 400
+
+
+class FakeClient:
+    """create_examples 는 거부 ID가 섞이면 배치 전체 실패, create_example 은 이미 저장된 ID면 409"""
+
+    def __init__(self, rejected=(), existing=()):
+        self.rejected = set(rejected)
+        self.stored = set(existing)
+        self.batch_calls = []
+        self.single_calls = []
+
+    def create_examples(self, dataset_name, inputs, outputs, metadata, ids):
+        self.batch_calls.append(list(ids))
+        if self.rejected & set(ids) or self.stored & set(ids):
+            raise Rejected("batch rejected")
+        self.stored.update(ids)
+
+    def create_example(self, dataset_name, example_id, inputs, outputs, metadata):
+        self.single_calls.append(example_id)
+        if example_id in self.rejected:
+            raise Rejected("invalid example")
+        if example_id in self.stored:
+            raise Conflict("already exists")
+        self.stored.add(example_id)
+
+
+def _pending(n):
+    return [PendingExample(example_id=uuid.uuid4(), inputs={"input": f"q{i}"}, item=f"TC-{i}") for i in range(n)]
+
+
+def test_batch_saved_in_one_call():
+    client = FakeClient()
+    writer = BulkExampleWriter(client, "ds", flush_interval=0, log=lambda _: None)
+    batch = _pending(4)
+    outcome = writer.write_batch(batch)
+    assert outcome.saved == batch and outcome.failed == []
+    assert len(client.batch_calls) == 1 and client.single_calls == []
+
+
+def test_split_isolates_rejected_item():
+    batch = _pending(8)
+    bad = batch[5]
+    client = FakeClient(rejected={bad.example_id})
+    writer = BulkExampleWriter(client, "ds", flush_interval=0, log=lambda _: None)
+    outcome = writer.write_batch(batch)
+    assert [p for p, _ in outcome.failed] == [bad]
+    assert {p.example_id for p in outcome.saved} == {p.example_id for p in batch} - {bad.example_id}
+    assert writer.stats["splits"] >= 1
+    # 실패 항목이 없는 절반은 단건으로 내려가지 않음
+    assert len(client.single_calls) <= 2
+
+
+def test_conflict_counts_as_saved():
+    batch = _pending(3)
+    client = FakeClient(existing={batch[0].example_id})
+    writer = BulkExampleWriter(client, "ds", flush_interval=0, log=lambda _: None)
+    outcome = writer.write_batch(batch)
+    assert outcome.failed == []
+    assert len(outcome.saved) == 3
+    assert writer.stats["conflicts"] == 1
+
+
+def test_buffered_add_flushes_by_size_and_on_close():
+    client = FakeClient()
+    saved_items = []
+    writer = BulkExampleWriter(client, "ds", batch_size=2, flush_interval=0, on_saved=saved_items.extend,
+                               log=lambda _: None)
+    bad_id = uuid.uuid4()
+    client.rejected.add(bad_id)
+    writer.add(inputs={"input": "a"}, item="TC-1")
+    writer.add(inputs={"input": "b"}, item="TC-2")          # 크기 임계값 → 즉시 flush
+    assert saved_items == ["TC-1", "TC-2"]
+    writer.add(inputs={"input": "c"}, example_id=bad_id, item="TC-3")
+    writer.close()
+    assert writer.saved_count == 2
+    assert [item for item, _ in writer.failed] == ["TC-3"]
@@ -0,0 +1,48 @@
+import pytest
+
+from judge_cascade import CascadePolicy, hash_sample
+
+
+@pytest.fixture
+def policy():
+    # 보정 표본 없음: 승급 규칙만 확인
+    return CascadePolicy(mid_low=2, mid_high=3, min_confidence=0.7, calibration_rate=0.0)
+
+
+@pytest.mark.parametrize("score, confidence, reason", [
+    (None, 0.9, "cheap_failed"),
+    (2, 0.99, "mid_score"),
+    (3, 0.99, "mid_score"),
+    (5, 0.5, "low_confidence"),
+    (0, None, "low_confidence"),
+    (5, 0.7, None),
+    (1, 0.95, None),
+])
+def test_escalation_reason(policy, score, confidence, reason):
+    assert policy.escalation_reason("TC-1", score, confidence) == reason
+
+
+def test_calibration_sample_is_stable_per_case():
+    policy = CascadePolicy(calibration_rate=0.5)
+    chosen = [f"TC-{i}" for i in range(200) if policy.is_calibration(f"TC-{i}")]
+    assert 60 < len(chosen) < 140
+    assert chosen == [f"TC-{i}" for i in range(200) if policy.is_calibration(f"TC-{i}")]
+    for case_id in chosen[:5]:
+        assert policy.escalation_reason(case_id, 5, 0.99) == "calibration"
+    # 보정 표본보다 앞선 규칙이 우선
+    assert policy.escalation_reason(chosen[0], 3, 0.99) == "mid_score"
+
+
+def test_calibration_rate_bounds():
+    assert not any(hash_sample(f"TC-{i}", 0.0, "judge-cascade") for i in range(50))
+    assert all(hash_sample(f"TC-{i}", 1.0, "judge-cascade") for i in range(50))
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("JUDGE_CASCADE_MID", "1,4")
+    monkeypatch.setenv("JUDGE_CASCADE_MIN_CONFIDENCE", "0.5")
+    policy = CascadePolicy.from_env()
+    assert (policy.mid_low, policy.mid_high, policy.min_confidence) == (1, 4, 0.5)
+    assert policy.escalation_reason("TC-1", 4, 0.6) == "mid_score"
+    monkeypatch.setenv("JUDGE_CASCADE_MID", "invalid")
+    assert (CascadePolicy.from_env().mid_low, CascadePolicy.from_env().mid_high) == (2, 3)
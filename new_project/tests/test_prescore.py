@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("rapidfuzz")
+
+from prescore import PreScorePolicy, is_refusal, normalize  # noqa: E402
+
+
+def test_score_batch_rules():
+    policy = PreScorePolicy()
+    results = policy.score_batch([
+        ("exact", "테슬라 모델 Y의 주행거리는 약 500km입니다 [1].", "테슬라 모델 Y의 주행거리는 약 500km입니다."),
+        ("refusal", "죄송합니다, 해당 정보를 찾을 수 없습니다.", "약 30분이면 80%까지 충전됩니다."),
+        ("ambiguous", "충전 속도는 충전기 종류에 따라 다릅니다.", "슈퍼차저 기준 약 30분입니다."),
+        ("no_reference", "아무 답변", None),
+        ("blank_reference", "아무 답변", "   "),
+    ])
+    assert (results["exact"].score, results["exact"].rule) == (5, "exact_match")
+    assert (results["refusal"].score, results["refusal"].rule) == (0, "refusal")
+    assert (results["ambiguous"].score, results["ambiguous"].rule) == (None, "ambiguous")
+    assert (results["no_reference"].score, results["no_reference"].rule) == (None, "no_reference")
+    assert results["blank_reference"].rule == "no_reference"
+    assert results["exact"].reasoning.startswith("[사전 채점]")
+    assert results["ambiguous"].reasoning == ""
+
+
+def test_refusal_expected_answer_is_not_auto_scored():
+    # 기대 답변 자체가 "정보 없음"이면 거부 답변이 정답일 수 있으므로 Judge로 보냄
+    results = PreScorePolicy().score_batch([("c", "모르겠습니다.", "관련 정보가 없습니다.")])
+    assert results["c"].score is None
+
+
+def test_thresholds_and_refusal_score_are_configurable(monkeypatch):
+    monkeypatch.setenv("PRESCORE_MATCH_TOKEN_SET", "100")
+    monkeypatch.setenv("PRESCORE_MATCH_RATIO", "100")
+    monkeypatch.setenv("PRESCORE_REFUSAL_SCORE", "1")
+    policy = PreScorePolicy.from_env()
+    results = policy.score_batch([
+        ("near", "주행거리는 약 500km입니다", "주행거리는 약 500km 입니다!"),
+        ("refusal", "알 수 없습니다", "500km"),
+    ])
+    assert results["near"].rule == "ambiguous"
+    assert (results["refusal"].score, results["refusal"].rule) == (1, "refusal")
+
+
+def test_empty_batch():
+    assert PreScorePolicy().score_batch([]) == {}
+
+
+def test_normalize_and_is_refusal():
+    assert normalize("  Model Y [1], 500km!! ") == "model y 500km"
+    assert is_refusal("I don't know.")
+    assert not is_refusal("모르겠다는 사람도 있지만 " + "주행거리는 500km입니다. " * 30)
+    assert not is_refusal("")
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from run_journal import RunJournal, result_example_id
+
+
+def _judged(journal, case_id, score=4, **extra):
+    result = {"case_id": case_id, "judge_accuracy_score": score, "run_id": journal.run_id, **extra}
+    result["execution_id"] = journal.next_execution_id(case_id)
+    journal.record_judged(result)
+    return result
+
+
+def test_replay_restores_latest_state_per_case():
+    journal = RunJournal.create("run-a")
+    journal.record_start("eval", 3)
+    done = _judged(journal, "TC-1")
+    journal.record_persisted([done])
+    _judged(journal, "TC-2", parse_failed=True)
+    journal.record_error("TC-3", "timeout")
+
+    replayed = RunJournal.open("run-a")
+    assert replayed.started_at is not None
+    assert replayed.state("TC-1").status == "persisted"
+    assert replayed.state("TC-2").status == "judged"
+    assert replayed.state("TC-2").failed
+    assert replayed.state("TC-3").status == "error"
+    assert replayed.state("TC-3").error == "timeout"
+    assert replayed.counts() == {"persisted": 1, "judged": 1, "error": 1, "parse_failed": 1}
+
+
+def test_judge_error_result_is_rerun_target():
+    journal = RunJournal.create("run-e")
+    _judged(journal, "TC-1", score=0, error=True)
+    _judged(journal, "TC-2", score=0, error=False)
+
+    replayed = RunJournal.open("run-e")
+    assert replayed.state("TC-1").failed
+    assert not replayed.state("TC-2").failed
+
+
+def test_persisted_for_stale_attempt_is_ignored():
+    journal = RunJournal.create("run-b")
+    first = _judged(journal, "TC-1")
+    second = _judged(journal, "TC-1")
+    assert second["execution_id"] == "run-b/TC-1/2"
+    journal.record_persisted([first])
+
+    state = RunJournal.open("run-b").state("TC-1")
+    assert state.status == "judged"
+    assert state.attempt == 2
+    assert state.execution_id == second["execution_id"]
+
+
+def test_truncated_tail_is_skipped_and_repaired_before_append():
+    journal = RunJournal.create("run-c")
+    done = _judged(journal, "TC-1")
+    # 기록 도중 중단되어 마지막 줄이 잘린 상태
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "persisted", "case_id": "TC-1", "exec')
+
+    resumed = RunJournal.open("run-c")
+    assert resumed.state("TC-1").status == "judged"
+    resumed.record_persisted([done])
+
+    lines = journal.path.read_text(encoding="utf-8").splitlines()
+    assert lines[-1].startswith('{"type": "persisted"')
+    assert json.loads(lines[-1])["execution_id"] == done["execution_id"]
+    assert RunJournal.open("run-c").state("TC-1").status == "persisted"
+
+
+def test_open_latest_and_missing_run():
+    RunJournal.create("20260101-000000-aaaa").record_start("eval", 0)
+    RunJournal.create("20260102-000000-bbbb").record_start("eval", 0)
+    assert RunJournal.open("latest").run_id == "20260102-000000-bbbb"
+    with pytest.raises(FileNotFoundError):
+        RunJournal.open("no-such-run")
+
+
+def test_result_example_id_is_deterministic():
+    assert result_example_id("run/TC-1/1") == result_example_id("run/TC-1/1")
+    assert result_example_id("run/TC-1/1") != result_example_id("run/TC-1/2")
+    assert result_example_id(None) is None
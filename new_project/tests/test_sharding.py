@@ -0,0 +1,96 @@
+from collections import Counter
+
+import pytest
+
+from run_journal import RunJournal
+from sharding import parse_shard_run_id, pending_results, shard_journals, shard_of, shard_run_id
+
+
+def test_shard_of_is_stable_and_in_range():
+    # sha256 기반: 프로세스/머신/PYTHONHASHSEED와 무관하게 같은 값
+    assert [shard_of(f"TC-{i}", 4) for i in range(6)] == [shard_of(f"TC-{i}", 4) for i in range(6)]
+    assert shard_of("TC-1", 4) == 3
+    assert all(0 <= shard_of(f"TC-{i}", 3) < 3 for i in range(100))
+    assert shard_of("TC-1", 1) == 0
+    assert shard_of("TC-1", 0) == 0
+
+
+def test_shard_of_spreads_cases():
+    counts = Counter(shard_of(f"TC-{i}", 4) for i in range(400))
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 60
+
+
+def test_shard_run_id_round_trip():
+    run_id = shard_run_id("20261018-120000-abcd", 2, 4)
+    assert run_id == "20261018-120000-abcd.shard2of4"
+    assert parse_shard_run_id(run_id) == ("20261018-120000-abcd", 2, 4)
+    assert parse_shard_run_id("20261018-120000-abcd") is None
+
+
+def _shard_with_judged(group, index, total, case_ids):
+    journal = RunJournal(shard_run_id(group, index, total))
+    journal.record_start("shard", len(case_ids))
+    for case_id in case_ids:
+        result = {"case_id": case_id, "question": "q", "answer": "a", "judge_accuracy_score": 4,
+                  "run_id": journal.run_id}
+        result["execution_id"] = journal.next_execution_id(case_id)
+        journal.record_judged(result)
+    return journal
+
+
+class _NoFingerprints:
+    def record(self, results):
+        pass
+
+
+@pytest.fixture
+def merge(monkeypatch):
+    """
+    merge_shard_runs 를 LangSmith 없이 실행: 저장은 메모리 목록에 기록하고
+    저널 등록/저장 완료 기록(track_journals, _record_persisted)과 정렬은 실제 구현 사용
+    """
+    real_implementation = pytest.importorskip("real_implementation")
+    saved = []
+
+    class FakeSystem(real_implementation.RealAgentQASystem):
+        def __init__(self):
+            pass
+
+        def persist_results(self, results, log=print):
+            saved.extend(r["execution_id"] for r in results)
+            self._record_persisted(results)
+            return list(results)
+
+        def flush_results_mirror(self, timeout=None):
+            return True
+
+    monkeypatch.setattr(real_implementation, "RealAgentQASystem", FakeSystem)
+    monkeypatch.setattr(real_implementation, "FingerprintIndex", _NoFingerprints)
+    return real_implementation.merge_shard_runs, saved
+
+
+def test_merge_saves_in_case_order_exactly_once(merge):
+    merge_shard_runs, saved = merge
+    _shard_with_judged("grp", 0, 2, ["TC-10", "TC-2"])
+    _shard_with_judged("grp", 1, 2, ["TC-1"])
+
+    stats = merge_shard_runs("grp")
+    assert stats["saved"] == 3 and stats["failed"] == 0
+    assert saved == ["grp.shard1of2/TC-1/1", "grp.shard0of2/TC-2/1", "grp.shard0of2/TC-10/1"]
+    assert pending_results(shard_journals("grp")) == []
+
+    # 두 번째 병합은 저장할 결과가 없음 (저널 재생 기준)
+    again = merge_shard_runs("grp")
+    assert again["pending"] == 0 and again["saved"] == 0
+    assert len(saved) == 3
+
+
+def test_merge_resumes_only_unsaved_results(merge):
+    merge_shard_runs, saved = merge
+    shard = _shard_with_judged("grp2", 0, 1, ["TC-1", "TC-2"])
+    shard.record_persisted([shard.state("TC-1").result])
+
+    stats = merge_shard_runs("grp2")
+    assert stats["pending"] == 1
+    assert saved == ["grp2.shard0of1/TC-2/1"]
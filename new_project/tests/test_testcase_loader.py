@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+import testcase_loader
+from testcase_loader import LoadStats, detect_columns, iter_testcases, register_loader
+
+ROWS = [
+    ("TC-1", "테슬라 모델 Y 주행거리는?", "약 500km"),
+    ("TC-2", "리비안 R1T 충전 시간은?", ""),
+    ("", "case_id 없는 행", ""),
+    ("TC-4", "", "question 없는 행"),
+]
+EXPECTED = [
+    {"case_id": "TC-1", "question": "테슬라 모델 Y 주행거리는?", "expected_answer": "약 500km"},
+    {"case_id": "TC-2", "question": "리비안 R1T 충전 시간은?"},
+]
+HEADER = ["Case_ID", "Question", "Expected_Answer"]
+
+
+def _load(path):
+    stats = LoadStats()
+    return list(iter_testcases(str(path), stats, log=lambda _: None)), stats
+
+
+def _check(testcases, stats):
+    assert testcases == EXPECTED
+    assert (stats.loaded, stats.with_expected, stats.missing_case_id, stats.missing_question) == (2, 1, 1, 1)
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "cases.csv"
+    lines = [",".join(HEADER)] + [",".join(r) for r in ROWS] + [",,"]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8-sig")
+    _check(*_load(path))
+
+
+def test_tsv(tmp_path):
+    path = tmp_path / "cases.tsv"
+    path.write_text("\n".join("\t".join(r) for r in [HEADER, *ROWS]) + "\n", encoding="utf-8")
+    _check(*_load(path))
+
+
+def test_jsonl(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    records = [dict(zip(HEADER, r)) for r in ROWS]
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in records) + "\n\n", encoding="utf-8")
+    _check(*_load(path))
+
+
+def test_xlsx_reads_every_sheet_and_skips_leading_blank_rows(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "cases.xlsx"
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.append([None, None, None])
+    first.append(HEADER)
+    for r in ROWS[:2]:
+        first.append([c or None for c in r])
+    second = workbook.create_sheet("more")
+    second.append(["id", "query"])
+    second.append([7, "숫자 case_id"])
+    workbook.save(path)
+
+    testcases, stats = _load(path)
+    assert testcases == EXPECTED + [{"case_id": "7", "question": "숫자 case_id"}]
+    assert len(stats.sources) == 2
+
+
+def test_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "cases.parquet"
+    columns = list(zip(*ROWS))
+    pq.write_table(pa.table({h: list(c) for h, c in zip(HEADER, columns)}), path)
+    _check(*_load(path))
+
+
+def test_unsupported_suffix(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_testcases(str(tmp_path / "cases.txt")))
+
+
+def test_register_loader(tmp_path, monkeypatch):
+    monkeypatch.setattr(testcase_loader, "LOADERS", dict(testcase_loader.LOADERS))
+
+    def read_pipe(path):
+        with open(path, encoding="utf-8") as f:
+            rows = (line.rstrip("\n").split("|") for line in f)
+            yield path.name, [c.lower() for c in next(rows)], rows
+
+    register_loader(".pipe", read_pipe)
+    path = tmp_path / "cases.pipe"
+    path.write_text("case_id|question\nTC-9|질문\n", encoding="utf-8")
+    assert _load(path)[0] == [{"case_id": "TC-9", "question": "질문"}]
+
+
+def test_detect_columns_fallback_and_aliases():
+    columns = detect_columns(["id", "input", "reference"])
+    assert (columns.case_id, columns.question, columns.expected, columns.fallback) == ("id", "input", "reference", False)
+    fallback = detect_columns(["a", "b"])
+    assert (fallback.case_id, fallback.question, fallback.fallback) == ("a", "b", True)
+    assert detect_columns(["", ""]) is None
@@ -0,0 +1,106 @@
+"""
+LangSmith 트레이스 URL 로컬 생성
+- 호출 전에 루트 run_id를 직접 정해(config={"run_id": ...}) 넘기고, URL은 프로젝트/테넌트 정보로 로컬에서 조립
+  {web}/o/{tenant_id}/projects/p/{project_id}/r/{run_id}?poll=true  (LangSmith 웹이 run 반영 전이면 poll)
+- 프로젝트/테넌트 정보는 프로세스당 1회 백그라운드로 조회하고 로컬 파일(.cache/trace_links.json)에도 보관
+- 정보가 아직 없으면 프로젝트 이름 기반 URL로 폴백 (Judge 호출 경로에서 LangSmith 조회 왕복 0회)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "trace_links.json"
+
+
+def base_web_url() -> str:
+    """LangSmith 웹 URL 기본값 계산 (API 엔드포인트를 웹 도메인으로 정규화)"""
+    endpoint = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
+    endpoint = endpoint.replace("https://api.", "https://").replace("/api", "")
+    if not endpoint.startswith("http"):
+        endpoint = "https://smith.langchain.com"
+    return endpoint.rstrip("/")
+
+
+def new_run_id() -> uuid.UUID:
+    """루트 run ID (호출 전에 발급해 config={"run_id": ...} 로 전달)"""
+    return uuid.uuid4()
+
+
+class TraceLinker:
+    """run_id → 트레이스 URL (스레드 안전, 프로젝트 정보는 백그라운드 조회 후 캐시)"""
+
+    def __init__(self, client, project_name: Optional[str] = None, cache_path: Optional[Path] = None):
+        self.client = client
+        self.project_name = project_name or os.getenv("LANGSMITH_PROJECT", "llm-practice")
+        self.web_url = base_web_url()
+        self.cache_path = Path(cache_path or DEFAULT_CACHE_PATH)
+        self._lock = threading.Lock()
+        self._info: Optional[Dict[str, str]] = self._read_cache()
+        self._loading = False
+
+    @property
+    def _cache_key(self) -> str:
+        return f"{self.web_url}|{self.project_name}"
+
+    def _read_cache(self) -> Optional[Dict[str, str]]:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            info = data.get(self._cache_key)
+            return info if info and info.get("project_id") and info.get("tenant_id") else None
+        except Exception:
+            return None
+
+    def _write_cache(self, info: Dict[str, str]) -> None:
+        try:
+            data = {}
+            if self.cache_path.exists():
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            data[self._cache_key] = info
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except Exception:
+            pass
+
+    def warm(self) -> None:
+        """프로젝트/테넌트 정보 백그라운드 조회 (이미 있거나 조회 중이면 무시)"""
+        with self._lock:
+            if self._info is not None or self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._load, name="trace-link-warm", daemon=True).start()
+
+    def _load(self) -> None:
+        try:
+            # 첫 트레이스가 기록되기 전이면 프로젝트가 없을 수 있음 → 다음 url() 호출 때 다시 시도
+            project = self.client.read_project(project_name=self.project_name)
+            tenant_id = getattr(project, "tenant_id", None)
+            if project is not None and tenant_id:
+                info = {"project_id": str(project.id), "tenant_id": str(tenant_id)}
+                with self._lock:
+                    self._info = info
+                self._write_cache(info)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def url(self, run_id) -> Optional[str]:
+        """루트 run_id의 트레이스 URL (네트워크 호출 없음)"""
+        if not run_id:
+            return None
+        with self._lock:
+            info = self._info
+        if info:
+            return f"{self.web_url}/o/{info['tenant_id']}/projects/p/{info['project_id']}/r/{run_id}?poll=true"
+        self.warm()
+        return f"{self.web_url}/projects/{self.project_name}/runs/{run_id}"
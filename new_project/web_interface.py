@@ -15,6 +15,10 @@ from datetime import datetime
 import plotly.graph_objects as go
 
 from real_implementation import save_testcases_only, run_evaluation_only
+from history_store import is_archived, load_case_timeline
+from rate_limiter import lend_share
+from results_store import get_results_store, normalize_timestamp, results_store_enabled
+from run_journal import result_example_id
 from langchain import hub
 from langsmith import Client as LangSmithClient
 
@@ -22,8 +26,17 @@ class AgentQAWebInterface:
     """Agent QA 웹 인터페이스"""
     
     def __init__(self):
-        pass
+        # 대화 메모리를 세션 간에 유지하기 위해 오케스트레이터는 한 번만 생성
+        self._orchestrator = None
+        self._orchestrator_lock = threading.Lock()
     
+    def _get_orchestrator(self):
+        """EVAgentOrchestrator 지연 생성 (프로세스 당 1개)"""
+        with self._orchestrator_lock:
+            if self._orchestrator is None:
+                from ev_agent_orchestrator import EVAgentOrchestrator
+                self._orchestrator = EVAgentOrchestrator()
+            return self._orchestrator
     
     def create_interface(self):
         """Gradio 인터페이스 생성"""
@@ -67,17 +80,20 @@ class AgentQAWebInterface:
                             gr.Markdown("### 전기차 RAG Agent와 대화하기")
                             ev_chatbot = gr.Chatbot(label="Agent", type="messages", height=420)
                             ev_query = gr.Textbox(label="질문", placeholder="전기차 관련해서 무엇이든 물어보세요")
-                            ev_send = gr.Button("질문 보내기", variant="primary")
+                            with gr.Row():
+                                ev_send = gr.Button("질문 보내기", variant="primary")
+                                ev_reset = gr.Button("대화 초기화")
                         with gr.Column(scale=1):
                             gr.Markdown("### 참고 출처")
                             ev_citations = gr.Dataframe(headers=["rank", "source", "chunk_id"], interactive=False)
 
                     # EV RAG 핸들러
-                    def _ev_chat(history: list[dict], query: str):
+                    def _ev_chat(history: list[dict], query: str, request: gr.Request):
                         try:
-                            from ev_agent_orchestrator import EVAgentOrchestrator
-                            orchestrator = EVAgentOrchestrator()
-                            answer, citations = orchestrator.chat(query)
+                            orchestrator = self._get_orchestrator()
+                            # Gradio 세션별로 대화 메모리 분리 (전체 history는 재전송하지 않음)
+                            session_id = getattr(request, "session_hash", None) or "default"
+                            answer, citations = orchestrator.chat(query, session_id=session_id)
                             new_history = (history or []) + [{"role": "user", "content": query}, {"role": "assistant", "content": answer}]
                             rows = [[c["rank"], c["source"], c["chunk_id"]] for c in citations]
                             return new_history, "", rows
@@ -85,7 +101,14 @@ class AgentQAWebInterface:
                             new_history = (history or []) + [{"role": "assistant", "content": f"오류: {e}"}]
                             return new_history, query, []
 
+                    def _ev_reset(request: gr.Request):
+                        # 세션의 대화 메모리/검색 캐시/라우팅 이력 삭제 (오케스트레이터가 아직 없으면 지울 상태도 없음)
+                        if self._orchestrator is not None:
+                            self._orchestrator.reset(getattr(request, "session_hash", None) or "default")
+                        return [], "", []
+
                     ev_send.click(_ev_chat, inputs=[ev_chatbot, ev_query], outputs=[ev_chatbot, ev_query, ev_citations])
+                    ev_reset.click(_ev_reset, outputs=[ev_chatbot, ev_query, ev_citations])
                     # Enter 제출 지원
                     ev_query.submit(_ev_chat, inputs=[ev_chatbot, ev_query], outputs=[ev_chatbot, ev_query, ev_citations])
 
@@ -96,7 +119,7 @@ class AgentQAWebInterface:
                             gr.Markdown("### 3. 데이터셋에 TestCase 생성 및 업데이트")
                             
                             # 3. 데이터셋 설명
-                            gr.Markdown("`TestCase.xlsx` 파일의 내용을 LangSmith `Agent_QA_Scenario` 데이터셋에 저장합니다.")
+                            gr.Markdown("`TestCase.xlsx` (또는 업로드한 csv/jsonl/parquet) 파일의 내용을 LangSmith `Agent_QA_Scenario` 데이터셋에 저장합니다.")
                             
                             # 1. 버튼
                             save_tc_btn = gr.Button("TestCase → LangSmith 저장", variant="primary", size="lg")
@@ -113,8 +136,8 @@ class AgentQAWebInterface:
                             # 2. 파일 업로드
                             with gr.Row():
                                 file_upload = gr.File(
-                                    label="📤 Excel 파일 업로드 (선택사항)",
-                                    file_types=[".xlsx", ".xls"],
+                                    label="📤 테스트케이스 파일 업로드 (선택사항: xlsx / xls / csv / tsv / jsonl / parquet)",
+                                    file_types=[".xlsx", ".xlsm", ".xls", ".csv", ".tsv", ".jsonl", ".ndjson", ".parquet"],
                                     type="filepath"
                                 )
                             
@@ -291,8 +314,14 @@ class AgentQAWebInterface:
                 yield "\n".join(lines[-200:])
 
             def _run_eval_stream():
+                # 평가 서브프로세스에 이 서버 레이트 몫의 일부(WEB_EVAL_RATE_SHARE)를 넘기고, 남은 몫은 대화형(채팅) 전용
+                with lend_share(float(os.getenv("WEB_EVAL_RATE_SHARE", "0.7"))) as eval_share:
+                    yield from _run_eval_subprocess(eval_share)
+
+            def _run_eval_subprocess(eval_share: str):
                 env = os.environ.copy()
                 env["PYTHONUNBUFFERED"] = "1"
+                env["LLM_RATE_SHARE"] = eval_share
                 proc = subprocess.Popen(
                     [sys.executable, "-u", "-c", "import sys; sys.path.append('new_project'); from real_implementation import run_evaluation_only; run_evaluation_only()"],
                     stdout=subprocess.PIPE,
@@ -355,18 +384,49 @@ class AgentQAWebInterface:
             # 평가 결과 핸들러
             # 평가결과 탭: Trace 열/버튼 비활성화 (요청으로 제거)
 
-            def _load_results():
+            def _local_results_store():
+                """로컬 결과 저장소에 데이터가 있으면 반환 (LangSmith 조회 결과와 병합)"""
+                try:
+                    store = get_results_store() if results_store_enabled() else None
+                    return store if store is not None and store.count() > 0 else None
+                except Exception:
+                    return None
+
+            def _local_example_ids(local: List[Dict]) -> set:
+                """로컬 결과에 대응하는 LangSmith 결과 예제 ID (미러한 예제 + --results-store import로 가져온 예제)"""
+                ids = set()
+                for r in local:
+                    eid = r.get("execution_id") or ""
+                    ids.add(eid.split("/", 1)[1] if eid.startswith("langsmith/") else str(result_example_id(eid)))
+                return ids
+
+            def _result_rows():
+                """(case_id, question, answer, score) 목록: 로컬 저장소 + LangSmith 결과 데이터셋 병합 (같은 결과는 한 번만)"""
+                store = _local_results_store()
+                local = store.list_results() if store is not None else []
+                rows = [(r["case_id"], r["question"] or "", r["answer"] or "", r["score"]) for r in local]
+                known = _local_example_ids(local)
                 try:
                     client = LangSmithClient()
-                    dataset = "Agent_QA_Scenario_Judge_Result"
-                    rows = []
-                    
-                    for ex in client.list_examples(dataset_name=dataset):
+                    for ex in client.list_examples(dataset_name="Agent_QA_Scenario_Judge_Result"):
+                        if str(ex.id) in known:
+                            continue
                         case_id = ex.metadata.get("case_id") if ex.metadata else None
                         question = ex.inputs.get("input", "")
                         answer = ex.outputs.get("answer", "") if ex.outputs else ""
                         score = ex.outputs.get("judge_accuracy_score") if ex.outputs else None
-                        
+                        rows.append((case_id, question, answer, score))
+                except Exception:
+                    # LangSmith 장애 시 로컬 결과만 표시
+                    if not local:
+                        raise
+                return rows
+
+            def _load_results():
+                try:
+                    rows = []
+                    
+                    for case_id, question, answer, score in _result_rows():
                         rows.append({
                             "case_id": case_id,
                             "question": question[:100] + "..." if len(question) > 100 else question,
@@ -423,41 +483,51 @@ class AgentQAWebInterface:
 
             # 히스토리 유틸
             def _history_list_case_ids():
+                store = _local_results_store()
+                ids = set(store.case_ids()) if store is not None else set()
                 try:
                     client = LangSmithClient()
-                    ids = []
                     for ex in client.list_examples(dataset_name="Agent_QA_Scenario_Judge_History"):
                         if ex.metadata and ex.metadata.get("case_id"):
-                            ids.append(ex.metadata["case_id"])
-                    return sorted(list(set(ids)))
+                            ids.add(ex.metadata["case_id"])
                 except Exception:
-                    return []
+                    pass
+                return sorted(ids)
+
+            def _merged_case_timeline(case_id: str) -> Dict:
+                """로컬 저장소 + LangSmith 히스토리(타임라인 예제 + 미압축 실행 레코드)를 시간순으로 병합"""
+                store = _local_results_store()
+                local = store.case_timeline(case_id) if store is not None else {"question": "", "entries": []}
+                try:
+                    remote = load_case_timeline(LangSmithClient(), "Agent_QA_Scenario_Judge_History", case_id)
+                except Exception:
+                    if not local["entries"]:
+                        raise
+                    remote = {"question": "", "entries": []}
+                entries = list(remote["entries"])
+                seen = {e.get("execution_id") for e in entries if e.get("execution_id")}
+                for e in local["entries"]:
+                    eid = e.get("execution_id") or ""
+                    # LangSmith에서 가져온 결과는 원격 히스토리에 이미 있음
+                    if eid in seen or (eid.startswith("langsmith/") and remote["entries"]):
+                        continue
+                    entries.append(e)
+                entries.sort(key=lambda e: normalize_timestamp(e.get("timestamp")))
+                return {"question": local["question"] or remote["question"], "entries": entries}
 
             def _history_load_case(case_id: str):
                 try:
-                    client = LangSmithClient()
-                    target = None
-                    for ex in client.list_examples(dataset_name="Agent_QA_Scenario_Judge_History"):
-                        if ex.metadata and ex.metadata.get("case_id") == case_id:
-                            target = ex
-                            break
-                    if not target:
+                    timeline = _merged_case_timeline(case_id)
+                    entries = timeline["entries"]
+                    if not entries:
                         return go.Figure(), pd.DataFrame(), "데이터 없음", ""
-                    outs = target.outputs or {}
-                    scores = list(outs.get("scores", []))
-                    times = list(outs.get("timestamps", []))
-                    reasons = list(outs.get("reasons", []))
-                    answers = list(outs.get("answers", []))
-                    traces = list(outs.get("trace_urls", []))
+                    scores = [e["score"] for e in entries]
+                    times = [e.get("timestamp", "") for e in entries]
+                    reasons = [e.get("reasoning", "") for e in entries]
+                    answers = ["(보관됨)" if is_archived(e.get("answer")) else e.get("answer", "") for e in entries]
+                    traces = [e.get("trace_url", "") or "" for e in entries]
                     # 질문 내용은 inputs.input에서 가져옴
-                    raw_question = ""
-                    try:
-                        raw_question = target.inputs.get("input", "") if target.inputs else ""
-                    except Exception:
-                        raw_question = ""
-                    # 길이 보정 (누락된 trace를 빈 문자열로 채움)
-                    while len(traces) < len(scores):
-                        traces.append("")
+                    raw_question = timeline["question"]
                     # 그래프는 시간축 대신 실행 순번 기준으로 표시
                     run_indices = list(range(1, len(scores) + 1))
                     df = pd.DataFrame({"run": run_indices, "timestamp": times, "score": scores, "reason": reasons, "answer": answers})